@@ -0,0 +1,52 @@
+"""
+Benchmarks `Network.add_links` adding links to a network which already has as many links. Half of the added links
+have ids already used in the network and all of them run alongside existing links, so their ids and multi edge
+indices need resolving.
+
+    python -m benchmarks.add_links --n 1000000
+"""
+import argparse
+import logging
+import time
+
+import genet
+
+
+def links_between(n_nodes, n_links, id_offset=0):
+    return {
+        str(id_offset + i): {
+            "from": str(i % n_nodes),
+            "to": str((i + 1) % n_nodes),
+            "length": 50.0,
+            "freespeed": 13.89,
+            "capacity": 600.0,
+            "permlanes": 1.0,
+            "modes": {"car", "bus"},
+        }
+        for i in range(n_links)
+    }
+
+
+def main(n):
+    n_nodes = n // 2
+    network = genet.Network("epsg:27700")
+    network.add_nodes({str(i): {"x": float(i), "y": 0.0} for i in range(n_nodes)}, silent=True)
+
+    start = time.perf_counter()
+    network.add_links(links_between(n_nodes, n), silent=True)
+    print(f"add {n} links to an empty network: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    reindexing_dict, _ = network.add_links(links_between(n_nodes, n, id_offset=n // 2), silent=True)
+    print(
+        f"add {n} links to a network with {n} links: {time.perf_counter() - start:.2f}s "
+        f"({len(reindexing_dict)} links reindexed)"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=1000000, help="number of links to add")
+    args = parser.parse_args()
+    main(args.n)
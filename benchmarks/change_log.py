@@ -0,0 +1,49 @@
+"""
+Benchmarks `Network.apply_attributes_to_links` under each change log level, and building the change log
+pandas.DataFrame afterwards, which is when the differences of attributes are computed.
+
+    python -m benchmarks.change_log --side 100
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import genet
+from benchmarks.synthetic_network import write_grid_network_xml
+from genet.modify.change_log import LEVELS
+
+
+def main(side):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "network.xml")
+        n_nodes, n_links = write_grid_network_xml(path, side)
+        print(f"Network with {n_nodes} nodes and {n_links} links")
+
+        for level in LEVELS:
+            n = genet.read_matsim_network(path, epsg="epsg:27700")
+            n.set_change_log_level(level)
+            new_attributes = {
+                link_id: {"freespeed": 2 * link["freespeed"], "attributes": {"lit": "yes"}}
+                for link_id, link in n.links()
+            }
+
+            start = time.perf_counter()
+            n.apply_attributes_to_links(new_attributes)
+            applied = time.perf_counter() - start
+            start = time.perf_counter()
+            n.change_log.to_dataframe()
+            built = time.perf_counter() - start
+            print(
+                f"change log level {level}: apply_attributes_to_links {applied:.2f}s, "
+                f"build change log {built:.2f}s ({len(n.change_log)} records)"
+            )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--side", type=int, default=100, help="number of nodes along the grid side")
+    args = parser.parse_args()
+    main(args.side)
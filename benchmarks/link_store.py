@@ -0,0 +1,76 @@
+"""
+Benchmarks peak memory and time of opening a Network from a memory-mapped link store and reading link data, against
+reading the whole Network from a binary snapshot. Each measurement runs in a fresh process.
+
+    python -m benchmarks.link_store --side 300
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import genet
+from benchmarks.synthetic_network import write_grid_network_xml
+from genet.utils import profiling
+
+
+def prepare(tmpdir, side, queue):
+    path = os.path.join(tmpdir, "network.xml")
+    n_nodes, n_links = write_grid_network_xml(path, side)
+    n = genet.read_matsim_network(path, epsg="epsg:27700")
+    snapshot = n.write_snapshot(os.path.join(tmpdir, "network"))
+    link_store = n.write_link_store(os.path.join(tmpdir, "link_store"))
+    queue.put((n_nodes, n_links, snapshot, link_store))
+
+
+def read_snapshot(path, queue):
+    start = time.perf_counter()
+    n = genet.read_snapshot(path)
+    n.link_attribute_data_under_keys(["freespeed", "modes"])
+    n.link("0")
+    queue.put((time.perf_counter() - start, profiling.peak_memory_mb()))
+
+
+def read_link_store(path, queue):
+    start = time.perf_counter()
+    n = genet.read_link_store(path)
+    n.link_attribute_data_under_keys(["freespeed", "modes"])
+    n.link("0")
+    queue.put((time.perf_counter() - start, profiling.peak_memory_mb()))
+
+
+def in_fresh_process(target, *args):
+    # peak memory is inherited by child processes on some platforms, the benchmark process itself stays small
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main(side):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        n_nodes, n_links, snapshot, link_store = in_fresh_process(prepare, tmpdir, side)
+        print(f"Network with {n_nodes} nodes and {n_links} links")
+
+        for name, target, source in [
+            ("snapshot", read_snapshot, snapshot),
+            ("link store", read_link_store, link_store),
+        ]:
+            seconds, peak_memory = in_fresh_process(target, source)
+            print(
+                f"open {name} and read freespeed and modes of all links: {seconds:.2f}s, "
+                f"peak memory: {peak_memory:.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--side", type=int, default=300, help="number of nodes along the grid side")
+    args = parser.parse_args()
+    main(args.side)
@@ -0,0 +1,102 @@
+"""
+Benchmarks solvers of the maximum stable set problem snapping stops to links on a synthetic problem graph: lines of
+`--segment` stops, each with a pool of candidate links connected to each other, where a share of the candidate links of
+consecutive stops are not connected by a network path. Compares building the Pyomo model of the whole problem (and
+solving it, if `--solver` is available) against solving each connected component on its own, with HiGHS (in
+`--processes` processes) or greedily.
+
+    python -m benchmarks.max_stable_set_solvers --stops 2000 --links 5 --no_path 0.3 --segment 50 --processes 4
+"""
+import argparse
+import itertools
+import logging
+import random
+import time
+
+import networkx as nx
+import pyomo.environ as pe
+
+from genet import max_stable_set
+
+
+def problem_graph(stops, links, no_path, segment=None, seed=0):
+    rng = random.Random(seed)
+    graph = nx.DiGraph()
+    for stop in range(stops):
+        for link in range(links):
+            graph.add_node(
+                f"stop_{stop}.link:link_{stop}_{link}",
+                id=f"stop_{stop}",
+                link_id=f"link_{stop}_{link}",
+                coeff=1 / rng.uniform(50, 500),
+            )
+    for stop in range(stops):
+        pool = [f"stop_{stop}.link:link_{stop}_{link}" for link in range(links)]
+        graph.add_edges_from(itertools.combinations(pool, 2))
+        if stop + 1 < stops and (segment is None or (stop + 1) % segment):
+            next_pool = [f"stop_{stop + 1}.link:link_{stop + 1}_{link}" for link in range(links)]
+            graph.add_edges_from((u, v) for u in pool for v in next_pool if rng.random() < no_path)
+    return graph
+
+
+def main(stops, links, no_path, segment=None, solver=None, processes=1):
+    graph = problem_graph(stops, links, no_path, segment)
+    components = [len(c) for c in nx.weakly_connected_components(graph)]
+    print(
+        f"Problem graph with {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges and "
+        f"{len(components)} connected components, the largest with {max(components)} nodes"
+    )
+
+    def objective(selected):
+        return sum(graph.nodes[node]["coeff"] for node in selected)
+
+    start = time.perf_counter()
+    model = max_stable_set.pyomo_model(graph)
+    print(f"build Pyomo model: {time.perf_counter() - start:.2f}s")
+    if solver is not None and pe.SolverFactory(solver).available(exception_flag=False):
+        start = time.perf_counter()
+        pe.SolverFactory(solver).solve(model)
+        selected = [v for v in model.vertices if round(model.x[v].value or 0) == 1]
+        print(
+            f"solve Pyomo model with {solver}: {time.perf_counter() - start:.2f}s, "
+            f"objective {objective(selected):.4f}"
+        )
+    elif solver is not None:
+        print(f"solver {solver} is not available")
+
+    for in_process_solver, solver_processes in [("highs", 1), ("highs", processes), ("greedy", 1)]:
+        start = time.perf_counter()
+        selected = max_stable_set.solve_by_components(
+            graph, solver=in_process_solver, processes=solver_processes
+        )
+        print(
+            f"solve by components with {in_process_solver} in {solver_processes} process(es): "
+            f"{time.perf_counter() - start:.2f}s, objective {objective(selected):.4f}"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stops", type=int, default=2000, help="number of stops")
+    parser.add_argument("--links", type=int, default=5, help="number of candidate links per stop")
+    parser.add_argument(
+        "--no_path",
+        type=float,
+        default=0.3,
+        help="share of candidate links of consecutive stops without a path between them",
+    )
+    parser.add_argument(
+        "--segment",
+        type=int,
+        default=None,
+        help="number of stops in each line of connected stops, defaults to all stops in one line",
+    )
+    parser.add_argument(
+        "--solver", type=str, default=None, help="solver to pass the Pyomo model to, e.g. cbc"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=1, help="number of processes to solve components in"
+    )
+    args = parser.parse_args()
+    main(args.stops, args.links, args.no_path, args.segment, args.solver, args.processes)
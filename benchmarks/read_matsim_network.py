@@ -0,0 +1,36 @@
+"""
+Benchmarks reading a MATSim network.xml across different numbers of processes (shards).
+
+    python benchmarks/read_matsim_network.py --side 500 --processes 1 2 4 8
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import genet
+from benchmarks.synthetic_network import write_grid_network_xml
+
+
+def main(side, processes):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "network.xml")
+        n_nodes, n_links = write_grid_network_xml(path, side)
+        print(
+            f"Network with {n_nodes} nodes and {n_links} links, "
+            f"{os.path.getsize(path) / 1024 ** 2:.1f} MB on disk"
+        )
+        for p in processes:
+            start = time.perf_counter()
+            genet.read_matsim_network(path, epsg="epsg:27700", processes=p)
+            print(f"processes={p}: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--side", type=int, default=300, help="number of nodes along the grid side")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    main(args.side, args.processes)
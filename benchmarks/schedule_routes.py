@@ -0,0 +1,60 @@
+"""
+Benchmarks iterating over the Routes and Services of a Schedule, the way writers and validators do.
+
+    python -m benchmarks.schedule_routes --n 1000
+"""
+import argparse
+import logging
+import time
+
+from genet.schedule_elements import Route, Schedule, Service, Stop
+
+
+def schedule_with_routes(n_routes, routes_per_service=10):
+    services = []
+    for i in range(0, n_routes, routes_per_service):
+        routes = []
+        for j in range(i, min(i + routes_per_service, n_routes)):
+            stops = [
+                Stop(id=f"{j}_{k}", x=528000 + 100 * k, y=182000 + 10 * j, epsg="epsg:27700")
+                for k in range(3)
+            ]
+            routes.append(
+                Route(
+                    id=str(j),
+                    route_short_name=f"route {j}",
+                    mode="bus",
+                    stops=stops,
+                    trips={
+                        "trip_id": [f"{j}_trip"],
+                        "trip_departure_time": ["08:00:00"],
+                        "vehicle_id": [f"veh_{j}"],
+                    },
+                    arrival_offsets=["00:00:00", "00:02:00", "00:04:00"],
+                    departure_offsets=["00:00:00", "00:02:00", "00:04:00"],
+                )
+            )
+        services.append(Service(id=f"service_{i}", routes=routes))
+    return Schedule(epsg="epsg:27700", services=services)
+
+
+def main(n):
+    start = time.perf_counter()
+    schedule = schedule_with_routes(n)
+    print(f"Schedule with {n} routes built in {time.perf_counter() - start:.2f}s")
+
+    for i in range(2):
+        start = time.perf_counter()
+        n_trips = sum(len(route.trips["trip_id"]) for route in schedule.routes())
+        print(f"iterate routes, pass {i + 1}: {time.perf_counter() - start:.2f}s ({n_trips} trips)")
+    start = time.perf_counter()
+    n_routes = sum(len(list(service.routes())) for service in schedule.services())
+    print(f"iterate routes of services: {time.perf_counter() - start:.2f}s ({n_routes} routes)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=1000, help="number of routes")
+    args = parser.parse_args()
+    main(args.n)
@@ -0,0 +1,127 @@
+"""
+Benchmarks `Network.simplify` on a synthetic grid network whose streets between junctions are split into `--segments`
+links in both directions, with a Schedule of bus routes along the rows of the grid.
+
+    python -m benchmarks.simplify_network --side 100 --segments 5
+"""
+import argparse
+import logging
+import random
+import time
+
+import genet
+from genet.schedule_elements import Route, Schedule, Service, Stop
+
+
+def chained_grid_network(side: int, segments: int, seed: int = 0):
+    """
+    :param side: number of junctions along each side of the grid
+    :param segments: number of links each street between neighbouring junctions is split into
+    :param seed: random seed for link attributes
+    :return: genet.Network
+    """
+    rng = random.Random(seed)
+    spacing = 50.0 * segments
+    nodes = {}
+    links = {}
+
+    def node(x, y):
+        node_id = f"{x}_{y}"
+        nodes.setdefault(node_id, {"x": 528000.0 + x, "y": 182000.0 + y})
+        return node_id
+
+    def street(start, step):
+        path = [node(start[0] + k * step[0], start[1] + k * step[1]) for k in range(segments + 1)]
+        for u, v in list(zip(path[:-1], path[1:])) + list(zip(path[1:][::-1], path[:-1][::-1])):
+            link_id = str(len(links))
+            links[link_id] = {
+                "id": link_id,
+                "from": u,
+                "to": v,
+                "length": 50.0,
+                "freespeed": rng.choice([4.17, 8.33, 13.89]),
+                "capacity": rng.choice([600.0, 1200.0]),
+                "permlanes": 1.0,
+                "oneway": "1",
+                "modes": {"car", "bus"},
+                "attributes": {"osm:way:id": link_id},
+            }
+        return path
+
+    rows = []
+    for i in range(side):
+        row = []
+        for j in range(side):
+            if j + 1 < side:
+                row.extend(street((i * spacing, j * spacing), (0, 50.0))[:-1])
+            if i + 1 < side:
+                street((i * spacing, j * spacing), (50.0, 0))
+        rows.append(row + [node(i * spacing, (side - 1) * spacing)])
+
+    n = genet.Network("epsg:27700")
+    n.add_nodes(nodes, silent=True)
+    n.add_links(links, silent=True)
+
+    link_by_nodes = {(data["from"], data["to"]): link_id for link_id, data in links.items()}
+    services = []
+    for i, row in enumerate(rows[:: max(1, side // 10)]):
+        stops = [
+            Stop(
+                id=f"stop_{node_id}",
+                x=nodes[node_id]["x"],
+                y=nodes[node_id]["y"],
+                epsg="epsg:27700",
+                linkRefId=link_by_nodes[(row[k - 1], node_id)],
+            )
+            for k, node_id in enumerate(row)
+            if k > 0 and k % segments == 0
+        ]
+        route = [link_by_nodes[(u, v)] for u, v in zip(row[segments - 1 :], row[segments:])]
+        services.append(
+            Service(
+                id=f"service_{i}",
+                routes=[
+                    Route(
+                        id=f"route_{i}",
+                        route_short_name=str(i),
+                        mode="bus",
+                        stops=stops,
+                        trips={
+                            "trip_id": [f"trip_{i}"],
+                            "trip_departure_time": ["08:00:00"],
+                            "vehicle_id": [f"veh_{i}"],
+                        },
+                        arrival_offsets=["00:00:00"] * len(stops),
+                        departure_offsets=["00:00:00"] * len(stops),
+                        route=route,
+                    )
+                ],
+            )
+        )
+    n.schedule = Schedule(epsg="epsg:27700", services=services)
+    return n
+
+
+def main(side, segments):
+    n = chained_grid_network(side, segments)
+    print(f"Network with {len(n.graph)} nodes and {len(n.link_id_mapping)} links")
+
+    start = time.perf_counter()
+    n.simplify()
+    print(
+        f"simplify: {time.perf_counter() - start:.2f}s, {len(n.graph)} nodes and "
+        f"{len(n.link_id_mapping)} links left"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--side", type=int, default=100, help="number of junctions along the grid side"
+    )
+    parser.add_argument(
+        "--segments", type=int, default=5, help="number of links between neighbouring junctions"
+    )
+    args = parser.parse_args()
+    main(args.side, args.segments)
@@ -0,0 +1,65 @@
+"""
+Benchmarks reading a Network from a binary snapshot against reading it from MATSim network.xml. With `--spatial_tree`,
+also compares building the spatial tree of the network read back against saving the tree with the snapshot.
+
+    python -m benchmarks.snapshot --side 300 --spatial_tree
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import genet
+from benchmarks.synthetic_network import write_grid_network_xml
+
+
+def main(side, spatial_tree=False):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "network.xml")
+        n_nodes, n_links = write_grid_network_xml(path, side)
+        print(f"Network with {n_nodes} nodes and {n_links} links")
+
+        start = time.perf_counter()
+        n = genet.read_matsim_network(path, epsg="epsg:27700")
+        print(f"read network.xml: {time.perf_counter() - start:.2f}s")
+
+        for compress in [False, True]:
+            start = time.perf_counter()
+            snapshot = n.write_snapshot(os.path.join(tmpdir, f"network_{compress}"), compress)
+            print(
+                f"write snapshot (compress={compress}): {time.perf_counter() - start:.2f}s, "
+                f"{os.path.getsize(snapshot) / 1024 ** 2:.1f} MB"
+            )
+            start = time.perf_counter()
+            genet.read_snapshot(snapshot)
+            print(f"read snapshot (compress={compress}): {time.perf_counter() - start:.2f}s")
+
+        if spatial_tree:
+            snapshot = n.write_snapshot(os.path.join(tmpdir, "network"))
+            start = time.perf_counter()
+            genet.read_snapshot(snapshot).spatial_tree()
+            print(f"read snapshot and build spatial tree: {time.perf_counter() - start:.2f}s")
+
+            start = time.perf_counter()
+            snapshot = n.write_snapshot(os.path.join(tmpdir, "network_tree"), spatial_tree=True)
+            print(
+                f"build spatial tree and write snapshot with it: {time.perf_counter() - start:.2f}s, "
+                f"{os.path.getsize(snapshot) / 1024 ** 2:.1f} MB"
+            )
+            start = time.perf_counter()
+            genet.read_snapshot(snapshot).spatial_tree()
+            print(f"read snapshot with spatial tree: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--side", type=int, default=300, help="number of nodes along the grid side")
+    parser.add_argument(
+        "--spatial_tree",
+        action="store_true",
+        help="also benchmark saving the spatial tree of the network with the snapshot",
+    )
+    args = parser.parse_args()
+    main(args.side, args.spatial_tree)
@@ -0,0 +1,79 @@
+"""
+Benchmarks `SpatialTree.shortest_path_lengths` on link pairs sharing source links, the way `MaxStableSet` queries
+them, against routing each pair on its own. The second pass is answered from the shortest path cache. With
+`--cutoff`, the pairs are also routed on a new tree looking for paths only up to `cutoff` metres long.
+
+    python -m benchmarks.spatial_tree_paths --side 40 --sources 100 --targets 20 --cutoff 500
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+import genet
+from benchmarks.synthetic_network import write_grid_network_xml
+from genet.utils.spatial import SpatialTree
+
+
+def main(side, sources, targets, cutoff=None):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "network.xml")
+        n_nodes, n_links = write_grid_network_xml(path, side)
+        n = genet.read_matsim_network(path, epsg="epsg:27700")
+    print(f"Network with {n_nodes} nodes and {n_links} links")
+    start = time.perf_counter()
+    spatial_tree = SpatialTree(n)
+    print(f"build SpatialTree: {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    spatial_tree = spatial_tree.modal_subtree(modes="car")
+    print(f"extract modal subtree: {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(0)
+    link_ids = sorted(spatial_tree.links["link_id"])
+    source_links = rng.sample(link_ids, sources)
+    df = pd.DataFrame(
+        [(u, v) for u in source_links for v in rng.sample(link_ids, targets)], columns=["u", "v"]
+    )
+
+    start = time.perf_counter()
+    df.apply(lambda x: spatial_tree.path_length(x["u"], x["v"], weight="length"), axis=1)
+    print(f"route {len(df)} link pairs one by one: {time.perf_counter() - start:.2f}s")
+
+    for i in range(2):
+        start = time.perf_counter()
+        spatial_tree.shortest_path_lengths(df.copy())
+        print(
+            f"route {len(df)} link pairs grouped by source, pass {i + 1}: "
+            f"{time.perf_counter() - start:.2f}s {spatial_tree.shortest_path_cache_info()}"
+        )
+
+    if cutoff is not None:
+        spatial_tree.clear_shortest_path_cache()
+        df["cutoff"] = cutoff
+        start = time.perf_counter()
+        df = spatial_tree.shortest_path_lengths(df, cutoff_col="cutoff")
+        print(
+            f"route {len(df)} link pairs grouped by source within {cutoff}m: "
+            f"{time.perf_counter() - start:.2f}s ({df['path_lengths'].notna().sum()} paths found)"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--side", type=int, default=40, help="number of nodes along each side of the grid"
+    )
+    parser.add_argument("--sources", type=int, default=100, help="number of source links")
+    parser.add_argument(
+        "--targets", type=int, default=20, help="number of target links per source link"
+    )
+    parser.add_argument(
+        "--cutoff", type=float, default=None, help="longest path to look for, in metres"
+    )
+    args = parser.parse_args()
+    main(args.side, args.sources, args.targets, args.cutoff)
@@ -0,0 +1,47 @@
+"""
+Generates synthetic MATSim networks for benchmarking: a square grid of nodes with links in both directions between
+neighbouring nodes.
+"""
+import random
+
+
+def write_grid_network_xml(path, side: int, seed: int = 0):
+    """
+    Writes a MATSim network.xml with `side` x `side` nodes in epsg:27700 and 4 * side * (side - 1) links
+    :param path: path to write the network.xml to
+    :param side: number of nodes along each side of the grid
+    :param seed: random seed for link attributes
+    :return: number of nodes, number of links
+    """
+    rng = random.Random(seed)
+    n_links = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(
+            '<!DOCTYPE network SYSTEM "http://www.matsim.org/files/dtd/network_v2.dtd">\n<network>\n'
+        )
+        f.write("\t<nodes>\n")
+        for i in range(side):
+            for j in range(side):
+                f.write(f'\t\t<node id="{i}_{j}" x="{528000 + 50 * i}" y="{182000 + 50 * j}" />\n')
+        f.write("\t</nodes>\n")
+        f.write(
+            '\t<links capperiod="01:00:00" effectivecellsize="7.5" effectivelanewidth="3.75">\n'
+        )
+        for i in range(side):
+            for j in range(side):
+                for di, dj in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
+                    if 0 <= i + di < side and 0 <= j + dj < side:
+                        f.write(
+                            f'\t\t<link id="{n_links}" from="{i}_{j}" to="{i + di}_{j + dj}" '
+                            f'length="50.0" freespeed="{rng.choice([4.17, 8.33, 13.89])}" '
+                            f'capacity="{rng.choice([600.0, 1200.0])}" permlanes="1.0" oneway="1" '
+                            'modes="car,bus">\n'
+                            "\t\t\t<attributes>\n"
+                            f'\t\t\t\t<attribute name="osm:way:id" class="java.lang.Long">{n_links}</attribute>\n'
+                            "\t\t\t</attributes>\n"
+                            "\t\t</link>\n"
+                        )
+                        n_links += 1
+        f.write("\t</links>\n</network>\n")
+    return side * side, n_links
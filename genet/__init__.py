@@ -9,11 +9,13 @@ from genet.input.read import (
     read_json,
     read_json_network,
     read_json_schedule,
+    read_link_store,
     read_matsim,
     read_matsim_network,
     read_matsim_road_pricing,
     read_matsim_schedule,
     read_osm,
+    read_snapshot,
 )
 from genet.max_stable_set import MaxStableSet
 from genet.schedule_elements import Route, Schedule, Service, Stop
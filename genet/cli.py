@@ -1,5 +1,6 @@
 import json
 import logging
+import math
 import os
 import time
 from pathlib import Path
@@ -67,6 +68,7 @@ def _read_network(
     projection: str,
     path_to_schedule: Optional[Path] = None,
     path_to_vehicles: Optional[Path] = None,
+    processes: int = 1,
 ) -> Network:
     logging.info("Reading in network at {}".format(path_to_network))
     if path_to_schedule is not None:
@@ -88,6 +90,7 @@ def _read_network(
         epsg=projection,
         path_to_schedule=path_to_schedule.as_posix() if path_to_schedule is not None else None,
         path_to_vehicles=path_to_vehicles.as_posix() if path_to_vehicles is not None else None,
+        processes=processes,
     )
     return network
 
@@ -101,38 +104,21 @@ def _cast_catchment(network_spatial_tree, df_stops, distance):
 def _find_closest_links_by_step(
     network_spatial_tree, df_stops, step_size=10, distance_threshold=None
 ):
-    def threshold_reached(d):
-        if distance_threshold is not None:
-            return d <= distance_threshold
-        else:
-            return True
-
-    distance = step_size
-    logging.info(f"Processing catchment: {distance}")
+    # catchments grow by step size until a stop has closest links or go past the threshold
+    df_stops = df_stops.loc[:, ["id", "geometry"]].copy()
+    if distance_threshold is not None:
+        max_distance = distance_threshold
+    else:
+        # without a threshold, catchments grow until the stop furthest from its nearest link finds it
+        max_distance = network_spatial_tree.nearest_link_distances(df_stops).max()
+        if pd.isna(max_distance):
+            max_distance = 0
+    max_catchment = step_size * (math.floor(max_distance / step_size) + 1)
+    logging.info(f"Processing catchments up to: {max_catchment}")
     nodes = _cast_catchment(
-        network_spatial_tree=network_spatial_tree,
-        df_stops=df_stops.loc[:, ["id", "geometry"]].copy(),
-        distance=distance,
+        network_spatial_tree=network_spatial_tree, df_stops=df_stops, distance=max_catchment
     )
-    nodes["catchment"] = distance
-    stop_ids = set(df_stops["id"])
-
-    while set(nodes.index) != stop_ids and threshold_reached(distance):
-        # increase distance by step size until all stops have closest links or reached threshold
-        distance += step_size
-        logging.info(
-            f"Processing catchment: {distance}, {len(stop_ids - set(nodes.index))} stops remaining"
-        )
-        _df = _cast_catchment(
-            network_spatial_tree=network_spatial_tree,
-            df_stops=df_stops.loc[
-                df_stops["id"].isin(stop_ids - set(nodes.index)), ["id", "geometry"]
-            ].copy(),
-            distance=distance,
-        )
-        _df["catchment"] = distance
-        nodes = pd.concat([nodes, _df])
-    return nodes
+    return spatial.catchments_by_step(nodes, step_size)
 
 
 def _generate_modal_network_geojsons(network, modes, output_dir, filename_suffix):
@@ -653,12 +639,10 @@ def intermodal_access_egress_network(
 
     if network_snap_modes is not None:
         network_snap_modes = network_snap_modes.split(",")
-        logging.info("Building Spatial Tree")
-        spatial_tree = spatial.SpatialTree(network)
 
         for snap_mode in network_snap_modes:
             logging.info(f"Snapping mode: {snap_mode}")
-            sub_tree = spatial_tree.modal_subtree(modes={snap_mode})
+            sub_tree = network.spatial_tree(snap_mode)
 
             closest_links = _find_closest_links_by_step(
                 network_spatial_tree=sub_tree,
@@ -676,6 +660,12 @@ def intermodal_access_egress_network(
                 )
 
             # Let's create some handy geojson outputs to verify our snapping
+            selected_links["geometry"] = [
+                spatial.grow_point(
+                    stop, spatial.approximate_metres_distance_in_4326_degrees(catchment, stop.y)
+                )
+                for stop, catchment in zip(selected_links["geometry"], selected_links["catchment"])
+            ]
             selected_links[["catchment", "geometry"]].to_file(
                 os.path.join(supporting_outputs, f"{snap_mode}_stop_catchments.geojson"),
                 driver="GeoJSON",
@@ -789,7 +779,7 @@ def make_pt_network(
         f"Snapping and routing the schedule onto the network with distance threshold {snapping_distance}"
     )
     unsnapped_services = network.route_schedule(
-        distance_threshold=snapping_distance, additional_modes={"bus": "car"}
+        distance_threshold=snapping_distance, additional_modes={"bus": "car"}, processes=processes
     )
     logging.info(
         f"Snapping resulted in {len(unsnapped_services)} unsnapped services: {unsnapped_services}. Trying them again."
@@ -798,6 +788,7 @@ def make_pt_network(
         distance_threshold=snapping_distance,
         additional_modes={"bus": "car"},
         services=unsnapped_services,
+        processes=processes,
     )
     logging.info(
         f"Second snapping attempt resulted in {len(unsnapped_services)} unsnapped services: {unsnapped_services}"
@@ -877,7 +868,9 @@ def reproject_network(
 ):
     """Reproject a MATSim network"""
 
-    network = _read_network(path_to_network, current_projection, path_to_schedule, path_to_vehicles)
+    network = _read_network(
+        path_to_network, current_projection, path_to_schedule, path_to_vehicles, processes
+    )
 
     logging.info("Reprojecting the network.")
 
@@ -1126,7 +1119,9 @@ def simplify_network(
 
     ensure_dir(output_dir)
 
-    network = _read_network(path_to_network, projection, path_to_schedule, path_to_vehicles)
+    network = _read_network(
+        path_to_network, projection, path_to_schedule, path_to_vehicles, processes
+    )
 
     logging.info("Simplifying the Network.")
 
@@ -1246,9 +1241,7 @@ def squeeze_external_area(
         logging.info(f"Changing capacity by {capacity * 100}%")
         network_gdf["capacity"] = network_gdf["capacity"] * capacity
 
-    network.apply_attributes_to_links(
-        network_gdf[["id", "freespeed", "capacity"]].set_index("id").T.to_dict()
-    )
+    network.update_link_columns(network_gdf[["id", "freespeed", "capacity"]].set_index("id"))
 
     logging.info("Generating geojson outputs for visual validation")
     network_gdf = network.to_geodataframe()["links"]
@@ -1407,9 +1400,7 @@ def squeeze_urban_links(
         logging.info(f"Changing capacity by {capacity * 100}%")
         network_gdf["capacity"] = network_gdf["capacity"] * capacity
 
-    network.apply_attributes_to_links(
-        network_gdf[["id", "freespeed", "capacity"]].set_index("id").T.to_dict()
-    )
+    network.update_link_columns(network_gdf[["id", "freespeed", "capacity"]].set_index("id"))
 
     logging.info("Generating geojson outputs for visual validation")
     network_gdf = network.to_geodataframe()["links"].to_crs(EPSG4326)
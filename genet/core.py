@@ -2,8 +2,6 @@ import itertools
 import json
 import logging
 import os
-import traceback
-import uuid
 from copy import deepcopy
 from typing import Dict, List, Union
 
@@ -21,8 +19,10 @@ import genet.modify.change_log as change_log
 import genet.modify.graph as modify_graph
 import genet.modify.schedule as modify_schedule
 import genet.output.geojson as geojson
+import genet.output.link_store_writer as link_store_writer
 import genet.output.matsim_xml_writer as matsim_xml_writer
 import genet.output.sanitiser as sanitiser
+import genet.output.snapshot_writer as snapshot_writer
 import genet.schedule_elements as schedule_elements
 import genet.utils.dict_support as dict_support
 import genet.utils.elevation as elevation
@@ -40,6 +40,8 @@ logging.basicConfig(format="%(asctime)s - %(message)s", level=logging.INFO)
 
 class Network:
     def __init__(self, epsg, **kwargs):
+        # read-only store of nodes and links the graph is built from when first needed, see `genet.read_link_store`
+        self.link_store = None
         self.epsg = epsg
         self.transformer = Transformer.from_crs(epsg, "epsg:4326", always_xy=True)
         self.graph = nx.MultiDiGraph(name="Network graph", crs=epsg)
@@ -47,12 +49,54 @@ class Network:
         self.schedule = schedule_elements.Schedule(epsg)
         self.change_log = change_log.ChangeLog()
         self.auxiliary_files = {"node": {}, "link": {}}
+        # secondary indexes on node and link attributes: {key path: graph_operations.AttributeIndex}
+        self.attribute_indexes = {"node": {}, "link": {}}
+        # modal queries are answered from an index of links on their modes, built by the first of them
+        self.modal_cache_stats = {"hits": 0, "misses": 0}
+        # spatial trees of the links used to snap and route PT: {None or frozenset of modes: spatial.SpatialTree},
+        # built when first needed and dropped when nodes or links change, see `spatial_tree`
+        self._spatial_trees = {}
+        # next integer to try when generating new node and link ids, None until ids are first generated
+        self._next_id = {"node": None, "link": None}
         # link_id_mapping maps between (usually string literal) index per edge to the from and to nodes that are
         # connected by the edge
         self.link_id_mapping = {}
         if kwargs:
             self.add_additional_attributes(kwargs)
 
+    @property
+    def graph(self):
+        if self.link_store is not None:
+            self.materialise_link_store()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+
+    @property
+    def link_id_mapping(self):
+        if self.link_store is not None:
+            self.materialise_link_store()
+        return self._link_id_mapping
+
+    @link_id_mapping.setter
+    def link_id_mapping(self, link_id_mapping):
+        self._link_id_mapping = link_id_mapping
+
+    def materialise_link_store(self):
+        """
+        Builds the graph and link_id_mapping of a Network read with `genet.read_link_store` from its link store. Only
+        read-only access to nodes and links, such as `link`, `links` and `link_attribute_data_under_keys`, is served
+        from the link store directly, anything else needs the graph and builds it first.
+        :return: None
+        """
+        if self.link_store is not None:
+            graph, link_id_mapping = self.link_store.build_graph()
+            self.link_store = None
+            self._graph = graph
+            self._link_id_mapping = link_id_mapping
+
     def __repr__(self):
         return (
             f"<{self.__class__.__name__} instance at {id(self)}: with \ngraph: {str(self.graph)} and "
@@ -77,6 +121,88 @@ class Network:
                     "Consider overwritting it instead."
                 )
 
+    def set_change_log_level(self, level: str):
+        """
+        Sets how much is recorded in the change log about changes made to the network from now on. Logging in full
+        is the default, with 'ids_only' or 'off' large batches of changes are faster and use less memory.
+        Only the network's log is affected, see `Schedule.set_change_log_level` for the schedule's.
+        :param level: one of 'full' (default), 'ids_only' or 'off', see `genet.modify.change_log.ChangeLog`
+        :return:
+        """
+        self.change_log = change_log.ChangeLog(df=self.change_log, level=level)
+
+    def index_link_attribute(self, key: Union[str, dict]):
+        """
+        Builds an index of links on the value stored under `key`. `extract_links_on_edge_attributes` uses it for
+        conditions on that key which are a single value or a list or set of values, and finds the links with hash
+        lookups instead of checking every link. The index is kept up to date by Network methods adding, removing
+        and changing links. If the graph is changed directly, call `rebuild_attribute_indexes`.
+        :param key: either a string e.g. 'modes', or if indexing nested information, a dictionary
+            e.g. {'attributes': 'osm:way:osmid'}
+        :return:
+        """
+        self._add_attribute_index("link", key, self.links())
+
+    def index_node_attribute(self, key: Union[str, dict]):
+        """
+        Builds an index of nodes on the value stored under `key`, used by `extract_nodes_on_node_attributes`. See
+        `index_link_attribute`.
+        :param key: either a string e.g. 'x', or if indexing nested information, a dictionary
+            e.g. {'attributes': 'osm:node:highway'}
+        :return:
+        """
+        self._add_attribute_index("node", key, self.nodes())
+
+    def rebuild_attribute_indexes(self):
+        """
+        Builds all node and link attribute indexes again from the current graph, spatial trees are built again when
+        next needed
+        :return:
+        """
+        self._spatial_trees = {}
+        for kind, iterator in [("node", self.nodes), ("link", self.links)]:
+            for path, index in self.attribute_indexes[kind].items():
+                self.attribute_indexes[kind][path] = graph_operations.AttributeIndex(
+                    index.key, iterator()
+                )
+
+    def _add_attribute_index(self, kind, key, iterator):
+        path = graph_operations.key_path(key)
+        if path not in self.attribute_indexes[kind]:
+            logging.info(f"Building index of {kind}s on attribute {key}")
+            self.attribute_indexes[kind][path] = graph_operations.AttributeIndex(key, iterator)
+
+    def _update_attribute_indexes(self, kind, ids_and_attribs):
+        """
+        :param kind: 'node' or 'link'
+        :param ids_and_attribs: iterable of two-tuples: (id, attributes) of added or changed nodes or links
+        """
+        self._spatial_trees = {}
+        if self.attribute_indexes[kind]:
+            ids_and_attribs = list(ids_and_attribs)
+            for index in self.attribute_indexes[kind].values():
+                index.add(ids_and_attribs)
+
+    def _links_of_nodes(self, nodes):
+        # links removed from the graph together with the nodes, only needed when links are indexed
+        if not self.attribute_indexes["link"]:
+            return []
+        return [
+            data["id"]
+            for edges in [
+                self.graph.out_edges(nodes, data=True),
+                self.graph.in_edges(nodes, data=True),
+            ]
+            for _, _, data in edges
+        ]
+
+    def _remove_from_attribute_indexes(self, kind, ids):
+        self._spatial_trees = {}
+        if self.attribute_indexes[kind]:
+            ids = list(ids)
+            for index in self.attribute_indexes[kind].values():
+                index.remove(ids)
+
     def has_attrib(self, attrib_name):
         return attrib_name in self.__dict__
 
@@ -108,6 +234,7 @@ class Network:
         self.graph = nx.compose(other.graph, self.graph)
         # finally, combine link_id_mappings
         self.link_id_mapping = {**other.link_id_mapping, **self.link_id_mapping}
+        self.rebuild_attribute_indexes()
 
         # combine schedules
         self.schedule.add(other.schedule)
@@ -265,8 +392,7 @@ class Network:
     def simplify(self, no_processes=1, keep_loops=False):
         """
         Simplifies network graph, retaining only nodes that are junctions
-        :param no_processes: Number of processes to split some computation across. The method is pretty fast though
-            and 1 process is often preferable --- there is overhead for splitting and joining the data.
+        :param no_processes: kept for backwards compatibility, simplification runs in a single process
         :param keep_loops: bool, defaults to False. Simplification often leads to self-loops, these will be removed
             unless keep_loops=True
         :return: None, updates Network object
@@ -363,6 +489,8 @@ class Network:
             e.g. {'attributes': {'osm:way:name': 'text'}}
         :return: pandas.Series
         """
+        if self.link_store is not None:
+            return self.link_store.link_attribute_data_under_key(key)
         return pd.Series(graph_operations.get_attribute_data_under_key(self.links(), key))
 
     def link_attribute_data_under_keys(self, keys: Union[list, set], index_name=None):
@@ -373,6 +501,8 @@ class Network:
         :param index_name: optional, gives the index_name to dataframes index
         :return: pandas.DataFrame
         """
+        if self.link_store is not None:
+            return self.link_store.link_attribute_data_under_keys(keys, index_name=index_name)
         return graph_operations.build_attribute_dataframe(
             self.links(), keys=keys, index_name=index_name
         )
@@ -418,8 +548,17 @@ class Network:
 
         :param mixed_dtypes: True by default, used if values under dictionary keys queried are single values or lists of
         values e.g. as in simplified networks.
-        :return: list of node ids in the network satisfying conditions
-        """
+        :return: list of node ids in the network satisfying conditions. If the conditions are answered from attribute
+            indexes (see `index_node_attribute`), the ids are not necessarily in the order of nodes in the graph
+        """
+        nodes = graph_operations.extract_on_indexes(
+            self.attribute_indexes["node"],
+            conditions=conditions,
+            how=how,
+            mixed_dtypes=mixed_dtypes,
+        )
+        if nodes is not None:
+            return nodes
         return graph_operations.extract_on_attributes(
             self.nodes(), conditions=conditions, how=how, mixed_dtypes=mixed_dtypes
         )
@@ -465,8 +604,17 @@ class Network:
 
         :param mixed_dtypes: True by default, used if values under dictionary keys queried are single values or lists of
         values e.g. as in simplified networks.
-        :return: list of link ids in the network satisfying conditions
-        """
+        :return: list of link ids in the network satisfying conditions. If the conditions are answered from attribute
+            indexes (see `index_link_attribute`), the ids are not necessarily in the order of links in the graph
+        """
+        links = graph_operations.extract_on_indexes(
+            self.attribute_indexes["link"],
+            conditions=conditions,
+            how=how,
+            mixed_dtypes=mixed_dtypes,
+        )
+        if links is not None:
+            return links
         return graph_operations.extract_on_attributes(
             self.links(), conditions=conditions, how=how, mixed_dtypes=mixed_dtypes
         )
@@ -477,8 +625,22 @@ class Network:
         :param modes: string mode e.g. 'car' or a list of such modes e.g. ['car', 'walk']
         :return: list of link IDs
         """
+        if ("modes",) in self.attribute_indexes["link"]:
+            self.modal_cache_stats["hits"] += 1
+        else:
+            self.modal_cache_stats["misses"] += 1
+            self.index_link_attribute("modes")
         return self.extract_links_on_edge_attributes(conditions={"modes": modes}, mixed_dtypes=True)
 
+    def modal_cache_info(self):
+        """
+        Reports how modal queries (`links_on_modal_condition`, `modal_subgraph` and methods using them) were answered
+        :return: dict with 'hits': number of queries answered from the index of links on their modes, 'misses': number
+            of queries which built the index first, 'modes': number of links per mode in the index
+        """
+        index = self.attribute_indexes["link"].get(("modes",))
+        return {**self.modal_cache_stats, "modes": {} if index is None else index.counts()}
+
     def nodes_on_modal_condition(self, modes: Union[str, list]):
         """
         Finds node IDs with modes or singular mode given in `modes`
@@ -492,7 +654,27 @@ class Network:
         return list(nodes)
 
     def modal_subgraph(self, modes: Union[str, set, list]):
-        return self.subgraph_on_link_conditions(conditions={"modes": modes}, mixed_dtypes=True)
+        return self.subgraph_on_links(self.links_on_modal_condition(modes))
+
+    def spatial_tree(self, modes: Union[str, set, list] = None):
+        """
+        Gives the spatial tree of the links of the network, used to snap and route PT, or its modal subtree. Trees are
+        built when first needed and kept, with the shortest paths found on them, until nodes or links of the network
+        change, so snapping Services one after another builds them once. `write_snapshot(..., spatial_tree=True)`
+        saves the tree with the network.
+        :param modes: optional, string mode e.g. 'bus' or a set of such modes, gives the subtree of links with any of
+            these modes
+        :return: genet.utils.spatial.SpatialTree, raises genet.exceptions.EmptySpatialTree if no links have `modes`
+        """
+        key = None if modes is None else frozenset(persistence.setify(modes))
+        if key not in self._spatial_trees:
+            if key is None:
+                logging.info("Building Spatial Tree")
+                self._spatial_trees[key] = spatial.SpatialTree(self)
+            else:
+                logging.info(f"Extracting Modal SubTree for modes: {set(key)}")
+                self._spatial_trees[key] = self.spatial_tree().modal_subtree(set(key))
+        return self._spatial_trees[key]
 
     def nodes_on_spatial_condition(self, region_input):
         """
@@ -846,6 +1028,7 @@ class Network:
         self.graph.add_nodes_from(
             [(node_id, attribs) for node_id, attribs in nodes_and_attribs_to_add.items()]
         )
+        self._update_attribute_indexes("node", nodes_and_attribs_to_add.items())
         if not ignore_change_log:
             self.change_log = self.change_log.add_bunch(
                 object_type="node",
@@ -967,6 +1150,7 @@ class Network:
                 attribs["length"] = length
 
         self.graph.add_edge(u, v, key=multi_edge_idx, **attribs)
+        self._update_attribute_indexes("link", [(link_id, attribs)])
         self.change_log.add(object_type="link", object_id=link_id, object_attributes=attribs)
         if not silent:
             logging.info(
@@ -1014,132 +1198,82 @@ class Network:
         :return:
         """
         # check for compulsory attribs
-        df_links = pd.DataFrame(links_and_attributes).T
-        if ("from" not in df_links.columns) or (df_links["from"].isnull().any()):
-            raise RuntimeError(
-                "You are trying to add links which are missing `from` (origin) nodes"
-            )
-        if ("to" not in df_links.columns) or (df_links["to"].isnull().any()):
-            raise RuntimeError(
-                "You are trying to add links which are missing `to` (destination) nodes"
-            )
-
-        if ("id" not in df_links.columns) or (df_links["id"].isnull().any()):
-            df_links["id"] = df_links.index
-        if "length" not in df_links.columns:
-            df_links["length"] = float("nan")
-        if df_links["length"].isnull().any():
-            missing_length_mask = df_links["length"].isnull()
-            logging.warning(
-                f"The following links: {list(df_links[missing_length_mask].index)} are missing `length` attribute. "
-                "A straight line distance between from and to nodes will be computed."
-            )
-            s2_map = self.node_attribute_data_under_key("s2_id").to_dict()
-            df_links["s2_from"] = df_links["from"].map(s2_map)
-            df_links["s2_to"] = df_links["to"].map(s2_map)
-            # TODO add length calculation based on complex geometry
-            missing_spatial_info_mask = df_links["s2_from"].isnull() | df_links["s2_to"].isnull()
-            df_links.loc[missing_length_mask & ~missing_spatial_info_mask, "length"] = df_links.loc[
-                missing_length_mask & ~missing_spatial_info_mask, :
-            ].apply(
-                lambda row: round(spatial.distance_between_s2cellids(row["s2_from"], row["s2_to"])),
-                axis=1,
-            )
-            cols_to_drop = ["s2_from", "s2_to"]
-            if df_links["length"].isnull().all():
-                cols_to_drop.append("length")
-            df_links.drop(cols_to_drop, axis=1, inplace=True)
-
-        # generate initial multi_edge_idxes for the links to be added
-        if "multi_edge_idx" not in df_links.columns:
-            df_links["multi_edge_idx"] = df_links.apply(
-                lambda x: self.graph.new_edge_key(x["from"], x["to"]), axis=1
-            )
-            while df_links[["from", "to", "multi_edge_idx"]].duplicated().any():
-                df_links.loc[
-                    df_links[["from", "to", "multi_edge_idx"]].duplicated(), "multi_edge_idx"
-                ] += 1
-
-        df_link_id_mapping = pd.DataFrame(self.link_id_mapping).T
-        df_link_id_mapping["id"] = df_link_id_mapping.index
-        if not df_link_id_mapping.empty:
-            _df = pd.merge(
-                df_links,
-                df_link_id_mapping,
-                how="left",
-                on=("from", "to", "multi_edge_idx"),
-                suffixes=("_to_add", "_in_graph"),
-            )
-
-            # generate new multi_edge_idx where it clashes with existing links
-            def generate_unique_multi_idx(group):
-                multi_idx_to_avoid = df_link_id_mapping[
-                    (df_link_id_mapping["from"] == group.name[0])
-                    & (df_link_id_mapping["to"] == group.name[1])
-                ]["multi_edge_idx"]
-                while (
-                    group["multi_edge_idx"].isin(multi_idx_to_avoid).any()
-                    | group["multi_edge_idx"].duplicated().any()
-                ):
-                    group.loc[
-                        (group["multi_edge_idx"].isin(multi_idx_to_avoid))
-                        | (group["multi_edge_idx"].duplicated()),
-                        "multi_edge_idx",
-                    ] += 1
-                return group
-
-            clashing_multi_idxs = _df[_df["id_in_graph"].notna()]["id_to_add"]
-            df_clashing_midx = _df[_df["id_to_add"].isin(clashing_multi_idxs)]
-            clashing_multi_idxs = _df[
-                _df["from"].isin(df_clashing_midx["from"]) & _df["to"].isin(df_clashing_midx["to"])
-            ]["id_to_add"]
-
-            df_links.loc[df_links["id"].isin(clashing_multi_idxs)] = (
-                df_links[df_links["id"].isin(clashing_multi_idxs)]
-                .groupby(["from", "to"])
-                .apply(generate_unique_multi_idx)
-            )
+        for end, name in [("from", "origin"), ("to", "destination")]:
+            if not all(
+                pd_helpers.notna(attribs.get(end)) for attribs in links_and_attributes.values()
+            ):
+                raise RuntimeError(
+                    f"You are trying to add links which are missing `{end}` ({name}) nodes"
+                )
 
-            # generate unique indices if not
-            clashing_link_ids = set(self.link_id_mapping.keys()) & set(links_and_attributes.keys())
+        # generate unique indices for links whose ids are already in the graph
+        clashing_link_ids = [
+            link_id for link_id in links_and_attributes if link_id in self.link_id_mapping
+        ]
+        reindexing_dict = {}
+        if clashing_link_ids:
             reindexing_dict = dict(
                 zip(
                     clashing_link_ids,
-                    self.generate_indices_for_n_edges(
-                        len(clashing_link_ids), avoid_keys=set(links_and_attributes.keys())
+                    self._generate_ids(
+                        "link", len(clashing_link_ids), avoid_keys=links_and_attributes
                     ),
                 )
             )
-            clashing_mask = df_links["id"].isin(reindexing_dict.keys())
-            df_links.loc[clashing_mask, "id"] = df_links.loc[clashing_mask, "id"].map(
-                reindexing_dict
+
+        missing_length = []
+        used_multi_edge_idxs = {}
+        add_to_link_id_mapping = {}
+        new_links = {}
+        edges = []
+        for link_id, attribs in links_and_attributes.items():
+            link_id = reindexing_dict.get(link_id, link_id)
+            attribs = {k: v for k, v in attribs.items() if pd_helpers.notna(v)}
+            u = attribs["from"]
+            v = attribs["to"]
+            attribs["id"] = link_id
+            if "length" not in attribs:
+                missing_length.append(link_id)
+
+            # resolve multi_edge_idx against edges in the graph and links added before this one
+            multi_edge_idx = attribs.pop("multi_edge_idx", None)
+            if (u, v) not in used_multi_edge_idxs:
+                used_multi_edge_idxs[(u, v)] = (
+                    set(self.graph[u][v]) if self.graph.has_edge(u, v) else set()
+                )
+            used = used_multi_edge_idxs[(u, v)]
+            if multi_edge_idx is None:
+                multi_edge_idx = len(used)
+            multi_edge_idx = int(multi_edge_idx)
+            while multi_edge_idx in used:
+                multi_edge_idx += 1
+            used.add(multi_edge_idx)
+
+            add_to_link_id_mapping[link_id] = {"from": u, "to": v, "multi_edge_idx": multi_edge_idx}
+            new_links[link_id] = attribs
+            edges.append((u, v, multi_edge_idx, attribs))
+
+        if missing_length:
+            logging.warning(
+                f"The following links: {missing_length} are missing `length` attribute. "
+                "A straight line distance between from and to nodes will be computed."
             )
-            df_links = df_links.set_index("id", drop=False)
-        else:
-            reindexing_dict = {}
-
-        # end with updated links_and_attributes dict
-        add_to_link_id_mapping = df_links[["from", "to", "multi_edge_idx"]].T.to_dict()
-        df_links = df_links.drop("multi_edge_idx", axis=1)
-        links_and_attributes = {
-            _id: {k: v for k, v in m.items() if pd_helpers.notna(v)}
-            for _id, m in df_links.T.to_dict().items()
-        }
+            # TODO add length calculation based on complex geometry
+            nodes = self.graph.nodes
+            for link_id in missing_length:
+                attribs = new_links[link_id]
+                u, v = attribs["from"], attribs["to"]
+                if (u in nodes and "s2_id" in nodes[u]) and (v in nodes and "s2_id" in nodes[v]):
+                    attribs["length"] = round(
+                        spatial.distance_between_s2cellids(nodes[u]["s2_id"], nodes[v]["s2_id"])
+                    )
+        links_and_attributes = new_links
 
         # update link_id_mapping
-        self.link_id_mapping = {**self.link_id_mapping, **add_to_link_id_mapping}
-
-        self.graph.add_edges_from(
-            [
-                (
-                    attribs["from"],
-                    attribs["to"],
-                    add_to_link_id_mapping[link]["multi_edge_idx"],
-                    attribs,
-                )
-                for link, attribs in links_and_attributes.items()
-            ]
-        )
+        self.link_id_mapping.update(add_to_link_id_mapping)
+
+        self.graph.add_edges_from(edges)
+        self._update_attribute_indexes("link", links_and_attributes.items())
         if not ignore_change_log:
             self.change_log = self.change_log.add_bunch(
                 object_type="link",
@@ -1176,6 +1310,8 @@ class Network:
         )
         self.apply_attributes_to_node(node_id, new_attribs)
         self.graph = nx.relabel_nodes(self.graph, {node_id: new_node_id})
+        self._remove_from_attribute_indexes("node", [node_id])
+        self._update_attribute_indexes("node", [(new_node_id, self.node(new_node_id))])
         self.update_node_auxiliary_files({node_id: new_node_id})
         if not silent:
             logging.info(f"Changed Node index from {node_id} to {new_node_id}")
@@ -1196,6 +1332,8 @@ class Network:
         self.apply_attributes_to_link(link_id, new_attribs)
         self.link_id_mapping[new_link_id] = self.link_id_mapping[link_id]
         del self.link_id_mapping[link_id]
+        self._remove_from_attribute_indexes("link", [link_id])
+        self._update_attribute_indexes("link", [(new_link_id, self.link(new_link_id))])
         self.update_link_auxiliary_files({link_id: new_link_id})
         if not silent:
             logging.info(f"Changed Link index from {link_id} to {new_link_id}")
@@ -1208,9 +1346,18 @@ class Network:
         :param mixed_dtypes as described in graph_operations.extract_links_on_edge_attributes
         :return:
         """
-        links = self.extract_links_on_edge_attributes(
-            conditions=conditions, how=how, mixed_dtypes=mixed_dtypes
+        return self.subgraph_on_links(
+            self.extract_links_on_edge_attributes(
+                conditions=conditions, how=how, mixed_dtypes=mixed_dtypes
+            )
         )
+
+    def subgraph_on_links(self, links):
+        """
+        Gives a subgraph of network.graph with the links given
+        :param links: list of link ids
+        :return:
+        """
         edges_for_sub = [
             (
                 self.link_id_mapping[link]["from"],
@@ -1280,11 +1427,13 @@ class Network:
         :param silent: whether to mute stdout logging messages
         :return:
         """
-        old_attributes = deepcopy(self.node(node_id))
+        old_attributes = self.node(node_id)
 
         # check if change is to nested part of node data
         if any(isinstance(v, dict) for v in new_attributes.values()):
-            new_attributes = dict_support.set_nested_value(old_attributes, new_attributes)
+            new_attributes = dict_support.set_nested_value(
+                dict_support.copy_attributes(old_attributes), new_attributes
+            )
         else:
             new_attributes = {**old_attributes, **new_attributes}
 
@@ -1292,10 +1441,11 @@ class Network:
             object_type="node",
             old_id=node_id,
             new_id=node_id,
-            old_attributes=self.node(node_id),
+            old_attributes=old_attributes,
             new_attributes=new_attributes,
         )
         nx.set_node_attributes(self.graph, {node_id: new_attributes})
+        self._update_attribute_indexes("node", [(node_id, new_attributes)])
         if not silent:
             logging.info(f"Changed Node attributes under index: {node_id}")
 
@@ -1307,7 +1457,7 @@ class Network:
         :return:
         """
         nodes = list(new_attributes.keys())
-        old_attribs = [deepcopy(self.node(node)) for node in nodes]
+        old_attribs = [dict(self.node(node)) for node in nodes]
         new_attribs = [{**self.node(node), **new_attributes[node]} for node in nodes]
 
         self.change_log = self.change_log.modify_bunch(
@@ -1315,6 +1465,7 @@ class Network:
         )
 
         nx.set_node_attributes(self.graph, dict(zip(nodes, new_attribs)))
+        self._update_attribute_indexes("node", zip(nodes, new_attribs))
         logging.info(f"Changed Node attributes for {len(nodes)} nodes")
 
     def apply_function_to_nodes(self, function, location: str):
@@ -1371,6 +1522,7 @@ class Network:
                 )
 
                 nx.set_edge_attributes(self.graph, {(u, v, multi_idx): new_attribs})
+                self._update_attribute_indexes("link", [(new_attribs["id"], new_attribs)])
                 if not silent:
                     logging.info(f"Changed Edge attributes under index: {edge}")
 
@@ -1405,6 +1557,9 @@ class Network:
             new_attributes=new_attribs,
         )
         nx.set_edge_attributes(self.graph, dict(zip(edge_tuples, new_attribs)))
+        self._update_attribute_indexes(
+            "link", ((self.graph[u][v][k]["id"], self.graph[u][v][k]) for u, v, k in edge_tuples)
+        )
 
         logging.info(f"Changed Edge attributes for {len(edge_tuples)} edges")
 
@@ -1419,11 +1574,13 @@ class Network:
         """
         u, v = self.link_id_mapping[link_id]["from"], self.link_id_mapping[link_id]["to"]
         multi_idx = self.link_id_mapping[link_id]["multi_edge_idx"]
-        old_attributes = deepcopy(self.link(link_id))
+        old_attributes = self.link(link_id)
 
         # check if change is to nested part of node data
         if any(isinstance(v, dict) for v in new_attributes.values()):
-            new_attributes = dict_support.set_nested_value(old_attributes, new_attributes)
+            new_attributes = dict_support.set_nested_value(
+                dict_support.copy_attributes(old_attributes), new_attributes
+            )
         else:
             new_attributes = {**old_attributes, **new_attributes}
 
@@ -1431,11 +1588,12 @@ class Network:
             object_type="link",
             old_id=link_id,
             new_id=link_id,
-            old_attributes=self.link(link_id),
+            old_attributes=old_attributes,
             new_attributes=new_attributes,
         )
 
         nx.set_edge_attributes(self.graph, {(u, v, multi_idx): new_attributes})
+        self._update_attribute_indexes("link", [(link_id, new_attributes)])
         if not silent:
             logging.info(f"Changed Link attributes under index: {link_id}")
 
@@ -1447,9 +1605,16 @@ class Network:
         :return:
         """
         links = list(new_attributes.keys())
-        old_attribs = [deepcopy(self.link(link)) for link in links]
+        # the change log copies what it records, only nested data changed in place needs copying here
+        old_attribs = [self.link(link) for link in links]
         new_attribs = [
-            dict_support.set_nested_value(self.link(link), new_attributes[link]) for link in links
+            dict_support.set_nested_value(
+                dict_support.copy_attributes(old)
+                if any(isinstance(v, dict) for v in new_attributes[link].values())
+                else dict(old),
+                new_attributes[link],
+            )
+            for link, old in zip(links, old_attribs)
         ]
         edge_tuples = [self.edge_tuple_from_link_id(link) for link in links]
 
@@ -1457,6 +1622,40 @@ class Network:
             "link", links, old_attribs, links, new_attribs
         )
         nx.set_edge_attributes(self.graph, dict(zip(edge_tuples, new_attribs)))
+        self._update_attribute_indexes("link", zip(links, new_attribs))
+        logging.info(f"Changed Link attributes for {len(links)} links")
+
+    def update_link_columns(self, df: pd.DataFrame):
+        """
+        Sets flat (not nested) link attributes column by column from a DataFrame, e.g. scaled `freespeed` and
+        `capacity` of a large set of links, and records the changes in the change log in bulk. Faster than
+        `apply_attributes_to_links` for large numbers of links, as attribute dictionaries are updated in place.
+        :param df: pandas.DataFrame indexed by link ids, each column is an attribute key and holds the new values of
+            that attribute. Missing (NaN/None) values leave the attribute of that link unchanged.
+        :return:
+        """
+        fixed_columns = {"id", "from", "to"} & set(df.columns)
+        if fixed_columns:
+            raise RuntimeError(
+                f"Columns {sorted(fixed_columns)} cannot be updated, they define the graph. Use `reindex_link` "
+                "or add new links instead."
+            )
+        links = df.index.tolist()
+        # raises KeyError for links not in the Network before anything is changed
+        link_data = [
+            self.graph[mapping["from"]][mapping["to"]][mapping["multi_edge_idx"]]
+            for mapping in (self.link_id_mapping[link] for link in links)
+        ]
+        old_attribs = [dict(data) for data in link_data]
+
+        for column in df.columns:
+            present = df[column].notna().to_numpy()
+            for data, value, is_present in zip(link_data, df[column].tolist(), present):
+                if is_present:
+                    data[column] = value
+
+        self._update_attribute_indexes("link", zip(links, link_data))
+        self.change_log = self.change_log.modify_bunch("link", links, old_attribs, links, link_data)
         logging.info(f"Changed Link attributes for {len(links)} links")
 
     def apply_function_to_links(self, function, location: str):
@@ -1493,6 +1692,8 @@ class Network:
         self.change_log.remove(
             object_type="node", object_id=node_id, object_attributes=self.node(node_id)
         )
+        self._remove_from_attribute_indexes("link", self._links_of_nodes([node_id]))
+        self._remove_from_attribute_indexes("node", [node_id])
         self.graph.remove_node(node_id)
         self.update_node_auxiliary_files({node_id: None})
         if not silent:
@@ -1514,6 +1715,8 @@ class Network:
                 id_bunch=nodes,
                 attributes_bunch=[self.node(node_id) for node_id in nodes],
             )
+        self._remove_from_attribute_indexes("link", self._links_of_nodes(nodes))
+        self._remove_from_attribute_indexes("node", nodes)
         self.graph.remove_nodes_from(nodes)
         self.update_node_auxiliary_files(dict(zip(nodes, [None] * len(nodes))))
         if not silent:
@@ -1532,6 +1735,7 @@ class Network:
         u, v, multi_idx = self.edge_tuple_from_link_id(link_id)
         self.graph.remove_edge(u, v, multi_idx)
         del self.link_id_mapping[link_id]
+        self._remove_from_attribute_indexes("link", [link_id])
         self.update_link_auxiliary_files({link_id: None})
         if not silent:
             logging.info(f"Removed link under index: {link_id}")
@@ -1556,10 +1760,71 @@ class Network:
         self.graph.remove_edges_from([self.edge_tuple_from_link_id(link_id) for link_id in links])
         for link_id in links:
             del self.link_id_mapping[link_id]
+        self._remove_from_attribute_indexes("link", links)
         self.update_link_auxiliary_files(dict(zip(links, [None] * len(links))))
         if not silent:
             logging.info(f"Removed {len(links)} links")
 
+    def replace_links(
+        self,
+        links: list,
+        nodes: list,
+        new_links: Dict[str, dict],
+        ignore_change_log: bool = False,
+        silent: bool = False,
+    ):
+        """
+        Replaces links, and nodes only they connect to, with new links in one bulk operation. Unlike `add_links`, the
+        new links are not checked or reindexed.
+        :param links: list of ids of links to remove
+        :param nodes: list of ids of nodes to remove, all of their links are in `links`
+        :param new_links: dictionary of new link ids, not used in the network, and their attributes, each with 'id',
+            'from' and 'to' nodes which are in the network
+        :param ignore_change_log: whether to ignore logging changes to the network in the changelog. False by default
+        and not recommended. Only used when an alternative changelog event is being produced (e.g. simplification) to
+        reduce changelog bloat.
+        :param silent: whether to mute stdout logging messages
+        :return: None
+        """
+        if not ignore_change_log:
+            self.change_log = self.change_log.remove_bunch(
+                object_type="link",
+                id_bunch=links,
+                attributes_bunch=[self.link(link_id) for link_id in links],
+            )
+            self.change_log = self.change_log.remove_bunch(
+                object_type="node",
+                id_bunch=nodes,
+                attributes_bunch=[self.node(node_id) for node_id in nodes],
+            )
+        self._remove_from_attribute_indexes("link", links)
+        self._remove_from_attribute_indexes("node", nodes)
+        # edges of the removed nodes go with them
+        removed_nodes = set(nodes)
+        edges = []
+        for link_id in links:
+            edge = self.link_id_mapping.pop(link_id)
+            if edge["from"] not in removed_nodes and edge["to"] not in removed_nodes:
+                edges.append((edge["from"], edge["to"], edge["multi_edge_idx"]))
+        self.graph.remove_edges_from(edges)
+        self.graph.remove_nodes_from(nodes)
+        for link_id, attribs in new_links.items():
+            u, v = attribs["from"], attribs["to"]
+            multi_edge_idx = self.graph.add_edge(u, v, **attribs)
+            self.link_id_mapping[link_id] = {"from": u, "to": v, "multi_edge_idx": multi_edge_idx}
+        self._update_attribute_indexes("link", new_links.items())
+        self.update_node_auxiliary_files(dict.fromkeys(nodes))
+        if not ignore_change_log:
+            self.change_log = self.change_log.add_bunch(
+                object_type="link",
+                id_bunch=list(new_links),
+                attributes_bunch=list(new_links.values()),
+            )
+        if not silent:
+            logging.info(
+                f"Replaced {len(links)} links and {len(nodes)} nodes with {len(new_links)} links"
+            )
+
     def is_strongly_connected(self, modes: Union[list, str, set] = None):
         if modes is None:
             g = self.graph
@@ -1674,6 +1939,9 @@ class Network:
         """
         :return:  Iterator through each node and its attrib (two-tuple)
         """
+        if self.link_store is not None:
+            yield from self.link_store.nodes()
+            return
         for id, attrib in self.graph.nodes(data=True):
             yield id, attrib
 
@@ -1681,6 +1949,8 @@ class Network:
         """
         :return:  attribs of the 'node_id'
         """
+        if self.link_store is not None:
+            return self.link_store.node(node_id)
         return self.graph.nodes[node_id]
 
     def edges(self):
@@ -1702,10 +1972,15 @@ class Network:
         """
         :return: Iterator through each link id its attrib (two-tuple)
         """
+        if self.link_store is not None:
+            yield from self.link_store.links()
+            return
         for link_id in self.link_id_mapping.keys():
             yield link_id, self.link(link_id)
 
     def edge_tuple_from_link_id(self, link):
+        if self.link_store is not None:
+            return self.link_store.edge_tuple_from_link_id(link)
         u, v = self.link_id_mapping[link]["from"], self.link_id_mapping[link]["to"]
         multi_idx = self.link_id_mapping[link]["multi_edge_idx"]
         return u, v, multi_idx
@@ -1715,6 +1990,8 @@ class Network:
         :param link_id:
         :return:
         """
+        if self.link_store is not None:
+            return self.link_store.link(link_id)
         u, v, multi_idx = self.edge_tuple_from_link_id(link_id)
         return dict(self.graph[u][v][multi_idx])
 
@@ -1727,6 +2004,8 @@ class Network:
         step_size=10,
         additional_modes=None,
         allow_directional_split=False,
+        processes=1,
+        path_length_cutoff_factor=None,
     ):
         """
         Method to find relationship between all Services in Schedule and the Network. It finds closest
@@ -1744,7 +2023,10 @@ class Network:
         :param solver: you can specify different mathematical solvers. Defaults to CBC, open source solver which can
         be found here: https://projects.coin-or.org/Cbc . Another good open source choice is GLPK:
         https://www.gnu.org/software/glpk/. You specify it as a string e.g. 'glpk', 'cbc', 'gurobi'.
-        The solver needs to support MILP - mixed integer linear programming.
+        The solver needs to support MILP - mixed integer linear programming. 'highs' solves the problem within Python,
+        with SciPy's HiGHS solver, and needs no solver installed. 'greedy' uses a fast heuristic instead, which may not
+        find the best solution. The problem is solved one connected component at a time, and small components are
+        solved by enumeration, without the solver.
         :param allow_partial: Defaults to True. If there isn't a link available for snapping within threshold and,
         under modal conditions, an artificial self-loop link will be created as well as any connecting links to that
         unsnapped stop. If set to False and the problem is partial, it will raise PartialMaxStableSetProblem error
@@ -1763,11 +2045,17 @@ class Network:
         results in stops snapping to multiple links. Routes' stops and their network routes are updated based on
         direction too. You may like to investigate directional split for different services using a Service object
         method: `split_graph`.
+        :param processes: number of processes to snap and route Services in. Services sharing modes are solved
+        independently, in a pool of processes which get the modal Spatial Tree once each. A single Service solves the
+        connected components of its snapping problem in those processes instead. Defaults to 1
+        :param path_length_cutoff_factor: Defaults to None, i.e. network paths between links stops could snap to are
+        looked for however long they are. If given, e.g. 3, the search for a path between links of consecutive stops
+        stops once paths are this many times longer than the crow-fly distance between the ends of the links, and the
+        links are treated as unconnected. It makes building the snapping problem much faster on sparse networks, such
+        as rail or ferry, where many candidate links are not connected
         :return: set of unsnapped services, empty if all snapped, updates Network object and the Schedule object within.
         """
         if self.schedule:
-            logging.info("Building Spatial Tree")
-            spatial_tree = spatial.SpatialTree(self)
             if additional_modes is None:
                 additional_modes = {}
             else:
@@ -1798,8 +2086,7 @@ class Network:
                     buffed_modes |= additional_modes[m]
 
                 try:
-                    logging.info(f"Extracting Modal SubTree for modes: {modes}")
-                    sub_tree = spatial_tree.modal_subtree(buffed_modes)
+                    sub_tree = self.spatial_tree(buffed_modes)
                 except exceptions.EmptySpatialTree:
                     sub_tree = None
                     logging.warning(
@@ -1809,7 +2096,9 @@ class Network:
                     unsnapped_services |= service_ids
 
                 if sub_tree is not None:
-                    for service_id in service_ids:
+                    problems = []
+                    problem_service_ids = []
+                    for service_id in sorted(service_ids):
                         service = self.schedule[service_id]
                         logging.info(f"Routing Service {service.id} with modes = {modes}")
                         if allow_directional_split:
@@ -1822,27 +2111,39 @@ class Network:
                         service_g = service.graph()
 
                         for route_group, graph_group in zip(routes, graph_groups):
-                            route_group = list(route_group)
-                            try:
-                                mss = modify_schedule.route_pt_graph(
-                                    pt_graph=nx.edge_subgraph(service_g, graph_group),
-                                    network_spatial_tree=sub_tree,
-                                    modes=modes,
-                                    solver=solver,
-                                    allow_partial=allow_partial,
-                                    distance_threshold=distance_threshold,
-                                    step_size=step_size,
-                                )
-                                if changeset is None:
-                                    changeset = mss.to_changeset(route_data.loc[route_group, :])
-                                else:
-                                    changeset += mss.to_changeset(route_data.loc[route_group, :])
-                            except Exception:
-                                logging.error(
-                                    f"\nRouting Service: `{service_id}` resulted in the following Exception:"
-                                    f"\n{traceback.format_exc()}"
+                            route_group = sorted(route_group)
+                            problems.append(
+                                (
+                                    modify_schedule.pt_graph_problem(
+                                        service_g, graph_group, route_group
+                                    ),
+                                    route_data.loc[route_group, :],
                                 )
-                                unsnapped_services.add(service_id)
+                            )
+                            problem_service_ids.append(service_id)
+
+                    results = modify_schedule.route_pt_graphs(
+                        problems,
+                        network_spatial_tree=sub_tree,
+                        modes=modes,
+                        processes=processes,
+                        solver=solver,
+                        allow_partial=allow_partial,
+                        distance_threshold=distance_threshold,
+                        step_size=step_size,
+                        path_length_cutoff_factor=path_length_cutoff_factor,
+                    )
+                    for service_id, (service_changeset, error) in zip(problem_service_ids, results):
+                        if error is not None:
+                            logging.error(
+                                f"\nRouting Service: `{service_id}` resulted in the following Exception:"
+                                f"\n{error}"
+                            )
+                            unsnapped_services.add(service_id)
+                        elif changeset is None:
+                            changeset = service_changeset
+                        else:
+                            changeset += service_changeset
             if changeset is not None:
                 self._apply_max_stable_changes(changeset)
             return unsnapped_services
@@ -1873,13 +2174,16 @@ class Network:
         by setting allow_partial=False. It will raise PartialMaxStableSetProblem error instead.
 
         :param service_id: ID of the Service object to snap and route
-        :param spatial_tree: optional, if snapping more than one Service, it may be beneficcial to build the spatial
-        tree which is used for snapping separately and pass it here. This is done simply by importing genet and passing
-        the network object in the following way: genet.utils.spatial.SpatialTree(network_object)
+        :param spatial_tree: optional, genet.utils.spatial.SpatialTree of the network to snap to. Defaults to the
+        spatial tree kept by the Network, see `spatial_tree`, which is built once and shared by all Services snapped
+        until the network's links change
         :param solver: you can specify different mathematical solvers. Defaults to CBC, open source solver which can
         be found here: https://projects.coin-or.org/Cbc . Another good open source choice is GLPK:
         https://www.gnu.org/software/glpk/. You specify it as a string e.g. 'glpk', 'cbc', 'gurobi'.
-        The solver needs to support MILP - mixed integer linear programming.
+        The solver needs to support MILP - mixed integer linear programming. 'highs' solves the problem within Python,
+        with SciPy's HiGHS solver, and needs no solver installed. 'greedy' uses a fast heuristic instead, which may not
+        find the best solution. The problem is solved one connected component at a time, and small components are
+        solved by enumeration, without the solver.
         :param allow_partial: Defaults to True. If there isn't a link available for snapping within threshold and
         under modal conditions, an artificial self-loop link will be created as well as any connecting links to that
         unsnapped stop. If set to False and the problem is partial, it will raise PartialMaxStableSetProblem error
@@ -1899,8 +2203,6 @@ class Network:
         :return: None if successful, updates Network object and the Schedule object within. Returns service ID if
         unsuccesful.
         """
-        if spatial_tree is None:
-            spatial_tree = spatial.SpatialTree(self)
         additional_modes = persistence.setify(additional_modes)
 
         service = self.schedule[service_id]
@@ -1917,7 +2219,10 @@ class Network:
         modes = service.modes()
         logging.info(f"Routing Service {service.id} with modes = {modes}")
         try:
-            sub_tree = spatial_tree.modal_subtree(modes | additional_modes)
+            if spatial_tree is None:
+                sub_tree = self.spatial_tree(modes | additional_modes)
+            else:
+                sub_tree = spatial_tree.modal_subtree(modes | additional_modes)
             for route_group, graph_group in zip(routes, graph_groups):
                 route_group = list(route_group)
                 mss = modify_schedule.route_pt_graph(
@@ -2215,12 +2520,14 @@ class Network:
         return gpd.GeoDataFrame(routes).set_crs(self.epsg)
 
     def node_id_exists(self, node_id):
-        if node_id in [i for i, attribs in self.nodes()]:
+        if self.has_node(node_id):
             logging.warning(f"{node_id} already exists.")
             return True
         return False
 
     def has_node(self, node_id):
+        if self.link_store is not None:
+            return self.link_store.has_node(node_id)
         return self.graph.has_node(node_id)
 
     def has_nodes(self, node_id: list):
@@ -2244,6 +2551,8 @@ class Network:
         return self.graph.has_edge(u, v)
 
     def has_link(self, link_id: str):
+        if self.link_store is not None:
+            return self.link_store.has_link(link_id)
         if link_id in self.link_id_mapping:
             link_edge = self.link_id_mapping[link_id]
             u, v, multi_idx = link_edge["from"], link_edge["to"], link_edge["multi_edge_idx"]
@@ -2312,30 +2621,13 @@ class Network:
             return 0
 
     def generate_index_for_node(self, avoid_keys: Union[list, set] = None, silent: bool = False):
-        existing_keys = set([i for i, attribs in self.nodes()])
-        if avoid_keys:
-            existing_keys = existing_keys | set(avoid_keys)
-        try:
-            id = max([int(i) for i in existing_keys]) + 1
-        except ValueError:
-            id = len(existing_keys) + 1
-        if (id in existing_keys) or (str(id) in existing_keys):
-            id = uuid.uuid4()
+        id = self._generate_ids("node", 1, avoid_keys)[0]
         if not silent:
             logging.info(f"Generated node id {id}.")
-        return str(id)
+        return id
 
     def generate_indices_for_n_nodes(self, n, avoid_keys: Union[list, set] = None):
-        existing_keys = set([i for i, attribs in self.nodes()])
-        if avoid_keys:
-            existing_keys = existing_keys | set(avoid_keys)
-        try:
-            id_set = set([str(max([int(i) for i in existing_keys]) + j) for j in range(1, n + 1)])
-        except ValueError:
-            id_set = set([str(len(existing_keys) + j) for j in range(1, n + 1)])
-        if id_set & existing_keys:
-            id_set = id_set - existing_keys
-            id_set = id_set | set([str(uuid.uuid4()) for i in range(n - len(id_set))])
+        id_set = set(self._generate_ids("node", n, avoid_keys))
         logging.info(f"Generated {len(id_set)} node ids.")
         return id_set
 
@@ -2352,26 +2644,48 @@ class Network:
         return str(_id)
 
     def generate_indices_for_n_edges(self, n, avoid_keys: Union[list, set] = None):
-        existing_keys = set(self.link_id_mapping.keys())
-        if avoid_keys:
-            existing_keys = existing_keys | set(avoid_keys)
-        id_set = set(map(str, range(n))) - existing_keys
-        _max = 0
-        loop_no = 0
-
-        while len(id_set) != n:
-            if loop_no > 0:
-                if not _max:
-                    _max = n
-                else:
-                    _max += n
-            missing_ns = n - len(id_set)
-            id_set |= set(map(str, range(_max + 1, _max + missing_ns + 1))) - existing_keys
-            loop_no += 1
-
+        id_set = set(self._generate_ids("link", n, avoid_keys))
         logging.info(f"Generated {len(id_set)} link ids.")
         return id_set
 
+    def _generate_ids(self, kind, n, avoid_keys: Union[list, set] = None):
+        """
+        Generates `n` unique string ids for nodes or links from a counter which only goes up, so that ids are never
+        handed out twice. Node ids start after the largest integer node id, or after the number of nodes if not all
+        ids are integers, link ids start at 0. Ids which are used in the network or are in `avoid_keys` are skipped.
+        :param kind: 'node' or 'link'
+        :param n: number of ids
+        :param avoid_keys: ids which should not be generated, checked one by one, pass a set for large collections
+        :return: list of string ids
+        """
+        if kind == "node":
+            is_used = self.has_node
+        else:
+            link_id_mapping = self.link_id_mapping
+            is_used = link_id_mapping.__contains__
+        if avoid_keys is None:
+            avoid_keys = set()
+        elif not isinstance(avoid_keys, (set, frozenset, dict)):
+            avoid_keys = set(avoid_keys)
+
+        i = self._next_id[kind]
+        if i is None and kind == "link":
+            i = 0
+        elif i is None:
+            existing_keys = list(self.graph.nodes)
+            try:
+                i = max([int(_id) for _id in existing_keys], default=0) + 1
+            except ValueError:
+                i = len(existing_keys) + 1
+        ids = []
+        while len(ids) < n:
+            _id = str(i)
+            if not (is_used(_id) or is_used(i) or _id in avoid_keys or i in avoid_keys):
+                ids.append(_id)
+            i += 1
+        self._next_id[kind] = i
+        return ids
+
     def index_graph_edges(self):
         logging.warning("This method clears the existing link_id indexing")
         self.link_id_mapping = {}
@@ -2697,6 +3011,31 @@ class Network:
             self.schedule.write_to_json(output_dir)
         self.write_extras(output_dir)
 
+    def write_snapshot(self, path, compress: bool = False, spatial_tree: bool = False):
+        """
+        Writes Network, with its Schedule, change logs and auxiliary files, to a single binary snapshot file which is
+        much faster to read than MATSim XML files. Read it back with `genet.read_snapshot`.
+        :param path: path to the snapshot file, `.npz` suffix is added if missing
+        :param compress: defaults to False, compresses the snapshot when True, at the cost of slower reading and
+            writing
+        :param spatial_tree: defaults to False, saves the spatial tree of the links (see `spatial_tree`) with the
+            snapshot when True, so that the network read back snaps PT without building it again
+        :return: path to the snapshot file
+        """
+        return snapshot_writer.write_snapshot(
+            self, path, compress=compress, spatial_tree=spatial_tree
+        )
+
+    def write_link_store(self, output_dir):
+        """
+        Writes nodes and links of the Network to a directory of arrays which can be memory-mapped, so that very large
+        networks can be opened with `genet.read_link_store` without building the whole graph in memory. The Schedule
+        and change log are not saved, use `write_snapshot` to save the whole Network.
+        :param output_dir: directory to write the link store to
+        :return: path to the link store directory
+        """
+        return link_store_writer.write_link_store(self, output_dir)
+
     def write_to_geojson(self, output_dir, epsg: str = None):
         """
         Writes Network graph and Schedule (if applicable) to nodes and links geojson files.
@@ -126,3 +126,11 @@ class MalformedAdditionalAttributeError(Exception):
     """
 
     pass
+
+
+class SnapshotFormatError(Exception):
+    """
+    Raised when a Network snapshot cannot be read, e.g. it was written in a different format version
+    """
+
+    pass
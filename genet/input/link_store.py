@@ -0,0 +1,315 @@
+import json
+import logging
+import os
+import pickle
+from typing import Union
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import shapely
+
+import genet.utils.graph_operations as graph_operations
+from genet.exceptions import SnapshotFormatError
+from genet.input.snapshot_reader import _paused_garbage_collection
+from genet.variables import LINK_STORE_FORMAT_VERSION
+
+
+class LinkStore:
+    """
+    Read-only, array-backed store of the nodes and links of a Network graph, written with
+    `genet.Network.write_link_store`. The arrays are memory-mapped by default, so that only the parts that are accessed
+    are read from disk. Attribute dictionaries of nodes and links are built on request.
+    NOTE! Attributes which are not stored in columns are pickled, only read link stores from trusted sources.
+    :param path: link store directory
+    :param mmap: defaults to True, memory-maps the arrays. Set to False to read them in memory
+    """
+
+    def __init__(self, path, mmap: bool = True):
+        self.path = str(path)
+        self.mmap = mmap
+        with open(os.path.join(self.path, "metadata.json")) as f:
+            metadata = json.load(f)
+        if metadata["version"] != LINK_STORE_FORMAT_VERSION:
+            raise SnapshotFormatError(
+                f"Link store {path} was written in format version {metadata['version']}, this version of GeNet "
+                f"reads version {LINK_STORE_FORMAT_VERSION}. Write the link store again with this version of GeNet."
+            )
+        self.epsg = metadata["epsg"]
+        self.modes = metadata["modes"]
+        with open(os.path.join(self.path, "attributes.pickle"), "rb") as f:
+            attributes = pickle.load(f)
+        self.attributes = attributes["network"]
+        self.graph_attributes = attributes["graph"]
+
+        mmap_mode = "r" if mmap else None
+        self._nodes = _Table(os.path.join(self.path, "nodes"), metadata["nodes"], mmap_mode)
+        self._links = _Table(os.path.join(self.path, "links"), metadata["links"], mmap_mode)
+        self._multi_edge_idx = np.load(
+            os.path.join(self.path, "links", "multi_edge_idx.npy"), mmap_mode=mmap_mode
+        )
+        self._from = self._links.columns.get("from")
+        self._to = self._links.columns.get("to")
+        self._links.decoders["node"] = self._nodes.id
+        self._links.decoders["modes"] = self._decode_modes
+
+    def __getstate__(self):
+        # the arrays are read again from the link store directory, rather than copied
+        return {"path": self.path, "mmap": self.mmap}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __deepcopy__(self, memo):
+        # read-only, no need to copy the arrays
+        return self
+
+    def __len__(self):
+        return len(self._links)
+
+    def number_of_nodes(self):
+        return len(self._nodes)
+
+    def has_node(self, node_id):
+        return self._nodes.row(node_id) is not None
+
+    def has_link(self, link_id):
+        return self._links.row(link_id) is not None
+
+    def node(self, node_id):
+        """
+        :return: attribs of the 'node_id'
+        """
+        return self._nodes.record(self._nodes.existing_row(node_id))
+
+    def nodes(self):
+        """
+        :return: Iterator through each node id and its attrib (two-tuple)
+        """
+        for row in range(len(self._nodes)):
+            yield self._nodes.id(row), self._nodes.record(row)
+
+    def link(self, link_id):
+        """
+        :return: attribs of the 'link_id'
+        """
+        return self._links.record(self._links.existing_row(link_id))
+
+    def links(self):
+        """
+        :return: Iterator through each link id and its attrib (two-tuple)
+        """
+        for row in range(len(self._links)):
+            yield self._links.id(row), self._links.record(row)
+
+    def edge_tuple_from_link_id(self, link_id):
+        row = self._links.existing_row(link_id)
+        return self._edge_tuple(row)
+
+    def edges(self):
+        """
+        :return: Iterator through each link's from node, to node, multi edge index and its attrib (four-tuple)
+        """
+        for row in range(len(self._links)):
+            u, v, multi_idx = self._edge_tuple(row)
+            yield u, v, multi_idx, self._links.record(row)
+
+    def link_id_mapping(self):
+        """
+        :return: {link_id: {'from': u, 'to': v, 'multi_edge_idx': multi_idx}} for all links
+        """
+        return {
+            link_id: {"from": u, "to": v, "multi_edge_idx": multi_idx}
+            for link_id, u, v, multi_idx in zip(
+                self._links.ids.tolist(),
+                self._nodes.ids[self._from.values].tolist(),
+                self._nodes.ids[self._to.values].tolist(),
+                self._multi_edge_idx.tolist(),
+            )
+        }
+
+    def link_attribute_data_under_key(self, key: Union[str, dict]):
+        """
+        Generates a pandas.Series object indexed by link ids, with data stored on the links under `key`. Data stored
+        in columns is read without building attribute dictionaries of the links.
+        :param key: either a string e.g. 'modes', or if accessing nested information, a dictionary
+            e.g. {'attributes': {'osm:way:name': 'text'}}
+        :return: pandas.Series
+        """
+        return pd.Series(self._links.data_under_key(key))
+
+    def link_attribute_data_under_keys(self, keys: Union[list, set], index_name=None):
+        """
+        Generates a pandas.DataFrame object indexed by link ids, with data stored on the links under `keys`
+        :param keys: list of either a string e.g. 'modes', or if accessing nested information, a dictionary
+            e.g. {'attributes': {'osm:way:name': 'text'}}
+        :param index_name: optional, gives the index_name to dataframes index
+        :return: pandas.DataFrame
+        """
+        if isinstance(keys, str):
+            keys = [keys]
+        return graph_operations.attribute_data_to_dataframe(
+            ((key, self._links.data_under_key(key)) for key in keys), index_name=index_name
+        )
+
+    def build_graph(self):
+        """
+        Builds the graph of the Network, with all attribute dictionaries of nodes and links.
+        :return: nx.MultiDiGraph, link_id_mapping
+        """
+        logging.info(
+            f"Building graph with {self.number_of_nodes()} nodes and {len(self)} links from link store "
+            f"{self.path}"
+        )
+        with _paused_garbage_collection():
+            g = nx.MultiDiGraph()
+            g.graph.update(self.graph_attributes)
+            g.add_nodes_from(self.nodes())
+            g.add_edges_from(self.edges())
+            return g, self.link_id_mapping()
+
+    def _edge_tuple(self, row):
+        return (
+            self._nodes.id(int(self._from.values[row])),
+            self._nodes.id(int(self._to.values[row])),
+            int(self._multi_edge_idx[row]),
+        )
+
+    def _decode_modes(self, bitmask: int):
+        return {mode for i, mode in enumerate(self.modes) if bitmask >> i & 1}
+
+
+class _Column:
+    __slots__ = ["key", "type", "values", "present", "offsets"]
+
+    def __init__(self, path, key, column_type, mmap_mode):
+        self.key = key
+        self.type = column_type
+        self.values = _load(path, f"{key}.npy", mmap_mode)
+        self.present = _load(path, f"{key}.present.npy", mmap_mode)
+        self.offsets = _load(path, f"{key}.offsets.npy", mmap_mode)
+
+
+class _Table:
+    """
+    Nodes or links of a link store: ids, columns and pickled extra attributes of each record
+    """
+
+    def __init__(self, path, metadata: dict, mmap_mode):
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode=mmap_mode)
+        self._sorted_ids = np.load(os.path.join(path, "ids.sorted.npy"), mmap_mode=mmap_mode)
+        self._order = np.load(os.path.join(path, "ids.order.npy"), mmap_mode=mmap_mode)
+        self.columns = {
+            key: _Column(path, key, column_type, mmap_mode)
+            for key, column_type in metadata["columns"].items()
+        }
+        self._extras_keys = set(metadata["extras_keys"])
+        self._extras = np.load(os.path.join(path, "extras.npy"), mmap_mode=mmap_mode)
+        self._extras_offsets = np.load(
+            os.path.join(path, "extras.offsets.npy"), mmap_mode=mmap_mode
+        )
+        self.decoders = {
+            "float": float,
+            "int": int,
+            "geometry": lambda wkb: shapely.from_wkb(bytes(wkb)),
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def id(self, row: int):
+        return self.ids[row].item()
+
+    def row(self, _id):
+        if not isinstance(_id, (str, int)) or isinstance(_id, str) != (self.ids.dtype.kind == "U"):
+            return None
+        i = int(np.searchsorted(self._sorted_ids, _id))
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == _id:
+            return int(self._order[i])
+        return None
+
+    def existing_row(self, _id):
+        row = self.row(_id)
+        if row is None:
+            raise KeyError(_id)
+        return row
+
+    def value(self, column: _Column, row: int):
+        if column.type == "id":
+            return self.id(row)
+        if column.type == "geometry":
+            return self.decoders["geometry"](
+                column.values[column.offsets[row] : column.offsets[row + 1]]
+            )
+        return self.decoders[column.type](column.values[row].item())
+
+    def record(self, row: int):
+        record = {
+            key: self.value(column, row)
+            for key, column in self.columns.items()
+            if column.present is None or column.present[row]
+        }
+        record.update(self.extras(row))
+        return record
+
+    def extras(self, row: int):
+        start, end = self._extras_offsets[row], self._extras_offsets[row + 1]
+        if start == end:
+            return {}
+        return pickle.loads(self._extras[start:end].tobytes())
+
+    def data_under_key(self, key: Union[str, dict]):
+        """
+        Data stored under `key`, read column-wise if `key` is stored in a column
+        :return: {id: value}
+        """
+        # values which did not fit the column of the key, and nested keys, are in the extras
+        extras_data = {}
+        top_level_keys = set(key) if isinstance(key, dict) else {key}
+        if top_level_keys & self._extras_keys:
+            rows_with_extras = np.flatnonzero(np.diff(self._extras_offsets)).tolist()
+            extras_data = graph_operations.get_attribute_data_under_key(
+                ((row, self.extras(row)) for row in rows_with_extras), key
+            )
+        if isinstance(key, dict) or key not in self.columns:
+            rows = np.array(list(extras_data), dtype=np.int64)
+            return dict(zip(self.ids[rows].tolist(), extras_data.values()))
+
+        column = self.columns[key]
+        if column.present is None:
+            rows = np.arange(len(self))
+        else:
+            rows = np.flatnonzero(column.present)
+        values = self._column_values(column, rows)
+        if extras_data:
+            rows = np.concatenate([rows, np.array(list(extras_data), dtype=np.int64)])
+            values = values + list(extras_data.values())
+            order = np.argsort(rows, kind="stable")
+            rows = rows[order]
+            values = [values[i] for i in order.tolist()]
+        return dict(zip(self.ids[rows].tolist(), values))
+
+    def _column_values(self, column: _Column, rows: np.ndarray):
+        if column.type == "id":
+            return self.ids[rows].tolist()
+        if column.type == "geometry":
+            offsets = column.offsets.tolist()
+            wkb = column.values.tobytes()
+            return shapely.from_wkb(
+                [wkb[offsets[row] : offsets[row + 1]] for row in rows.tolist()]
+            ).tolist()
+        if column.type in {"float", "int"}:
+            return column.values[rows].tolist()
+        # modes and nodes repeat, they are decoded once for each unique value
+        unique_values, codes = np.unique(column.values[rows], return_inverse=True)
+        decoded = [self.decoders[column.type](value) for value in unique_values.tolist()]
+        if column.type == "modes":
+            return [decoded[code].copy() for code in codes.tolist()]
+        return [decoded[code] for code in codes.tolist()]
+
+
+def _load(path, name, mmap_mode):
+    path = os.path.join(path, name)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode=mmap_mode)
+    return None
@@ -1,25 +1,26 @@
+import io
 import logging
+import mmap
 import re
+import time
 import xml.etree.cElementTree as ET
 
 import networkx as nx
 from pyproj import Proj, Transformer
 
 from genet.schedule_elements import Route, Service, Stop
-from genet.utils import dict_support, java_dtypes, spatial
+from genet.utils import dict_support, java_dtypes, parallel, profiling, spatial
 
 
-def read_node(elem, g, node_id_mapping, node_attribs, transformer):
+def read_node(elem, node_attribs, transformer):
     """
-    Adds node elem of the stream to the network
+    Reads node elem of the stream into a dictionary of node attributes
     :param elem:
-    :param g: nx.MultiDiGraph
-    :param node_id_mapping:
+    :param node_attribs: additional attributes of the node
     :param transformer:
-    :return:
+    :return: dict of node attributes
     """
-    duplicated_node_id = {}
-    attribs = elem.attrib
+    attribs = dict(elem.attrib)
     attribs["x"], attribs["y"] = float(attribs["x"]), float(attribs["y"])
 
     if "z" in attribs:
@@ -33,59 +34,31 @@ def read_node(elem, g, node_id_mapping, node_attribs, transformer):
 
     if node_attribs:
         attribs["attributes"] = node_attribs
-
-    node_id = attribs["id"]
-    if node_id in node_id_mapping:
-        logging.warning(
-            "This MATSim network has a node that is not unique: {}. Generating a new id would"
-            "be pointless as we don't know which links should be connected to this particular"
-            "node. The node will cease to exist and the first encountered node with this id"
-            "will be kept. Investigate the links connected to that node.".format(node_id)
-        )
-        duplicated_node_id[node_id] = attribs
-    else:
-        node_id_mapping[node_id] = attribs["s2_id"]
-        g.add_node(node_id, **attribs)
-    return g, duplicated_node_id
+    return attribs
 
 
-def read_link(elem, g, u, v, node_id_mapping, link_id_mapping, link_attribs):
+def read_link(elem, link_attribs):
     """
-    Reads link elem of the stream to the network
+    Reads link elem of the stream into a dictionary of link attributes. Spatial ids of the nodes and uniqueness of the
+    link id are resolved when the link is added to the graph, see `build_graph`.
     :param elem:
-    :param g: nx.MultiDiGraph
-    :param u: from node of the previous link
-    :param v: to node of the previous link
-    :param node_id_mapping:
-    :param link_id_mapping:
-    :param link_attribs: link attributes of the previous link
-    :return:
+    :param link_attribs: additional attributes of the link
+    :return: dict of link attributes
     """
-    duplicated_link_id = {}
-
-    attribs = elem.attrib
-    attribs["s2_from"] = node_id_mapping[attribs["from"]]
-    attribs["s2_to"] = node_id_mapping[attribs["to"]]
+    attribs = dict(elem.attrib)
     attribs["modes"] = set(attribs["modes"].split(","))
 
-    link_id, duplicated_link_id = unique_link_id(attribs["id"], link_id_mapping)
-    attribs["id"] = link_id
-    link_id_mapping[link_id] = {"from": attribs["from"], "to": attribs["to"]}
-
     for key in ["freespeed", "capacity", "permlanes"]:
         try:
             attribs[key] = float(attribs[key])
         except KeyError:
             logging.warning(
                 "Key: {} is not present in link: {}. This may lead to problems if using this"
-                "network with MATSim."
+                "network with MATSim.".format(key, attribs["id"])
             )
 
-    length = float(attribs["length"])
-    del attribs["length"]
-
-    u = attribs["from"]
-    v = attribs["to"]
+    # length is stored last on the graph edge
+    attribs["length"] = float(attribs.pop("length"))
 
     if link_attribs:
         if "geometry" in link_attribs:
@@ -96,13 +69,66 @@ def read_link(elem, g, u, v, node_id_mapping, link_id_mapping, link_attribs):
                 del link_attribs["geometry"]
         if link_attribs:
             attribs["attributes"] = link_attribs
+    return attribs
 
-    if g.has_edge(u, v):
-        link_id_mapping[link_id]["multi_edge_idx"] = len(g[u][v])
-    else:
-        link_id_mapping[link_id]["multi_edge_idx"] = 0
-    g.add_weighted_edges_from([(u, v, length)], weight="length", **attribs)
-    return g, u, v, link_id_mapping, duplicated_link_id
+
+def build_graph(nodes: list, links: list):
+    """
+    Builds the graph from node and link attributes read from the MATSim network, in the order they were read. Nodes
+    and links are added to the graph in bulk, the attribute dictionaries are stored on the graph without copying.
+    The lists are emptied as their items are added to the graph.
+    :param nodes: list of node attribute dicts, output of `read_node`
+    :param links: list of link attribute dicts, output of `read_link`
+    :return: g (nx.MultiDiGraph), link_id_mapping, duplicated_node_ids, duplicated_link_ids
+    """
+    node_id_mapping = {}
+    duplicated_node_ids = {}
+    link_id_mapping = {}
+    duplicated_link_ids = {}
+    multi_edge_counts = {}
+
+    def graph_nodes():
+        for i in range(len(nodes)):
+            attribs, nodes[i] = nodes[i], None
+            node_id = attribs["id"]
+            if node_id in node_id_mapping:
+                logging.warning(
+                    "This MATSim network has a node that is not unique: {}. Generating a new id would"
+                    "be pointless as we don't know which links should be connected to this particular"
+                    "node. The node will cease to exist and the first encountered node with this id"
+                    "will be kept. Investigate the links connected to that node.".format(node_id)
+                )
+                duplicated_node_ids.setdefault(node_id, []).append(attribs)
+            else:
+                node_id_mapping[node_id] = attribs["s2_id"]
+                yield node_id, attribs
+
+    def graph_edges():
+        for i in range(len(links)):
+            attribs, links[i] = links[i], None
+            u = attribs["from"]
+            v = attribs["to"]
+            attribs["s2_from"] = node_id_mapping[u]
+            attribs["s2_to"] = node_id_mapping[v]
+
+            link_id, duplicated_link_id = unique_link_id(attribs["id"], link_id_mapping)
+            for key, val in duplicated_link_id.items():
+                duplicated_link_ids.setdefault(key, []).append(val)
+            attribs["id"] = link_id
+
+            multi_edge_idx = multi_edge_counts.get((u, v), 0)
+            multi_edge_counts[(u, v)] = multi_edge_idx + 1
+            link_id_mapping[link_id] = {"from": u, "to": v, "multi_edge_idx": multi_edge_idx}
+            # length is the last attribute of the edge data
+            attribs["length"] = attribs.pop("length")
+            yield u, v, multi_edge_idx, attribs
+
+    g = nx.MultiDiGraph()
+    g.add_nodes_from(graph_nodes())
+    g.add_edges_from(graph_edges())
+    nodes.clear()
+    links.clear()
+    return g, link_id_mapping, duplicated_node_ids, duplicated_link_ids
 
 
 def update_additional_attrib(elem, attribs, force_long_form_attributes=False):
@@ -188,9 +214,12 @@ def unique_link_id(link_id, link_id_mapping):
     return link_id, duplicated_link_id
 
 
-def read_network(network_path, transformer: Transformer, force_long_form_attributes=False):
+def read_network(
+    network_path, transformer: Transformer, force_long_form_attributes=False, processes=1
+):
     """
-    Read MATSim network
+    Read MATSim network. The file is streamed: each node and link element is released as soon as it has been read
+    and the graph is built in bulk once the whole file has been read. Throughput and peak memory are logged.
     :param network_path: path to the network.xml file
     :param transformer: pyproj crs transformer
     :param force_long_form_attributes: Defaults to False, if True the additional attributes will be read into verbose
@@ -204,54 +233,89 @@ def read_network(network_path, transformer: Transformer, force_long_form_attribu
             }
         where the type of attrib_value is mapped to a python type using the declared java class.
         NOTE! Network level attributes cannot be forced to be read into long form.
+    :param processes: Defaults to 1. If more than 1, the `nodes` and `links` sections of the file are split into
+        byte-range shards which are parsed in parallel, see `shard_network_file`. The resulting graph is the same.
     :return: g (nx.MultiDiGraph representing the multimodal network),
         node_id_mapping (dict {matsim network node ids : s2 spatial ids}),
         link_id_mapping (dict {matsim network link ids : {'from': matsim id from node, ,'to': matsim id to
         node, 's2_from' : s2 spatial ids from node, 's2_to': s2 spatial ids to node}})
     """
-    g = nx.MultiDiGraph()
+    start_time = time.perf_counter()
+    shards = None
+    if processes > 1:
+        shards = shard_network_file(network_path, n_shards=processes)
+        if shards is None:
+            logging.warning(
+                "Could not find the nodes and links sections of the network file to split it into shards. "
+                "The network will be read in a single process."
+            )
+
+    if shards is None:
+        nodes, links, network_attributes = parse_network(
+            network_path, transformer, force_long_form_attributes
+        )
+    else:
+        skeleton, node_shards, link_shards = shards
+        _, _, network_attributes = parse_network(
+            io.BytesIO(skeleton), transformer, force_long_form_attributes
+        )
+        parsed_shards = parallel.multiprocess_wrap(
+            data=[("nodes", shard) for shard in node_shards]
+            + [("links", shard) for shard in link_shards],
+            split=parallel.split_list,
+            apply=_parse_network_shards,
+            combine=parallel.combine_list,
+            processes=processes,
+            network_path=network_path,
+            transformer=transformer,
+            force_long_form_attributes=force_long_form_attributes,
+        )
+        nodes = parallel.combine_list([shard_nodes for shard_nodes, _ in parsed_shards])
+        links = parallel.combine_list([shard_links for _, shard_links in parsed_shards])
+
+    n_elements = len(nodes) + len(links)
+    g, link_id_mapping, duplicated_node_ids, duplicated_link_ids = build_graph(nodes, links)
+    profiling.log_throughput("MATSim network nodes and links", n_elements, start_time)
+    return g, link_id_mapping, duplicated_node_ids, duplicated_link_ids, network_attributes
+
 
+def parse_network(source, transformer: Transformer, force_long_form_attributes=False):
+    """
+    Streams MATSim network elements from `source`, releasing each node and link element as soon as it has been read.
+    :param source: path to the network.xml file or a file object with (a part of) its contents
+    :param transformer: pyproj crs transformer
+    :param force_long_form_attributes: Defaults to False, see `read_network`
+    :return: nodes (list of node attribute dicts), links (list of link attribute dicts), network-level attributes
+    """
     network_attributes = {}
-    node_id_mapping = {}
+    nodes = []
     node_attribs = {}
-    link_id_mapping = {}
+    links = []
     link_attribs = {}
-    duplicated_link_ids = {}
-    duplicated_node_ids = {}
-    u, v = None, None
 
     elem_themes_for_additional_attributes = {"network", "nodes", "links"}
     elem_type_for_additional_attributes = None
+    # parsed node and link elements are cleared and detached from this parent so that the
+    # tree does not grow with the file
+    container = None
 
-    for event, elem in ET.iterparse(network_path, events=("start", "end")):
+    for event, elem in ET.iterparse(source, events=("start", "end")):
         if event == "start":
             if elem.tag in elem_themes_for_additional_attributes:
                 elem_type_for_additional_attributes = elem.tag
+                if elem.tag in {"nodes", "links"}:
+                    container = elem
         elif event == "end":
             if elem.tag == "node":
-                g, duplicated_node_id = read_node(
-                    elem, g, node_id_mapping, node_attribs, transformer
-                )
-                if duplicated_node_id:
-                    for key, val in duplicated_node_id.items():
-                        if key in duplicated_node_ids:
-                            duplicated_node_ids[key].append(val)
-                        else:
-                            duplicated_node_ids[key] = [val]
+                nodes.append(read_node(elem, node_attribs, transformer))
                 # reset node_attribs
                 node_attribs = {}
+                _release(elem, container)
             elif elem.tag == "link":
-                g, u, v, link_id_mapping, duplicated_link_id = read_link(
-                    elem, g, u, v, node_id_mapping, link_id_mapping, link_attribs
-                )
-                if duplicated_link_id:
-                    for key, val in duplicated_link_id.items():
-                        if key in duplicated_link_ids:
-                            duplicated_link_ids[key].append(val)
-                        else:
-                            duplicated_link_ids[key] = [val]
+                links.append(read_link(elem, link_attribs))
                 # reset link_attribs
                 link_attribs = {}
+                _release(elem, container)
             elif elem.tag == "attribute":
                 if elem_type_for_additional_attributes == "links":
                     link_attribs = update_additional_attrib(
@@ -269,7 +333,93 @@ def read_network(network_path, transformer: Transformer, force_long_form_attribu
                     node_attribs = update_additional_attrib(
                         elem, node_attribs, force_long_form_attributes
                     )
-    return g, link_id_mapping, duplicated_node_ids, duplicated_link_ids, network_attributes
+
+    return nodes, links, network_attributes
+
+
+def shard_network_file(network_path, n_shards):
+    """
+    Splits the `nodes` and `links` sections of a MATSim network file into byte ranges that start on a `node` or
+    `link` element, respectively.
+    :param network_path: path to the network.xml file
+    :param n_shards: number of shards to split each of the sections into
+    :return: skeleton (bytes of the file with the contents of the `nodes` and `links` sections removed), list of
+        (start, end) byte ranges for the `nodes` section, list of (start, end) byte ranges for the `links` section.
+        None if the sections could not be found.
+    """
+    with open(network_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        nodes_section = _find_section_body(mm, b"nodes")
+        if nodes_section is None:
+            return None
+        links_section = _find_section_body(mm, b"links", nodes_section[1])
+        if links_section is None:
+            return None
+        skeleton = (
+            mm[: nodes_section[0]]
+            + mm[nodes_section[1] : links_section[0]]
+            + mm[links_section[1] :]
+        )
+        node_shards = _shard_section(mm, nodes_section, re.compile(rb"<node[\s/>]"), n_shards)
+        link_shards = _shard_section(mm, links_section, re.compile(rb"<link[\s/>]"), n_shards)
+    return skeleton, node_shards, link_shards
+
+
+def _find_section_body(mm, tag, pos=0):
+    match = re.compile(rb"<" + tag + rb"[\s/>]").search(mm, pos)
+    if match is None:
+        return None
+    open_tag_end = mm.find(b">", match.start()) + 1
+    if mm[open_tag_end - 2 : open_tag_end] == b"/>":
+        return open_tag_end, open_tag_end
+    close_tag_start = mm.find(b"</" + tag + b">", open_tag_end)
+    if close_tag_start == -1:
+        return None
+    return open_tag_end, close_tag_start
+
+
+def _shard_section(mm, section, element_start_pattern, n_shards):
+    start, end = section
+    boundaries = [start]
+    for i in range(1, n_shards):
+        match = element_start_pattern.search(mm, start + (end - start) * i // n_shards, end)
+        if match is not None and match.start() > boundaries[-1]:
+            boundaries.append(match.start())
+    boundaries.append(end)
+    return [
+        (boundaries[i], boundaries[i + 1])
+        for i in range(len(boundaries) - 1)
+        if boundaries[i] < boundaries[i + 1]
+    ]
+
+
+def _parse_network_shards(shards, network_path, transformer, force_long_form_attributes=False):
+    parsed_shards = []
+    with open(network_path, "rb") as f:
+        # keep the xml declaration, it may declare the encoding of the file
+        declaration = f.readline()
+        if not declaration.startswith(b"<?xml"):
+            declaration = b""
+        for section, (start, end) in shards:
+            f.seek(start)
+            source = io.BytesIO(
+                declaration
+                + b"<network><"
+                + section.encode()
+                + b">"
+                + f.read(end - start)
+                + b"</"
+                + section.encode()
+                + b"></network>"
+            )
+            nodes, links, _ = parse_network(source, transformer, force_long_form_attributes)
+            parsed_shards.append((nodes, links))
+    return parsed_shards
+
+
+def _release(elem, container):
+    elem.clear()
+    if container is not None:
+        del container[:]
 
 
 def read_schedule(schedule_path, epsg, force_long_form_attributes=False):
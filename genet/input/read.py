@@ -8,8 +8,10 @@ import pandas as pd
 
 import genet.core as core
 import genet.input.gtfs_reader as gtfs_reader
+import genet.input.link_store as link_store
 import genet.input.matsim_reader as matsim_reader
 import genet.input.osm_reader as osm_reader
+import genet.input.snapshot_reader as snapshot_reader
 import genet.modify.change_log as change_log
 import genet.schedule_elements as schedule_elements
 import genet.utils.dict_support as dict_support
@@ -24,6 +26,7 @@ def read_matsim(
     path_to_schedule: str = None,
     path_to_vehicles: str = None,
     force_long_form_attributes=False,
+    processes: int = 1,
 ):
     """
     Reads MATSim's network.xml to genet.Network object and if give, also the schedule.xml and vehicles.xml into
@@ -43,12 +46,14 @@ def read_matsim(
             }
         where the type of attrib_value is mapped to a python type using the declared java class.
         NOTE! Network and Schedule level attributes cannot be forced to be read into long form.
+    :param processes: number of processes to read the network.xml file with, defaults to 1
     :return: genet.Network object
     """
     n = read_matsim_network(
         path_to_network=path_to_network,
         epsg=epsg,
         force_long_form_attributes=force_long_form_attributes,
+        processes=processes,
     )
     if path_to_schedule:
         n.schedule = read_matsim_schedule(
@@ -60,7 +65,9 @@ def read_matsim(
     return n
 
 
-def read_matsim_network(path_to_network: str, epsg: str, force_long_form_attributes=False):
+def read_matsim_network(
+    path_to_network: str, epsg: str, force_long_form_attributes=False, processes: int = 1
+):
     """
     Reads MATSim's network.xml to genet.Network object
     :param path_to_network: path to MATSim's network.xml file
@@ -76,6 +83,8 @@ def read_matsim_network(path_to_network: str, epsg: str, force_long_form_attribu
             }
         where the type of attrib_value is mapped to a python type using the declared java class.
         NOTE! Network level attributes cannot be forced to be read into long form.
+    :param processes: number of processes to read the file with, defaults to 1. If more than 1, the nodes and links
+        sections of the file are split into shards which are parsed in parallel. The resulting Network is the same.
     :return: genet.Network object
     """
     n = core.Network(epsg=epsg)
@@ -86,7 +95,10 @@ def read_matsim_network(path_to_network: str, epsg: str, force_long_form_attribu
         duplicated_links,
         network_attributes,
     ) = matsim_reader.read_network(
-        path_to_network, n.transformer, force_long_form_attributes=force_long_form_attributes
+        path_to_network,
+        n.transformer,
+        force_long_form_attributes=force_long_form_attributes,
+        processes=processes,
     )
     n.attributes = dict_support.merge_complex_dictionaries(n.attributes, network_attributes)
     n.graph.graph["crs"] = n.epsg
@@ -162,6 +174,55 @@ def read_matsim_schedule(
     return matsim_schedule
 
 
+def read_snapshot(path: str):
+    """
+    Reads a binary Network snapshot, written with `genet.Network.write_snapshot`, into a genet.Network object, with
+    its Schedule, change logs and auxiliary files, and the spatial tree of its links if it was saved with them.
+    NOTE! Parts of the snapshot are pickled, only read snapshots from trusted sources.
+    :param path: path to the .npz snapshot file
+    :return: genet.Network object
+    """
+    logging.info(f"Reading Network snapshot from {path}")
+    snapshot = snapshot_reader.read_snapshot(path)
+    objects = snapshot["objects"]
+
+    n = core.Network(epsg=snapshot["epsg"])
+    n.graph = snapshot["graph"]
+    n.link_id_mapping = snapshot["link_id_mapping"]
+    n.change_log = snapshot["change_log"]
+    n.__dict__.update(objects["network"])
+    if snapshot["spatial_tree_links"] is not None:
+        n._spatial_trees[None] = spatial.SpatialTree.from_links(snapshot["spatial_tree_links"])
+
+    schedule_attributes = objects["schedule"]
+    n.schedule = schedule_elements.Schedule(
+        _graph=snapshot["schedule_graph"],
+        vehicles=schedule_attributes["vehicles"],
+        vehicle_types=schedule_attributes["vehicle_types"],
+    )
+    n.schedule.__dict__.update(schedule_attributes)
+    return n
+
+
+def read_link_store(path: str, mmap: bool = True):
+    """
+    Opens a link store, written with `genet.Network.write_link_store`, as a genet.Network object. Nodes and links are
+    read from the, by default memory-mapped, arrays of the store when accessed with `node`, `nodes`, `link`, `links`,
+    `link_attribute_data_under_key` or `link_attribute_data_under_keys`. The graph is built in memory only once
+    anything else needs it, see `genet.Network.materialise_link_store`.
+    NOTE! Parts of the link store are pickled, only read link stores from trusted sources.
+    :param path: link store directory
+    :param mmap: defaults to True, memory-maps the arrays. Set to False to read them in memory
+    :return: genet.Network object
+    """
+    logging.info(f"Opening Network link store {path}")
+    store = link_store.LinkStore(path, mmap=mmap)
+    n = core.Network(epsg=store.epsg)
+    n.attributes = store.attributes
+    n.link_store = store
+    return n
+
+
 def read_json(network_path: str, epsg: str, schedule_path: str = ""):
     """
     Reads Network and, if passed, Schedule JSON files in to a genet.Network
@@ -0,0 +1,175 @@
+import gc
+import json
+import pickle
+from contextlib import contextmanager
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import shapely
+
+import genet.modify.change_log as change_log
+from genet.exceptions import SnapshotFormatError
+from genet.variables import SNAPSHOT_FORMAT_VERSION
+
+
+def read_snapshot_arrays(path):
+    """
+    Reads all arrays of a snapshot written with `genet.output.snapshot_writer.write_snapshot`.
+    NOTE! Parts of the snapshot are pickled, only read snapshots from trusted sources.
+    :param path: path to the .npz snapshot file
+    :return: metadata dict, dict of numpy arrays
+    """
+    with np.load(path, allow_pickle=False) as npz:
+        arrays = {key: npz[key] for key in npz.files}
+    metadata = json.loads(arrays.pop("metadata").item())
+    if metadata["version"] != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotFormatError(
+            f"Snapshot {path} was written in format version {metadata['version']}, this version of GeNet reads "
+            f"version {SNAPSHOT_FORMAT_VERSION}. Write the snapshot again with this version of GeNet."
+        )
+    return metadata, arrays
+
+
+def decode_pickle(array):
+    return pickle.loads(array.tobytes())
+
+
+def decode_table(arrays: dict, name: str):
+    """
+    Decodes a table of records encoded with `genet.output.snapshot_writer.encode_table`
+    :param arrays: dictionary of numpy arrays of the snapshot
+    :param name: name of the table
+    :return: list of ids, list of records (dicts)
+    """
+    if f"{name}/index" in arrays:
+        index = arrays[f"{name}/index"].tolist()
+    else:
+        index = decode_pickle(arrays[f"{name}/index_pickle"])
+    n = len(index)
+
+    keys = []
+    columns = []
+    masks = {}
+    for key, column_type in json.loads(arrays[f"{name}/keys"].item()):
+        prefix = f"{name}/{column_type}/{key}"
+        mask = arrays.get(f"{prefix}/mask")
+        if column_type == "native":
+            values = arrays[prefix].tolist()
+        elif column_type == "set":
+            unique_sets = _split_on_offsets(
+                arrays[prefix].tolist(), arrays[f"{prefix}/offsets"], set
+            )
+            # sets are mutable, each record gets its own copy
+            values = [unique_sets[code].copy() for code in arrays[f"{prefix}/codes"].tolist()]
+        elif column_type == "geometry":
+            values = shapely.from_wkb(
+                _split_on_offsets(arrays[prefix].tobytes(), arrays[f"{prefix}/offsets"], bytes)
+            ).tolist()
+        else:
+            raise SnapshotFormatError(f"Unrecognised column type: {column_type}")
+        if mask is not None:
+            masks[key] = mask
+            filled = [None] * n
+            for i, value in zip(np.flatnonzero(mask).tolist(), values):
+                filled[i] = value
+            values = filled
+        keys.append(key)
+        columns.append(values)
+
+    records = [dict(zip(keys, row)) for row in zip(*columns)] if columns else [{} for _ in index]
+    for key, mask in masks.items():
+        for i in np.flatnonzero(~mask).tolist():
+            del records[i][key]
+    if f"{name}/remainder" in arrays:
+        for record, remainder in zip(records, decode_pickle(arrays[f"{name}/remainder"])):
+            record.update(remainder)
+    return index, records
+
+
+def decode_change_log(arrays: dict, name: str):
+    index, records = decode_table(arrays, name)
+    return change_log.ChangeLog(
+        df=pd.DataFrame(records, index=index, columns=arrays[f"{name}/columns"].tolist()),
+        level=str(arrays[f"{name}/level"]) if f"{name}/level" in arrays else None,
+    )
+
+
+def _split_on_offsets(flat, offsets, container):
+    offsets = offsets.tolist()
+    return [container(flat[start:end]) for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def read_snapshot(path):
+    """
+    Reads the graphs and other data of a Network snapshot.
+    :param path: path to the .npz snapshot file
+    :return: dict with keys:
+        'epsg', 'graph' (nx.MultiDiGraph), 'link_id_mapping', 'change_log' (genet.ChangeLog),
+        'schedule_graph' (nx.DiGraph), 'objects' (dict of other attributes of the Network and Schedule objects),
+        'spatial_tree_links' (GeoDataFrame of links of the spatial tree, None if not saved with the snapshot)
+    """
+    metadata, arrays = read_snapshot_arrays(path)
+    with _paused_garbage_collection():
+        return _build_snapshot(metadata, arrays)
+
+
+@contextmanager
+def _paused_garbage_collection():
+    # millions of container objects are created while decoding, none of which are garbage. Collection cycles
+    # triggered by the allocations would otherwise take up about half of the reading time
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _build_snapshot(metadata, arrays):
+    node_ids, nodes = decode_table(arrays, "nodes")
+    link_keys, links = decode_table(arrays, "links")
+    g = nx.MultiDiGraph()
+    g.add_nodes_from(zip(node_ids, nodes))
+    g.add_edges_from(
+        zip(
+            [node_ids[i] for i in arrays["links/u"].tolist()],
+            [node_ids[i] for i in arrays["links/v"].tolist()],
+            link_keys,
+            links,
+        )
+    )
+    link_ids, link_id_mapping = decode_table(arrays, "link_id_mapping")
+
+    objects = decode_pickle(arrays["objects"])
+    g.graph.update(objects.pop("network_graph"))
+
+    stop_ids, stops = decode_table(arrays, "stops")
+    _, stop_edges = decode_table(arrays, "stop_edges")
+    schedule_graph = nx.DiGraph()
+    schedule_graph.add_nodes_from(zip(stop_ids, stops))
+    schedule_graph.add_edges_from(
+        zip(
+            [stop_ids[i] for i in arrays["stop_edges/u"].tolist()],
+            [stop_ids[i] for i in arrays["stop_edges/v"].tolist()],
+            stop_edges,
+        )
+    )
+    schedule_graph.graph.update(objects.pop("schedule_graph"))
+    for key in ["routes", "services"]:
+        ids, records = decode_table(arrays, key)
+        schedule_graph.graph[key] = dict(zip(ids, records))
+    schedule_graph.graph["change_log"] = decode_change_log(arrays, "schedule_change_log")
+
+    return {
+        "epsg": metadata["epsg"],
+        "graph": g,
+        "link_id_mapping": dict(zip(link_ids, link_id_mapping)),
+        "change_log": decode_change_log(arrays, "change_log"),
+        "schedule_graph": schedule_graph,
+        "objects": objects,
+        "spatial_tree_links": decode_pickle(arrays["spatial_tree/links"])
+        if "spatial_tree/links" in arrays
+        else None,
+    }
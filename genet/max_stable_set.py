@@ -1,17 +1,28 @@
+import heapq
 import itertools
 import logging
+import math
+import multiprocessing as mp
 from copy import deepcopy
+from functools import partial
 
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 import pandas as pd
 import pyomo.environ as pe
+from scipy import optimize, sparse
 
 import genet.output.geojson as gngeojson
 import genet.utils.dict_support as dict_support
 import genet.utils.graph_operations as graph_operations
+import genet.utils.spatial as spatial
 from genet.exceptions import InvalidMaxStableSetProblem
 
+# connected components of the problem graph with at most this many ways of selecting links for their stops are solved
+# by enumeration instead of a solver
+ENUMERATION_LIMIT = 4096
+
 
 def has_attrib(attrib_value):
     # used with a method to extract graph elements with a specific attribute key regardless of the value, if the key
@@ -19,11 +30,305 @@ def has_attrib(attrib_value):
     return True
 
 
+def pyomo_model(problem_graph):
+    """
+    Builds a Pyomo model of the maximum weight stable set problem
+    :param problem_graph: nx.Graph or nx.DiGraph with a `coeff` weight for each node
+    :return: pyomo.environ.ConcreteModel with a binary variable `x` for each node
+    """
+    # --------------------------------------------------------
+    # Model
+    # --------------------------------------------------------
+
+    model = pe.ConcreteModel()
+
+    # --------------------------------------------------------
+    # Sets/Params
+    # --------------------------------------------------------
+
+    # nodes and edge sets
+    # nodes: network's graph nodes that are closest to stops
+    # edges: connections between nodes if they are in the same
+    #    selection pool or there is no path between them
+    vertices = set(problem_graph.nodes)
+    edges = set(problem_graph.edges)
+
+    model.vertices = pe.Set(initialize=vertices)
+
+    def spatial_proximity_coefficient_init(model, i):
+        attribs = problem_graph.nodes[i]
+        # todo normalise
+        return attribs["coeff"]
+
+    model.c = pe.Param(model.vertices, initialize=spatial_proximity_coefficient_init)
+
+    # --------------------------------------------------------
+    # Variables
+    # --------------------------------------------------------
+
+    model.x = pe.Var(vertices, within=pe.Binary)
+
+    # --------------------------------------------------------
+    # Constraints
+    # --------------------------------------------------------
+
+    model.edge_adjacency = pe.ConstraintList()
+    for u, v in edges:
+        model.edge_adjacency.add(model.x[u] + model.x[v] <= 1)
+
+    # --------------------------------------------------------
+    # Objective
+    # --------------------------------------------------------
+
+    def total_nodes_rule(model):
+        return sum(model.c[i] * model.x[i] for i in model.vertices)
+
+    model.total_nodes = pe.Objective(rule=total_nodes_rule, sense=pe.maximize)
+    return model
+
+
+def max_weight_stable_set_milp(graph, weight="coeff", group=None):
+    """
+    Solves the maximum weight stable set problem with SciPy's mixed integer linear programming solver (HiGHS), without
+    building a model or starting a solver process
+    :param graph: nx.Graph or nx.DiGraph, edges are taken as undirected
+    :param weight: node attribute with the weight of the node
+    :param group: optional node attribute, nodes sharing a value of it need to be all connected to each other, e.g.
+        the links a stop can snap to. Each group is constrained at once instead of by its every edge
+    :return: list of selected nodes, None if HiGHS did not find a solution
+    """
+    nodes = list(graph.nodes)
+    positions = {node: i for i, node in enumerate(nodes)}
+    weights = np.array([graph.nodes[node][weight] for node in nodes], dtype=float)
+    # nodes of infinite weight need to outweigh any other selection
+    weights[np.isinf(weights)] = weights[np.isfinite(weights)].sum() + 1
+
+    rows = []
+    if group is not None:
+        groups = {}
+        for node, value in graph.nodes(data=group):
+            groups.setdefault(value, []).append(positions[node])
+        rows.extend(members for members in groups.values() if len(members) > 1)
+    pairs = set()
+    for u, v in graph.edges:
+        if u == v or (group is not None and graph.nodes[u][group] == graph.nodes[v][group]):
+            continue
+        pairs.add(tuple(sorted((positions[u], positions[v]))))
+    rows.extend(sorted(pairs))
+
+    row_idx = np.repeat(np.arange(len(rows)), [len(row) for row in rows])
+    col_idx = np.fromiter(itertools.chain.from_iterable(rows), dtype=int, count=len(row_idx))
+    constraints = sparse.csr_array(
+        (np.ones(len(row_idx)), (row_idx, col_idx)), shape=(len(rows), len(nodes))
+    )
+    result = optimize.milp(
+        c=-weights,
+        constraints=optimize.LinearConstraint(constraints, ub=1),
+        integrality=np.ones(len(nodes)),
+        bounds=optimize.Bounds(0, 1),
+    )
+    if result.x is None:
+        return None
+    return [node for node, x in zip(nodes, result.x) if round(x) == 1]
+
+
+def max_weight_stable_set_greedy(graph, weight="coeff"):
+    """
+    Finds a stable set of large weight with a greedy heuristic: repeatedly selects the node with the largest weight
+    over its number of remaining neighbours plus one and removes it and its neighbours from the graph
+    :param graph: nx.Graph or nx.DiGraph, edges are taken as undirected
+    :param weight: node attribute with the weight of the node
+    :return: list of selected nodes
+    """
+    neighbours = {node: set(nx.all_neighbors(graph, node)) - {node} for node in graph.nodes}
+    counter = itertools.count()
+    heap = [
+        (-graph.nodes[node][weight] / (len(adjacent) + 1), next(counter), node, len(adjacent))
+        for node, adjacent in neighbours.items()
+    ]
+    heapq.heapify(heap)
+    selected = []
+    while heap:
+        _, _, node, degree = heapq.heappop(heap)
+        if node not in neighbours or degree != len(neighbours[node]):
+            # removed, or its priority went up since it was queued
+            continue
+        selected.append(node)
+        removed = {node} | neighbours[node]
+        touched = set()
+        for gone in removed:
+            for other in neighbours.pop(gone):
+                if other not in removed:
+                    neighbours[other].discard(gone)
+                    touched.add(other)
+        for other in touched:
+            heapq.heappush(
+                heap,
+                (
+                    -graph.nodes[other][weight] / (len(neighbours[other]) + 1),
+                    next(counter),
+                    other,
+                    len(neighbours[other]),
+                ),
+            )
+    return selected
+
+
+def number_of_selections(graph, group="id", limit=None):
+    """
+    Counts the ways of selecting at most one node of each group of nodes
+    :param graph: nx.Graph or nx.DiGraph
+    :param group: node attribute grouping the nodes, e.g. the stop the links belong to
+    :param limit: optional, counting stops once the count is over the limit
+    :return: number of selections, or the first count over `limit`
+    """
+    sizes = {}
+    for _, value in graph.nodes(data=group):
+        sizes[value] = sizes.get(value, 0) + 1
+    count = 1
+    for size in sizes.values():
+        count *= size + 1
+        if limit is not None and count > limit:
+            break
+    return count
+
+
+def max_weight_stable_set_enumeration(graph, weight="coeff", group="id"):
+    """
+    Solves the maximum weight stable set problem by enumerating selections of at most one node of each group, skipping
+    those which cannot weigh more than the best selection found so far. Meant for small problems, see
+    `number_of_selections`
+    :param graph: nx.Graph or nx.DiGraph, edges are taken as undirected. Nodes sharing a `group` value need to be all
+        connected to each other
+    :param weight: node attribute with the weight of the node
+    :param group: node attribute grouping the nodes, e.g. the stop the links belong to
+    :return: list of selected nodes
+    """
+    neighbours = {node: set(nx.all_neighbors(graph, node)) for node in graph.nodes}
+    groups = {}
+    for node, value in graph.nodes(data=group):
+        groups.setdefault(value, []).append(node)
+    weights = dict(graph.nodes(data=weight))
+    pools = sorted(
+        (sorted(pool, key=lambda node: -weights[node]) for pool in groups.values()),
+        key=lambda pool: -weights[pool[0]],
+    )
+    # most the remaining pools could add to a selection
+    bounds = list(itertools.accumulate([weights[pool[0]] for pool in reversed(pools)]))[::-1]
+    bounds.append(0)
+
+    best_weight, best = -math.inf, []
+
+    def search(i, total, selected):
+        nonlocal best_weight, best
+        if total + bounds[i] <= best_weight:
+            return
+        if i == len(pools):
+            best_weight, best = total, list(selected)
+            return
+        for node in pools[i]:
+            if not any(other in neighbours[node] for other in selected):
+                selected.append(node)
+                search(i + 1, total + weights[node], selected)
+                selected.pop()
+        search(i + 1, total, selected)
+
+    search(0, 0, [])
+    return best
+
+
+def solve_by_components(
+    problem_graph, solver="cbc", greedy_component_size=None, processes=1, group="id"
+):
+    """
+    Solves the maximum weight stable set problem on each connected component of `problem_graph` on its own. Components
+    of one node are selected, components with few ways of selecting links for their stops (`ENUMERATION_LIMIT`) are
+    enumerated and the others are passed to `solver`, in a pool of processes if there is more than one to solve
+    :param problem_graph: nx.DiGraph with a `coeff` weight and a `group` attribute for each node
+    :param solver: 'highs', 'greedy' or the name of a solver to pass a Pyomo model to, see `MaxStableSet.solve`
+    :param greedy_component_size: components with more nodes than this are solved with the greedy heuristic.
+        Defaults to None, all components are solved exactly
+    :param processes: number of processes to solve the components which need a solver in
+    :param group: node attribute grouping the nodes, e.g. the stop the links belong to
+    :return: list of selected nodes
+    """
+    selected = []
+    to_solve = []
+    n_components = {"single": 0, "enumerated": 0, "greedy": 0}
+    for component in nx.weakly_connected_components(problem_graph):
+        component_graph = problem_graph.subgraph(component)
+        if len(component) == 1:
+            n_components["single"] += 1
+            selected.extend(component)
+        elif number_of_selections(component_graph, group, ENUMERATION_LIMIT) <= ENUMERATION_LIMIT:
+            n_components["enumerated"] += 1
+            selected.extend(max_weight_stable_set_enumeration(component_graph, group=group))
+        elif solver == "greedy" or (
+            greedy_component_size is not None and len(component) > greedy_component_size
+        ):
+            n_components["greedy"] += 1
+            selected.extend(max_weight_stable_set_greedy(component_graph))
+        else:
+            # only the data the solver needs, without the rest of the problem graph
+            graph = nx.Graph()
+            graph.add_nodes_from(
+                (node, {"coeff": data["coeff"], group: data[group]})
+                for node, data in component_graph.nodes(data=True)
+            )
+            graph.add_edges_from(component_graph.edges)
+            to_solve.append(graph)
+    logging.info(
+        f"Problem graph has {sum(n_components.values()) + len(to_solve)} connected components: "
+        f"{n_components['single']} of one node, {n_components['enumerated']} enumerated, "
+        f"{n_components['greedy']} solved greedily and {len(to_solve)} passed to the {solver} solver"
+    )
+    if processes > 1 and len(to_solve) > 1:
+        with mp.Pool(processes=min(processes, len(to_solve))) as pool:
+            solutions = pool.map(
+                partial(_solve_component, solver=solver, group=group), to_solve, chunksize=1
+            )
+    else:
+        solutions = [_solve_component(graph, solver=solver, group=group) for graph in to_solve]
+    for solution in solutions:
+        selected.extend(solution)
+    return selected
+
+
+def _solve_component(graph, solver, group="id"):
+    if solver == "highs":
+        selected = max_weight_stable_set_milp(graph, group=group)
+        if selected is None:
+            logging.warning(
+                f"HiGHS did not find a solution for a component of {graph.number_of_nodes()} problem nodes, "
+                "solving it with the greedy heuristic instead"
+            )
+            selected = max_weight_stable_set_greedy(graph)
+        return selected
+    model = pyomo_model(graph)
+    logging.info("Passing problem to solver")
+    _solver = pe.SolverFactory(solver)
+    _solver.solve(model)
+    return [
+        vertex
+        for vertex in model.vertices
+        if model.x[vertex].value is not None and round(model.x[vertex].value) == 1
+    ]
+
+
 class MaxStableSet:
-    def __init__(self, pt_graph, network_spatial_tree, modes, distance_threshold=30, step_size=10):
+    def __init__(
+        self,
+        pt_graph,
+        network_spatial_tree,
+        modes,
+        distance_threshold=30,
+        step_size=10,
+        path_length_cutoff_factor=None,
+    ):
         self.service_modes = modes
         self.distance_threshold = distance_threshold
         self.step_size = step_size
+        self.path_length_cutoff_factor = path_length_cutoff_factor
         self.network_spatial_tree = network_spatial_tree
         self.pt_graph = pt_graph
         _gdf = gngeojson.generate_geodataframes(pt_graph)
@@ -58,23 +363,15 @@ class MaxStableSet:
         self.unsolved_stops = set()
 
     def find_closest_links(self):
-        # increase distance by step size until all stops have closest links or reached threshold
-        distance = self.step_size
+        # catchments grow by step size until a stop has closest links or reach the threshold. Links within the largest
+        # catchment are found at once and each stop gets the smallest catchment with links in it
+        max_catchment = self.step_size
+        if self.step_size > 0:
+            max_catchment *= max(1, math.ceil(self.distance_threshold / self.step_size))
         nodes = self.cast_catchment(
-            df_stops=self.stops.loc[:, ["id", "geometry"]].copy(), distance=distance
+            df_stops=self.stops.loc[:, ["id", "geometry"]].copy(), distance=max_catchment
         )
-        nodes["catchment"] = distance
-        stops = set(self.stops["id"])
-        while (set(nodes.index) != stops) and (distance < self.distance_threshold):
-            distance += self.step_size
-            _df = self.cast_catchment(
-                df_stops=self.stops.loc[
-                    self.stops["id"].isin(stops - set(nodes.index)), ["id", "geometry"]
-                ].copy(),
-                distance=distance,
-            )
-            _df["catchment"] = distance
-            nodes = pd.concat([nodes, _df])
+        nodes = spatial.catchments_by_step(nodes, self.step_size)
         return nodes[~nodes["link_id"].str.match("artificial")]
 
     def cast_catchment(self, df_stops, distance):
@@ -110,8 +407,16 @@ class MaxStableSet:
             left_on="v",
             right_on="id",
         )
+        cutoff_col = None
+        if self.path_length_cutoff_factor is not None:
+            self.edges["path_length_cutoff"] = self.path_length_cutoffs()
+            cutoff_col = "path_length_cutoff"
         self.edges = self.network_spatial_tree.shortest_path_lengths(
-            df_pt_edges=self.edges, from_col="link_id_u", to_col="link_id_v", weight="length"
+            df_pt_edges=self.edges,
+            from_col="link_id_u",
+            to_col="link_id_v",
+            weight="length",
+            cutoff_col=cutoff_col,
         )
 
         # build the problem graph
@@ -151,6 +456,30 @@ class MaxStableSet:
         problem_graph.remove_nodes_from(nodes_without_paths)
         return problem_graph
 
+    def path_length_cutoffs(self):
+        """
+        Gives the longest path lengths worth looking for between the candidate links of consecutive stops. The
+        search for a path stops once the network distance from the end of the link at the first stop to the start of
+        the link at the next stop is `path_length_cutoff_factor` times longer than the furthest those two points can
+        be apart in a straight line: the crow-fly distance between the stops, the distance threshold either side and
+        the lengths of the links. Path lengths count the length of the first link, so it is added on top.
+        :return: pandas.Series of cutoffs for `self.edges`, in metres
+        """
+        stop_x = self.stops.set_index("id").geometry.x
+        stop_y = self.stops.set_index("id").geometry.y
+        crow_fly = spatial.haversine_distance(
+            self.edges["u"].map(stop_x),
+            self.edges["u"].map(stop_y),
+            self.edges["v"].map(stop_x),
+            self.edges["v"].map(stop_y),
+        )
+        link_lengths = pd.to_numeric(self.network_spatial_tree.links["length"], errors="coerce")
+        length_u = self.edges["link_id_u"].map(link_lengths)
+        length_v = self.edges["link_id_v"].map(link_lengths)
+        return length_u + self.path_length_cutoff_factor * (
+            crow_fly + 2 * self.distance_threshold + length_u + length_v
+        )
+
     def in_out_degree(self, node):
         _out = self.problem_graph.out_degree(node)
         _in = self.problem_graph.in_degree(node)
@@ -231,77 +560,30 @@ class MaxStableSet:
         ax.set_title("Stops, their catchments, the underlying network and route")
         return fig, ax
 
-    def solve(self, solver="cbc"):
+    def solve(self, solver="cbc", greedy_component_size=None, processes=1):
+        """
+        Selects a link for as many stops as possible: the maximum weight stable set of the problem graph. Each
+        connected component of the problem graph is solved on its own, see `solve_by_components`
+        :param solver: 'highs' solves components in this process with SciPy's mixed integer linear programming solver
+            (HiGHS). 'greedy' selects links with a greedy heuristic instead, which is fast on very large problems but
+            may not find the best solution. Any other solver is passed a Pyomo model of each component, e.g. 'cbc'
+            (default), 'glpk', 'gurobi'
+        :param greedy_component_size: connected components of the problem graph with more problem nodes than this are
+            solved with the greedy heuristic. Defaults to None, all components are solved exactly
+        :param processes: number of processes to solve the components which need a solver in. Defaults to 1
+        :return:
+        """
         if nx.is_empty(self.problem_graph):
             logging.info("Empty problem graph passed to the solver. No stops will find a solution.")
             self.unsolved_stops = set(self.stops["id"])
         else:
-            # --------------------------------------------------------
-            # Model
-            # --------------------------------------------------------
-
-            model = pe.ConcreteModel()
-
-            # --------------------------------------------------------
-            # Sets/Params
-            # --------------------------------------------------------
-
-            # nodes and edge sets
-            # nodes: network's graph nodes that are closest to stops
-            # edges: connections between nodes if they are in the same
-            #    selection pool or there is no path between them
-            vertices = set(self.problem_graph.nodes)
-            edges = set(self.problem_graph.edges)
-
-            model.vertices = pe.Set(initialize=vertices)
-
-            def spatial_proximity_coefficient_init(model, i):
-                attribs = self.problem_graph.nodes[i]
-                # todo normalise
-                return attribs["coeff"]
-
-            model.c = pe.Param(model.vertices, initialize=spatial_proximity_coefficient_init)
-
-            # --------------------------------------------------------
-            # Variables
-            # --------------------------------------------------------
-
-            model.x = pe.Var(vertices, within=pe.Binary)
-
-            # --------------------------------------------------------
-            # Constraints
-            # --------------------------------------------------------
-
-            model.edge_adjacency = pe.ConstraintList()
-            for u, v in edges:
-                model.edge_adjacency.add(model.x[u] + model.x[v] <= 1)
-
-            # --------------------------------------------------------
-            # Objective
-            # --------------------------------------------------------
-
-            def total_nodes_rule(model):
-                return sum(model.c[i] * model.x[i] for i in model.vertices)
-
-            model.total_nodes = pe.Objective(rule=total_nodes_rule, sense=pe.maximize)
-
-            # --------------------------------------------------------
-            # Solver
-            # --------------------------------------------------------
-
-            logging.info("Passing problem to solver")
-            _solver = pe.SolverFactory(solver)
-            _solver.solve(model)
-
-            # --------------------------------------------------------
-            # Solution parse
-            # --------------------------------------------------------
+            selected = solve_by_components(
+                self.problem_graph,
+                solver=solver,
+                greedy_component_size=greedy_component_size,
+                processes=processes,
+            )
 
-            selected = [
-                str(v).strip("x[\\']")
-                for v in model.component_data_objects(pe.Var)
-                if v.value is not None and float(v.value) == 1.0
-            ]
             # solution maps Stop IDs to Link IDs
             self.solution = {
                 self.problem_graph.nodes[node]["id"]: self.problem_graph.nodes[node]["link_id"]
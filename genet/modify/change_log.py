@@ -4,8 +4,27 @@ from typing import List, Union
 import dictdiffer
 import pandas as pd
 
+import genet.utils.dict_support as dict_support
 
-class ChangeLog(pd.DataFrame):
+COLUMNS = [
+    "timestamp",
+    "change_event",
+    "object_type",
+    "old_id",
+    "new_id",
+    "old_attributes",
+    "new_attributes",
+    "diff",
+]
+# how much is recorded about each change:
+#   full: ids and attributes of changed objects, with differences between old and new attributes
+#   ids_only: ids of changed objects
+#   off: nothing
+LEVELS = ["full", "ids_only", "off"]
+ATTRIBUTE_COLUMNS = ["old_attributes", "new_attributes"]
+
+
+class ChangeLog:
     """
     Records changes in genet.core.Network into a pandas.DataFrame
 
@@ -13,45 +32,181 @@ class ChangeLog(pd.DataFrame):
     • Add :
     • Modify :
     • Remove :
+
+    Records are appended to a buffer of chunks. The pandas.DataFrame is only built when it is accessed: through
+    `to_dataframe()` or any DataFrame attribute or indexing of the ChangeLog, e.g. `log['change_event']`,
+    `log.iloc[-1]`, and kept until more changes are recorded. Attributes of changed objects are copied when the
+    change is recorded, their string descriptions and differences are computed when the DataFrame is built.
+
+    :param df: optional, ChangeLog or pandas.DataFrame of changes recorded so far
+    :param level: how much is recorded about each change, one of:
+        'full' (default): ids and attributes of changed objects, and the differences between old and new attributes
+        'ids_only': ids of changed objects, differences list changes of ids only
+        'off': nothing is recorded
+        Defaults to the level of `df` if it is a ChangeLog.
     """
 
-    def __init__(self, df=None):
-        if df is None:
-            super().__init__(
-                columns=[
-                    "timestamp",
-                    "change_event",
-                    "object_type",
-                    "old_id",
-                    "new_id",
-                    "old_attributes",
-                    "new_attributes",
-                    "diff",
-                ]
+    def __init__(self, df=None, level: str = None):
+        # DataFrame of the log built so far, None before it is first needed
+        self._df = None
+        # chunks recorded since `_df` was built: DataFrames, lists of records or dicts of columns, with attributes
+        # not yet described
+        self._chunks = []
+        # records appended one at a time, not yet closed into a chunk
+        self._records = []
+        # number of leading chunks which, together with `_df`, need sorting by timestamp after logs were merged
+        self._unsorted_chunks = 0
+        self.level = level
+        if isinstance(df, ChangeLog):
+            if level is None:
+                self.level = df.level
+            df._close_records()
+            self._df = df._df
+            self._chunks = list(df._chunks)
+            self._unsorted_chunks = df._unsorted_chunks
+        elif df is not None:
+            self._df = pd.DataFrame(df)
+        if self.level is None:
+            self.level = "full"
+        if self.level not in LEVELS:
+            raise NotImplementedError(
+                f"Only {LEVELS} options for change log `level`, not `{self.level}`."
             )
-        else:
-            super().__init__(df)
 
-    def _next_index(self):
-        idx = self.index.max() + 1
-        if str(idx) == "nan":
-            idx = 0
-        return idx
+    def __getattr__(self, item):
+        # `_` attributes are looked up on unpickling and copying, before the instance has any
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return getattr(self.to_dataframe(), item)
 
-    def add(self, object_type: str, object_id: Union[int, str], object_attributes: dict):
-        self.loc[self._next_index()] = pd.Series(
+    def __getitem__(self, item):
+        return self.to_dataframe()[item]
+
+    def __len__(self):
+        return (
+            (0 if self._df is None else len(self._df))
+            + sum(_chunk_length(chunk) for chunk in self._chunks)
+            + len(self._records)
+        )
+
+    def __iter__(self):
+        return iter(COLUMNS if self._df is None else self._df.columns)
+
+    def __repr__(self):
+        return repr(self.to_dataframe())
+
+    def to_dataframe(self):
+        """
+        Builds, or returns the already built, pandas.DataFrame of the log.
+        :return: pandas.DataFrame
+        """
+        self._close_records()
+        if self._df is None or self._chunks:
+            frames = [] if self._df is None else [self._df]
+            frames += [self._describe(chunk) for chunk in self._chunks]
+            if self._unsorted_chunks:
+                n_sorted = len(frames) - len(self._chunks) + self._unsorted_chunks
+                frames = [
+                    _concat(frames[:n_sorted])
+                    .sort_values(by="timestamp", kind="stable")
+                    .reset_index(drop=True)
+                ] + frames[n_sorted:]
+            self._df = _concat(frames)
+            self._chunks = []
+            self._unsorted_chunks = 0
+        return self._df
+
+    def _close_records(self):
+        if self._records:
+            self._chunks.append(self._records)
+            self._records = []
+
+    def _append_chunk(self, chunk):
+        log = self.__class__(df=self)
+        log._chunks.append(chunk)
+        return log
+
+    def _attributes(self, attributes):
+        # attributes are described when the log is built, the copy keeps them as they were at the time of the change
+        if self.level == "full" and attributes is not None:
+            return dict_support.copy_attributes(attributes)
+        return None
+
+    def _record(self, change_event, object_type, old_id, new_id, old_attributes, new_attributes):
+        return (
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            change_event,
+            object_type,
+            old_id,
+            new_id,
+            self._attributes(old_attributes),
+            self._attributes(new_attributes),
+        )
+
+    def _bunch(self, change_event, object_type, old_ids, new_ids, old_attributes, new_attributes):
+        n = len(old_ids) if old_ids is not None else len(new_ids)
+        return self._append_chunk(
             {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "change_event": "add",
-                "object_type": object_type,
-                "old_id": None,
-                "new_id": object_id,
-                "old_attributes": None,
-                "new_attributes": str(object_attributes),
-                "diff": self.generate_diff(None, object_id, None, object_attributes),
+                "timestamp": [datetime.now().strftime("%Y-%m-%d %H:%M:%S")] * n,
+                "change_event": [change_event] * n,
+                "object_type": [object_type] * n,
+                "old_id": old_ids if old_ids is not None else [None] * n,
+                "new_id": new_ids if new_ids is not None else [None] * n,
+                "old_attributes": [self._attributes(d) for d in old_attributes]
+                if old_attributes is not None
+                else [None] * n,
+                "new_attributes": [self._attributes(d) for d in new_attributes]
+                if new_attributes is not None
+                else [None] * n,
             }
         )
 
+    def _describe(self, chunk):
+        """
+        Builds the DataFrame of a chunk of changes: attributes are described as strings and their differences are
+        computed only now, rather than when the changes are recorded.
+        :param chunk: DataFrame, list of records or dict of columns
+        :return: pandas.DataFrame
+        """
+        if isinstance(chunk, pd.DataFrame):
+            return chunk
+        if isinstance(chunk, dict):
+            return pd.DataFrame(
+                {
+                    **{k: v for k, v in chunk.items() if k not in ATTRIBUTE_COLUMNS},
+                    **{k: [_describe_attributes(d) for d in chunk[k]] for k in ATTRIBUTE_COLUMNS},
+                    "diff": [
+                        self.generate_diff(*record)
+                        for record in zip(
+                            chunk["old_id"],
+                            chunk["new_id"],
+                            chunk["old_attributes"],
+                            chunk["new_attributes"],
+                        )
+                    ],
+                },
+                columns=COLUMNS,
+            )
+        # single records of different events are mixed, keep ids as they are rather than infer a common type
+        return pd.DataFrame.from_records(
+            [
+                record[:5]
+                + (
+                    _describe_attributes(record[5]),
+                    _describe_attributes(record[6]),
+                    self.generate_diff(*record[3:]),
+                )
+                for record in chunk
+            ],
+            columns=COLUMNS,
+        ).astype(object)
+
+    def add(self, object_type: str, object_id: Union[int, str], object_attributes: dict):
+        if self.level != "off":
+            self._records.append(
+                self._record("add", object_type, None, object_id, None, object_attributes)
+            )
+
     def add_bunch(
         self, object_type: str, id_bunch: List[Union[int, str]], attributes_bunch: List[dict]
     ):
@@ -61,30 +216,9 @@ class ChangeLog(pd.DataFrame):
         :param attributes_bunch: same len as id_bunch
         :return:
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return self.__class__(
-            pd.concat(
-                [
-                    self,
-                    pd.DataFrame(
-                        {
-                            "timestamp": [timestamp] * len(id_bunch),
-                            "change_event": ["add"] * len(id_bunch),
-                            "object_type": [object_type] * len(id_bunch),
-                            "old_id": None,
-                            "new_id": id_bunch,
-                            "old_attributes": None,
-                            "new_attributes": [str(d) for d in attributes_bunch],
-                            "diff": [
-                                self.generate_diff(None, _id, None, attrib)
-                                for _id, attrib in zip(id_bunch, attributes_bunch)
-                            ],
-                        }
-                    ),
-                ],
-                ignore_index=True,
-            )
-        )
+        if self.level == "off":
+            return self
+        return self._bunch("add", object_type, None, id_bunch, None, attributes_bunch)
 
     def modify(
         self,
@@ -94,18 +228,10 @@ class ChangeLog(pd.DataFrame):
         new_id: Union[int, str],
         new_attributes: dict,
     ):
-        self.loc[self._next_index()] = pd.Series(
-            {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "change_event": "modify",
-                "object_type": object_type,
-                "old_id": old_id,
-                "new_id": new_id,
-                "old_attributes": str(old_attributes),
-                "new_attributes": str(new_attributes),
-                "diff": self.generate_diff(old_id, new_id, old_attributes, new_attributes),
-            }
-        )
+        if self.level != "off":
+            self._records.append(
+                self._record("modify", object_type, old_id, new_id, old_attributes, new_attributes)
+            )
 
     def modify_bunch(
         self,
@@ -123,31 +249,10 @@ class ChangeLog(pd.DataFrame):
         :param new_attributes: same len as id_bunch
         :return:
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return self.__class__(
-            pd.concat(
-                [
-                    self,
-                    pd.DataFrame(
-                        {
-                            "timestamp": [timestamp] * len(old_id_bunch),
-                            "change_event": ["modify"] * len(old_id_bunch),
-                            "object_type": [object_type] * len(old_id_bunch),
-                            "old_id": old_id_bunch,
-                            "new_id": new_id_bunch,
-                            "old_attributes": [str(d) for d in old_attributes],
-                            "new_attributes": [str(d) for d in new_attributes],
-                            "diff": [
-                                self.generate_diff(old_id, new_id, old_attrib, new_attrib)
-                                for old_id, new_id, old_attrib, new_attrib in zip(
-                                    old_id_bunch, new_id_bunch, old_attributes, new_attributes
-                                )
-                            ],
-                        }
-                    ),
-                ],
-                ignore_index=True,
-            )
+        if self.level == "off":
+            return self
+        return self._bunch(
+            "modify", object_type, old_id_bunch, new_id_bunch, old_attributes, new_attributes
         )
 
     def simplify_bunch(
@@ -162,47 +267,39 @@ class ChangeLog(pd.DataFrame):
         path_diff = [B, C], list of those for all links
         :return:
         """
+        if self.level == "off":
+            return self
+        full = self.level == "full"
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return self.__class__(
-            pd.concat(
-                [
-                    self,
-                    pd.DataFrame(
-                        {
-                            "timestamp": [timestamp] * len(new_id_bunch),
-                            "change_event": ["simplify"] * len(new_id_bunch),
-                            "object_type": ["links"] * len(new_id_bunch),
-                            "old_id": old_ids_list_bunch,
-                            "new_id": new_id_bunch,
-                            "old_attributes": [
-                                str(indexed_paths_to_simplify[_id]["link_data"])
-                                for _id in new_id_bunch
-                            ],
-                            "new_attributes": [str(links_to_add[_id]) for _id in new_id_bunch],
-                            "diff": [
-                                str(indexed_paths_to_simplify[_id]["nodes_to_remove"])
-                                for _id in new_id_bunch
-                            ],
-                        }
-                    ),
-                ],
-                ignore_index=True,
+        return self._append_chunk(
+            pd.DataFrame(
+                {
+                    "timestamp": [timestamp] * len(new_id_bunch),
+                    "change_event": ["simplify"] * len(new_id_bunch),
+                    "object_type": ["links"] * len(new_id_bunch),
+                    "old_id": old_ids_list_bunch,
+                    "new_id": new_id_bunch,
+                    "old_attributes": [
+                        str(indexed_paths_to_simplify[_id]["link_data"]) if full else None
+                        for _id in new_id_bunch
+                    ],
+                    "new_attributes": [
+                        str(links_to_add[_id]) if full else None for _id in new_id_bunch
+                    ],
+                    "diff": [
+                        str(indexed_paths_to_simplify[_id]["nodes_to_remove"]) if full else None
+                        for _id in new_id_bunch
+                    ],
+                },
+                columns=COLUMNS,
             )
         )
 
     def remove(self, object_type: str, object_id: Union[int, str], object_attributes: dict):
-        self.loc[self._next_index()] = pd.Series(
-            {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "change_event": "remove",
-                "object_type": object_type,
-                "old_id": object_id,
-                "new_id": None,
-                "old_attributes": str(object_attributes),
-                "new_attributes": None,
-                "diff": self.generate_diff(object_id, None, object_attributes, None),
-            }
-        )
+        if self.level != "off":
+            self._records.append(
+                self._record("remove", object_type, object_id, None, object_attributes, None)
+            )
 
     def remove_bunch(
         self, object_type: str, id_bunch: List[Union[int, str]], attributes_bunch: List[dict]
@@ -213,30 +310,9 @@ class ChangeLog(pd.DataFrame):
         :param attributes_bunch: same len as id_bunch
         :return:
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return self.__class__(
-            pd.concat(
-                [
-                    self,
-                    pd.DataFrame(
-                        {
-                            "timestamp": [timestamp] * len(id_bunch),
-                            "change_event": ["remove"] * len(id_bunch),
-                            "object_type": [object_type] * len(id_bunch),
-                            "old_id": id_bunch,
-                            "new_id": None,
-                            "old_attributes": [str(d) for d in attributes_bunch],
-                            "new_attributes": None,
-                            "diff": [
-                                self.generate_diff(_id, None, attrib, None)
-                                for _id, attrib in zip(id_bunch, attributes_bunch)
-                            ],
-                        }
-                    ),
-                ],
-                ignore_index=True,
-            )
-        )
+        if self.level == "off":
+            return self
+        return self._bunch("remove", object_type, id_bunch, None, attributes_bunch, None)
 
     def generate_diff(self, old_id, new_id, old_attributes_dict, new_attributes_dict):
         if old_attributes_dict is None:
@@ -255,9 +331,57 @@ class ChangeLog(pd.DataFrame):
         return diff
 
     def merge_logs(self, other):
-        return self.__class__(
-            pd.concat([self, other]).sort_values(by="timestamp").reset_index(drop=True)
-        )
+        """
+        Merges change logs, records of both are ordered by their timestamps. Neither log is built as a
+        pandas.DataFrame in the process.
+        :param other: ChangeLog
+        :return: merged ChangeLog
+        """
+        log = self.__class__(df=self)
+        other = other if isinstance(other, ChangeLog) else self.__class__(df=other)
+        other._close_records()
+        if other._df is not None:
+            log._chunks.append(other._df)
+        log._chunks += other._chunks
+        log._unsorted_chunks = len(log._chunks)
+        return log
 
     def export(self, path):
-        self.to_csv(path)
+        """
+        Writes the log to a CSV file. Unless the log still needs sorting after merging, chunks of records are written
+        one after the other, without building the whole pandas.DataFrame.
+        :param path: path to the CSV file
+        :return: None
+        """
+        self._close_records()
+        if self._unsorted_chunks:
+            self.to_dataframe()
+        if not self._chunks:
+            self.to_dataframe().to_csv(path)
+            return
+        chunks = ([] if self._df is None else [self._df]) + self._chunks
+        start = 0
+        for i, chunk in enumerate(chunks):
+            df = self._describe(chunk)
+            df.index = pd.RangeIndex(start, start + len(df))
+            df.to_csv(path, mode="w" if i == 0 else "a", header=i == 0)
+            start += len(df)
+
+
+def _chunk_length(chunk):
+    if isinstance(chunk, dict):
+        return len(chunk["timestamp"])
+    return len(chunk)
+
+
+def _describe_attributes(attributes):
+    return None if attributes is None else str(attributes)
+
+
+def _concat(frames):
+    non_empty = [df for df in frames if not df.empty]
+    if not non_empty:
+        return frames[0] if frames else pd.DataFrame(columns=COLUMNS)
+    if len(non_empty) == 1 and non_empty[0] is frames[0]:
+        return frames[0]
+    return pd.concat(non_empty, ignore_index=True)
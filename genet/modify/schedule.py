@@ -1,5 +1,9 @@
 import logging
+import multiprocessing as mp
+import traceback
+from functools import partial
 
+import networkx as nx
 from pandas import DataFrame
 from pyproj import Transformer
 
@@ -36,6 +40,8 @@ def route_pt_graph(
     allow_partial=False,
     distance_threshold=30,
     step_size=10,
+    path_length_cutoff_factor=None,
+    solve_processes=1,
 ):
     logging.info(
         f"Building Maximum Stable Set for PT graph with {pt_graph.number_of_nodes()} stops and "
@@ -47,6 +53,7 @@ def route_pt_graph(
         modes=modes,
         distance_threshold=distance_threshold,
         step_size=step_size,
+        path_length_cutoff_factor=path_length_cutoff_factor,
     )
     if mss.is_partial:
         if allow_partial:
@@ -61,7 +68,7 @@ def route_pt_graph(
                 "solutions set `allow_partial=True`"
             )
     logging.info("Passing problem to solver")
-    mss.solve(solver=solver)
+    mss.solve(solver=solver, processes=solve_processes)
     mss.route_edges()
     if allow_partial and mss.is_partial:
         logging.info(
@@ -71,3 +78,84 @@ def route_pt_graph(
     if mss.unsolved_stops:
         mss.fill_in_solution_artificially()
     return mss
+
+
+def pt_graph_problem(service_graph, edges, route_ids):
+    """
+    Gives the part of a Service graph to route, independent of the graph of the Schedule it came from, so that it can
+    be sent to another process.
+    :param service_graph: graph of the Service (or Schedule) the routes belong to
+    :param edges: edges of the graph to route
+    :param route_ids: ids of the routes being routed
+    :return: nx.DiGraph with the `crs` of the Service and the maps between its routes and services
+    """
+    pt_graph = nx.edge_subgraph(service_graph, edges).copy()
+    route_to_service_map = service_graph.graph["route_to_service_map"]
+    service_ids = {route_to_service_map[route_id] for route_id in route_ids}
+    service_to_route_map = {
+        service_id: service_graph.graph["service_to_route_map"][service_id]
+        for service_id in service_ids
+    }
+    pt_graph.graph = {
+        "crs": service_graph.graph["crs"],
+        "route_to_service_map": {
+            route_id: service_id
+            for service_id, route_ids in service_to_route_map.items()
+            for route_id in route_ids
+        },
+        "service_to_route_map": service_to_route_map,
+    }
+    return pt_graph
+
+
+def route_pt_graphs(problems, network_spatial_tree, modes, processes=1, **kwargs):
+    """
+    Routes PT graphs with `route_pt_graph` and gives the ChangeSets of the solved problems. With more than one process,
+    the problems are solved in a pool of processes, each of which gets `network_spatial_tree` once. A single problem
+    solves the components of its problem graph in those processes instead.
+    :param problems: list of (pt_graph, df_route_data) tuples, with `pt_graph` from `pt_graph_problem` and
+        `df_route_data` the data of the routes in `pt_graph` to update
+    :param network_spatial_tree: genet.utils.spatial.SpatialTree for the modes of all problems
+    :param modes: modes of the problems
+    :param processes: number of processes to solve the problems in
+    :param kwargs: other arguments of `route_pt_graph`
+    :return: list of (ChangeSet, None) or (None, traceback string) tuples, in the order of `problems`
+    """
+    if processes == 1 or len(problems) < 2:
+        return [
+            _route_pt_graph_problem(
+                problem, network_spatial_tree, modes, solve_processes=processes, **kwargs
+            )
+            for problem in problems
+        ]
+    with mp.Pool(
+        processes=min(processes, len(problems)),
+        initializer=_set_routing_spatial_tree,
+        initargs=(network_spatial_tree,),
+    ) as pool:
+        return pool.map(
+            partial(_route_pt_graph_problem_in_worker, modes=modes, **kwargs), problems, chunksize=1
+        )
+
+
+_routing_spatial_tree = None
+
+
+def _set_routing_spatial_tree(network_spatial_tree):
+    global _routing_spatial_tree
+    _routing_spatial_tree = network_spatial_tree
+
+
+def _route_pt_graph_problem_in_worker(problem, modes, **kwargs):
+    return _route_pt_graph_problem(problem, _routing_spatial_tree, modes, **kwargs)
+
+
+def _route_pt_graph_problem(problem, network_spatial_tree, modes, **kwargs):
+    pt_graph, df_route_data = problem
+    try:
+        mss = route_pt_graph(
+            pt_graph=pt_graph, network_spatial_tree=network_spatial_tree, modes=modes, **kwargs
+        )
+        return mss.to_changeset(df_route_data), None
+    except Exception:
+        return None, traceback.format_exc()
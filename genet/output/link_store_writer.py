@@ -0,0 +1,232 @@
+import json
+import logging
+import os
+import pickle
+import shutil
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+import genet.utils.persistence as persistence
+from genet.output.snapshot_writer import _offsets
+from genet.variables import LINK_STORE_FORMAT_VERSION
+
+# modes are stored as bits of an unsigned 64 bit integer
+MAX_BITMASK_MODES = 64
+NODE_COLUMNS = {
+    "id": "id",
+    "x": "float",
+    "y": "float",
+    "lon": "float",
+    "lat": "float",
+    "s2_id": "int",
+}
+LINK_COLUMNS = {
+    "id": "id",
+    "from": "node",
+    "to": "node",
+    "length": "float",
+    "freespeed": "float",
+    "capacity": "float",
+    "permlanes": "float",
+    "modes": "modes",
+    "geometry": "geometry",
+    "s2_from": "int",
+    "s2_to": "int",
+}
+
+
+def write_link_store(network, path):
+    """
+    Writes nodes and links of the Network graph to a directory of numpy arrays which can be memory-mapped when read
+    with `genet.read_link_store`. Common attributes of nodes and links are stored column-wise, in fixed width arrays:
+    coordinates, lengths, speeds, capacities and lanes as floats, spatial ids as unsigned integers, modes as a
+    bitmask and geometry as WKB bytes with offsets. Any other attributes, or values which do not fit those arrays,
+    are pickled per node and link.
+    The Schedule and change log of the Network are not stored.
+    :param network: genet.Network
+    :param path: directory to write the link store to
+    :return: path to the link store directory
+    """
+    path = str(path)
+    logging.info(f"Saving Network link store to {path}")
+    for table in ["nodes", "links"]:
+        # columns are optional, arrays left over from a link store written to the same directory before would be
+        # read as part of this one
+        if os.path.exists(os.path.join(path, table)):
+            shutil.rmtree(os.path.join(path, table))
+        persistence.ensure_dir(os.path.join(path, table))
+
+    node_ids = list(network.graph.nodes)
+    node_rows = {node_id: i for i, node_id in enumerate(node_ids)}
+    nodes = write_table(
+        os.path.join(path, "nodes"),
+        node_ids,
+        [dict(data) for _, data in network.graph.nodes(data=True)],
+        NODE_COLUMNS,
+    )
+
+    # links are stored in the order of link_id_mapping, the order they are iterated over in the Network
+    link_ids = list(network.link_id_mapping)
+    edges = [
+        (mapping["from"], mapping["to"], mapping["multi_edge_idx"])
+        for mapping in network.link_id_mapping.values()
+    ]
+    link_records = [dict(network.graph[u][v][key]) for u, v, key in edges]
+    np.save(
+        os.path.join(path, "links", "multi_edge_idx.npy"),
+        np.array([key for _, _, key in edges], dtype=np.int64),
+    )
+    modes = sorted(
+        set().union(*[record["modes"] for record in link_records if _is_modes(record.get("modes"))])
+    )
+    if len(modes) > MAX_BITMASK_MODES:
+        logging.warning(
+            f"The Network has {len(modes)} modes, more than {MAX_BITMASK_MODES} which fit a bitmask. "
+            "Modes will be stored with other attributes instead."
+        )
+        modes = []
+    links = write_table(
+        os.path.join(path, "links"),
+        link_ids,
+        link_records,
+        {k: v for k, v in LINK_COLUMNS.items() if k != "modes" or modes},
+        node_rows=node_rows,
+        node_ends={"from": [u for u, _, _ in edges], "to": [v for _, v, _ in edges]},
+        modes={mode: i for i, mode in enumerate(modes)},
+    )
+
+    with open(os.path.join(path, "attributes.pickle"), "wb") as f:
+        pickle.dump(
+            {"graph": network.graph.graph, "network": network.attributes},
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    with open(os.path.join(path, "metadata.json"), "w") as f:
+        json.dump(
+            {
+                "version": LINK_STORE_FORMAT_VERSION,
+                "epsg": network.epsg,
+                "modes": modes,
+                "nodes": nodes,
+                "links": links,
+            },
+            f,
+        )
+    return path
+
+
+def write_table(
+    path, ids: list, records: list, columns: dict, node_rows=None, node_ends=None, modes=None
+):
+    """
+    Writes records column-wise to .npy files in `path`. Values stored in a column are removed from the records.
+    What is left of the records is pickled, per record, into a single bytes array with offsets.
+    :param path: directory to write to
+    :param ids: list of unique ids of the records, all strings or all integers
+    :param records: list of dicts, same length as `ids`, values that end up in columns are popped
+    :param columns: {key: column type}, one of 'id', 'float', 'int', 'node', 'modes' or 'geometry'. Values of 'id'
+        and 'node' columns are not stored, they are known from `ids` and `node_ends`
+    :param node_rows: for 'node' columns, map from node id to its row in the nodes table
+    :param node_ends: for 'node' columns, {key: list of node ids the values are expected to be equal to}
+    :param modes: for 'modes' columns, map from mode to its bit in the bitmask
+    :return: {'columns': {key: column type} of columns which were written, 'extras_keys': keys of the pickled
+        attributes}
+    """
+    _write_ids(path, ids)
+    written = {}
+    for key, column_type in columns.items():
+        if column_type in {"id", "node"}:
+            expected = ids if column_type == "id" else node_ends[key]
+            present = [
+                key in record and record[key] == value for record, value in zip(records, expected)
+            ]
+        else:
+            accepts = _ACCEPTS[column_type]
+            present = [key in record and accepts(record[key]) for record in records]
+        if not any(present) and column_type != "node":
+            continue
+        values = _pop_present(records, key, present)
+
+        if column_type == "node":
+            # the graph needs the from and to nodes of all links, whether or not they also have the attributes
+            np.save(
+                os.path.join(path, f"{key}.npy"),
+                np.array([node_rows[node_id] for node_id in expected], dtype=np.int64),
+            )
+        elif column_type == "geometry":
+            wkb, offsets = _geometry_column(values, present)
+            np.save(os.path.join(path, f"{key}.npy"), wkb)
+            np.save(os.path.join(path, f"{key}.offsets.npy"), offsets)
+        elif column_type != "id":
+            np.save(os.path.join(path, f"{key}.npy"), _column(values, present, column_type, modes))
+        if not all(present):
+            np.save(os.path.join(path, f"{key}.present.npy"), np.array(present, dtype=bool))
+        written[key] = column_type
+
+    extras = [
+        pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL) if record else b""
+        for record in records
+    ]
+    np.save(os.path.join(path, "extras.npy"), np.frombuffer(b"".join(extras), dtype=np.uint8))
+    np.save(os.path.join(path, "extras.offsets.npy"), _offsets([len(b) for b in extras]))
+    return {
+        "columns": written,
+        "extras_keys": list(dict.fromkeys(k for record in records for k in record)),
+    }
+
+
+def _write_ids(path, ids):
+    if all(isinstance(_id, str) for _id in ids):
+        ids = np.array(ids, dtype=str)
+    elif all(isinstance(_id, int) and not isinstance(_id, bool) for _id in ids):
+        ids = np.array(ids, dtype=np.int64)
+    else:
+        raise NotImplementedError(
+            "Only networks where ids of nodes, or of links, are all strings or all integers can be written to a "
+            "link store"
+        )
+    order = np.argsort(ids, kind="stable")
+    np.save(os.path.join(path, "ids.npy"), ids)
+    # sorted copy of the ids, for binary search lookups of rows without a dictionary over all ids
+    np.save(os.path.join(path, "ids.sorted.npy"), ids[order])
+    np.save(os.path.join(path, "ids.order.npy"), order.astype(np.int64))
+
+
+def _pop_present(records, key, present):
+    return [record.pop(key) for record, is_present in zip(records, present) if is_present]
+
+
+def _geometry_column(values, present):
+    wkb = [b""] * len(present)
+    for i, value in zip(np.flatnonzero(present).tolist(), shapely.to_wkb(values).tolist()):
+        wkb[i] = value
+    return np.frombuffer(b"".join(wkb), dtype=np.uint8), _offsets([len(b) for b in wkb])
+
+
+def _column(values, present, column_type, modes):
+    if column_type == "float":
+        column = np.full(len(present), np.nan, dtype=np.float64)
+    else:
+        column = np.zeros(len(present), dtype=np.uint64)
+    if column_type == "modes":
+        values = [sum(1 << modes[mode] for mode in value) for value in values]
+    column[np.array(present, dtype=bool)] = np.array(values, dtype=column.dtype)
+    return column
+
+
+def _is_modes(value):
+    return isinstance(value, set) and all(isinstance(mode, str) for mode in value)
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 2**64
+
+
+_ACCEPTS = {
+    "float": lambda value: isinstance(value, float),
+    "int": _is_int,
+    "modes": _is_modes,
+    "geometry": lambda value: isinstance(value, BaseGeometry),
+}
@@ -0,0 +1,222 @@
+import itertools
+import json
+import logging
+import os
+import pickle
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+import genet.utils.persistence as persistence
+from genet.variables import SNAPSHOT_FORMAT_VERSION
+
+# python types which are stored as native numpy columns, `.tolist()` gives back the same python types
+NATIVE_COLUMN_TYPES = (str, bool, int, float)
+# attributes of Network and Schedule objects that are stored in their own columnar tables, or not pickled with the
+# other attributes: spatial trees are only saved on request
+NETWORK_TABLE_ATTRIBUTES = {
+    "_graph",
+    "_link_id_mapping",
+    "link_store",
+    "schedule",
+    "change_log",
+    "transformer",
+    "_spatial_trees",
+}
+SCHEDULE_TABLE_ATTRIBUTES = {"_graph", "transformer"}
+SCHEDULE_GRAPH_TABLE_KEYS = {"routes", "services", "change_log"}
+
+
+def write_snapshot(network, path, compress: bool = False, spatial_tree: bool = False):
+    """
+    Writes Network, with its Schedule, change logs and auxiliary files, to a single binary snapshot file: a bundle
+    of numpy arrays (.npz). Node, link, stop, route and service data is stored column-wise. Attributes that do not fit
+    in a column of a single type are pickled alongside. Read it back with `genet.read_snapshot`.
+    :param network: genet.Network
+    :param path: path to the snapshot file, `.npz` suffix is added if missing
+    :param compress: defaults to False, compresses the snapshot when True, at the cost of slower reading and writing
+    :param spatial_tree: defaults to False, saves the links of the spatial tree of the network (`Network.spatial_tree`,
+        built first if needed) with the snapshot when True, so that a network read back from it snaps PT without
+        building the tree again
+    :return: path to the snapshot file
+    """
+    path = str(path)
+    if not path.endswith(".npz"):
+        path += ".npz"
+    if os.path.dirname(path):
+        persistence.ensure_dir(os.path.dirname(path))
+    logging.info(f"Saving Network snapshot to {path}")
+
+    arrays = {}
+    node_ids = list(network.graph.nodes)
+    node_positions = {node_id: i for i, node_id in enumerate(node_ids)}
+    encode_table(arrays, "nodes", node_ids, [data for _, data in network.graph.nodes(data=True)])
+
+    edges = list(network.graph.edges(keys=True, data=True))
+    arrays["links/u"] = np.array([node_positions[u] for u, _, _, _ in edges], dtype=np.int64)
+    arrays["links/v"] = np.array([node_positions[v] for _, v, _, _ in edges], dtype=np.int64)
+    encode_table(
+        arrays, "links", [key for _, _, key, _ in edges], [data for _, _, _, data in edges]
+    )
+    encode_table(
+        arrays,
+        "link_id_mapping",
+        list(network.link_id_mapping),
+        list(network.link_id_mapping.values()),
+    )
+    encode_change_log(arrays, "change_log", network.change_log)
+
+    schedule_graph = network.schedule._graph
+    stop_ids = list(schedule_graph.nodes)
+    stop_positions = {stop_id: i for i, stop_id in enumerate(stop_ids)}
+    encode_table(arrays, "stops", stop_ids, [data for _, data in schedule_graph.nodes(data=True)])
+    schedule_edges = list(schedule_graph.edges(data=True))
+    arrays["stop_edges/u"] = np.array(
+        [stop_positions[u] for u, _, _ in schedule_edges], dtype=np.int64
+    )
+    arrays["stop_edges/v"] = np.array(
+        [stop_positions[v] for _, v, _ in schedule_edges], dtype=np.int64
+    )
+    encode_table(
+        arrays,
+        "stop_edges",
+        list(range(len(schedule_edges))),
+        [data for _, _, data in schedule_edges],
+    )
+    for key in ["routes", "services"]:
+        encode_table(
+            arrays, key, list(schedule_graph.graph[key]), list(schedule_graph.graph[key].values())
+        )
+    encode_change_log(arrays, "schedule_change_log", schedule_graph.graph["change_log"])
+
+    arrays["objects"] = encode_pickle(
+        {
+            "network": {
+                k: v for k, v in network.__dict__.items() if k not in NETWORK_TABLE_ATTRIBUTES
+            },
+            "network_graph": network.graph.graph,
+            "schedule": {
+                k: v
+                for k, v in network.schedule.__dict__.items()
+                if k not in SCHEDULE_TABLE_ATTRIBUTES
+            },
+            "schedule_graph": {
+                k: v for k, v in schedule_graph.graph.items() if k not in SCHEDULE_GRAPH_TABLE_KEYS
+            },
+        }
+    )
+    if spatial_tree:
+        arrays["spatial_tree/links"] = encode_pickle(network.spatial_tree().links)
+    arrays["metadata"] = np.array(
+        json.dumps({"version": SNAPSHOT_FORMAT_VERSION, "epsg": network.epsg})
+    )
+
+    if compress:
+        np.savez_compressed(path, **arrays)
+    else:
+        np.savez(path, **arrays)
+    return path
+
+
+def encode_pickle(obj):
+    return np.frombuffer(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+
+
+def encode_change_log(arrays: dict, name: str, df):
+    arrays[f"{name}/columns"] = np.array(list(df.columns), dtype=str)
+    arrays[f"{name}/level"] = np.array(df.level, dtype=str)
+    encode_table(arrays, name, list(df.index), df.to_dict(orient="records"))
+
+
+def encode_table(arrays: dict, name: str, index: list, records: list):
+    """
+    Encodes a table of records (dictionaries) column-wise into `arrays`, under keys prefixed with `name`.
+    A key of the records is stored in a column if all of its values share a type:
+        - str, bool, int or float: a numpy array of that type
+        - set of strings: codes referencing unique sets, stored as a flattened numpy array of strings with offsets
+        - shapely geometry: WKB bytes buffer with offsets
+    Records missing the key are recorded with a mask. All other data is pickled.
+    :param arrays: dictionary of numpy arrays to save
+    :param name: name of the table
+    :param index: list of ids of the records
+    :param records: list of dicts, same length as `index`
+    :return: None, arrays are added to `arrays`
+    """
+    _encode_index(arrays, name, index)
+    keys = list(dict.fromkeys(k for record in records for k in record))
+    columns = []
+    remainder = [{} for _ in records]
+    for key in keys:
+        present = [key in record for record in records]
+        values = [record[key] for record in records if key in record]
+        column_type = _column_type(values)
+        if column_type is None:
+            for i, record in enumerate(records):
+                if key in record:
+                    remainder[i][key] = record[key]
+            continue
+        prefix = f"{name}/{column_type}/{key}"
+        if not all(present):
+            arrays[f"{prefix}/mask"] = np.array(present, dtype=bool)
+        if column_type == "native":
+            arrays[prefix] = _native_array(values)
+        elif column_type == "set":
+            # sets, like modes, repeat a lot, they are stored once and referenced by a code
+            codes = {}
+            arrays[f"{prefix}/codes"] = np.array(
+                [codes.setdefault(frozenset(value), len(codes)) for value in values], dtype=np.int64
+            )
+            unique_sets = [sorted(value) for value in codes]
+            arrays[prefix] = np.array([item for value in unique_sets for item in value], dtype=str)
+            arrays[f"{prefix}/offsets"] = _offsets([len(value) for value in unique_sets])
+        elif column_type == "geometry":
+            wkb = shapely.to_wkb(np.array(values, dtype=object))
+            arrays[prefix] = np.frombuffer(b"".join(wkb), dtype=np.uint8)
+            arrays[f"{prefix}/offsets"] = _offsets([len(b) for b in wkb])
+        columns.append([key, column_type])
+    arrays[f"{name}/keys"] = np.array(json.dumps(columns))
+    if any(remainder):
+        arrays[f"{name}/remainder"] = encode_pickle(remainder)
+
+
+def _encode_index(arrays, name, index):
+    if _column_type(index) == "native":
+        arrays[f"{name}/index"] = _native_array(index)
+    else:
+        arrays[f"{name}/index_pickle"] = encode_pickle(index)
+
+
+def _column_type(values: list):
+    if not values:
+        return None
+    types = set(map(type, values))
+    if len(types) == 1 and types <= set(NATIVE_COLUMN_TYPES):
+        if _native_array(values) is not None:
+            return "native"
+        return None
+    if types == {set}:
+        if set(map(type, itertools.chain.from_iterable(values))) <= {str}:
+            return "set"
+        return None
+    if all(isinstance(value, BaseGeometry) for value in values):
+        return "geometry"
+    return None
+
+
+def _native_array(values):
+    if not isinstance(values[0], int) or isinstance(values[0], bool):
+        return np.array(values)
+    # spatial ids can exceed the range of signed 64 bit integers
+    for dtype in [np.int64, np.uint64]:
+        try:
+            return np.array(values, dtype=dtype)
+        except OverflowError:
+            pass
+    return None
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
@@ -55,6 +55,10 @@ class ScheduleElement:
     Base class for Route, Service and Schedule
     """
 
+    # Route and Service objects given out by an element are cached in the `_views` slot, which stays out of
+    # `__dict__` so that it is not mistaken for an attribute of the element or saved with it
+    __slots__ = ("__dict__", "_views")
+
     def __init__(self):
         # check if in graph first
         if "crs" in self._graph.graph:
@@ -67,17 +71,56 @@ class ScheduleElement:
         d = deepcopy(self.__dict__)
         return d
 
-    def _get_service_from_graph(self, service_id):
-        if service_id in self._graph.graph["services"]:
-            return Service(_graph=self._graph, **self._graph.graph["services"][service_id])
+    def __getstate__(self):
+        return self.__dict__
+
+    def _element_views(self):
+        try:
+            return self._views
+        except AttributeError:
+            self._views = {"services": {}, "routes": {}}
+            return self._views
+
+    def _clear_element_views(self):
+        for views in self._element_views().values():
+            views.clear()
+
+    def _get_element_view(self, element_class, element_type, element_id):
+        """
+        Gives the Service or Route object for `element_id`. The objects are built once and handed out again for as
+        long as the data stored for them in the graph is not replaced. The cache is shared with the objects given
+        out, so that a Service and the Schedule it came from give out the same Route objects.
+        :param element_class: Service or Route
+        :param element_type: 'services' or 'routes'
+        :param element_id: id of the Service or Route
+        :return: Service or Route object, None if `element_id` is not in the graph
+        """
+        attributes = self._graph.graph[element_type].get(element_id)
+        if attributes is None:
+            return None
+        views = self._element_views()
+        cached = views[element_type].get(element_id)
+        if cached is not None and cached[0] is attributes:
+            return cached[1]
+        if "crs" in self._graph.graph:
+            view = element_class._from_graph(self._graph, attributes)
         else:
+            view = element_class(_graph=self._graph, **attributes)
+        view._views = views
+        views[element_type][element_id] = (attributes, view)
+        return view
+
+    def _get_service_from_graph(self, service_id):
+        service = self._get_element_view(Service, "services", service_id)
+        if service is None:
             raise ServiceIndexError(f"Service with index {service_id} not found")
+        return service
 
     def _get_route_from_graph(self, route_id):
-        if route_id in self._graph.graph["routes"]:
-            return Route(_graph=self._graph, **self._graph.graph["routes"][route_id])
-        else:
+        route = self._get_element_view(Route, "routes", route_id)
+        if route is None:
             raise RouteIndexError(f"Route with index {route_id} not found")
+        return route
 
     def _stop_ids_in_graph(self, stop_ids: List[str]):
         return set(stop_ids).issubset(set(self._graph.nodes))
@@ -91,6 +134,16 @@ class ScheduleElement:
     def change_log(self):
         return change_log.ChangeLog(df=self._graph.graph["change_log"])
 
+    def set_change_log_level(self, level: str):
+        """
+        Sets how much is recorded in the change log about changes made from now on.
+        :param level: one of 'full' (default), 'ids_only' or 'off', see `genet.modify.change_log.ChangeLog`
+        :return:
+        """
+        self._graph.graph["change_log"] = change_log.ChangeLog(
+            df=self._graph.graph["change_log"], level=level
+        )
+
     @abstractmethod
     def _add_additional_attribute_to_graph(self, k, v):
         pass
@@ -274,6 +327,7 @@ class ScheduleElement:
             )
             nx.set_node_attributes(self._graph, reprojected_node_attribs)
             self.epsg = new_epsg
+            self._clear_element_views()
 
     def unique_stop_projections(self):
         return {x[1] for x in self.graph().nodes(data="epsg")}
@@ -743,6 +797,39 @@ class Route(ScheduleElement):
             )
         super().__init__()
 
+    @classmethod
+    def _from_graph(cls, _graph: nx.DiGraph, attributes: dict):
+        """
+        Builds the Route stored in `_graph` under `attributes`, with the same attributes as
+        `Route(_graph=_graph, **attributes)` but without checking the graph again, which is already part of a
+        Service or Schedule.
+        :param _graph: graph of the Service or Schedule, with `crs` set
+        :param attributes: the Route's data stored in `_graph.graph['routes']`
+        :return: Route
+        """
+        route = cls.__new__(cls)
+        d = {
+            "route_short_name": attributes["route_short_name"],
+            "mode": attributes["mode"],
+            "arrival_offsets": attributes["arrival_offsets"],
+            "departure_offsets": attributes["departure_offsets"],
+            "route_long_name": attributes.get("route_long_name", ""),
+            "id": attributes.get("id", ""),
+            "trips": attributes["trips"],
+            "route": [] if attributes.get("route") is None else attributes["route"],
+            "await_departure": []
+            if attributes.get("await_departure") is None
+            else attributes["await_departure"],
+        }
+        for k, v in attributes.items():
+            if k not in d and k != "ordered_stops":
+                d[k] = v
+        d["ordered_stops"] = attributes["ordered_stops"]
+        d["_graph"] = _graph
+        d["epsg"] = _graph.graph["crs"]
+        route.__dict__.update(d)
+        return route
+
     def __eq__(self, other):
         same_route_name = self.route_short_name == other.route_short_name
         same_mode = self.mode.lower() == other.mode.lower()
@@ -810,6 +897,7 @@ class Route(ScheduleElement):
         :param new_id: desired value of the new index
         :return:
         """
+        self._clear_element_views()
         if not self._index_unique(new_id):
             raise RouteIndexError(f"Route of index {new_id} already exists")
         if self.id != new_id:
@@ -1013,6 +1101,7 @@ class Route(ScheduleElement):
          {('HH:MM:SS', 'HH:MM:SS'): headway_minutes}.
         :return:
         """
+        self._clear_element_views()
         new_trip_departures = list(generate_trip_departures_from_headway(headway_spec))
         new_trip_departures.sort()
         new_trip_departures = [t.strftime("%H:%M:%S") for t in new_trip_departures]
@@ -1215,6 +1304,26 @@ class Service(ScheduleElement):
             )
         super().__init__()
 
+    @classmethod
+    def _from_graph(cls, _graph: nx.DiGraph, attributes: dict):
+        """
+        Builds the Service stored in `_graph` under `attributes`, with the same attributes as
+        `Service(_graph=_graph, **attributes)` but without checking the graph again, which is already part of a
+        Schedule.
+        :param _graph: graph of the Schedule, with `crs` set
+        :param attributes: the Service's data stored in `_graph.graph['services']`
+        :return: Service
+        """
+        service = cls.__new__(cls)
+        d = {"id": attributes["id"], "name": str(attributes.get("name", ""))}
+        for k, v in attributes.items():
+            if k not in d:
+                d[k] = v
+        d["_graph"] = _graph
+        d["epsg"] = _graph.graph["crs"]
+        service.__dict__.update(d)
+        return service
+
     def __eq__(self, other):
         return self.id == other.id
 
@@ -1393,6 +1502,7 @@ class Service(ScheduleElement):
         :param new_id: desired value of the new index
         :return:
         """
+        self._clear_element_views()
         if not self._index_unique(new_id):
             raise ServiceIndexError(f"Service of index {new_id} already exists")
         if self.id != new_id:
@@ -1728,7 +1838,9 @@ class Schedule(ScheduleElement):
     def __copy__(self):
         g_copy = self._graph.copy()
         g_copy.graph = deepcopy(self._graph.graph)
-        g_copy.graph["change_log"] = change_log.ChangeLog(df=self._graph.graph["change_log"].copy())
+        g_copy.graph["change_log"] = change_log.ChangeLog(
+            df=self._graph.graph["change_log"].copy(), level=self._graph.graph["change_log"].level
+        )
         return Schedule(_graph=g_copy, minimal_transfer_times=deepcopy(self.minimal_transfer_times))
 
     def _build_graph(self, services):
@@ -2168,6 +2280,7 @@ class Schedule(ScheduleElement):
             Schedule
         :return:
         """
+        self._clear_element_views()
         if not self.is_separable_from(other):
             # have left and right indicies
             raise NotImplementedError("This method only supports adding non overlapping services.")
@@ -2806,6 +2919,7 @@ class Schedule(ScheduleElement):
         :param new_attributes: keys are Service IDs and values are dictionaries of data to add/replace if present
         :return:
         """
+        self._clear_element_views()
         self._verify_no_id_change(new_attributes)
         services = list(new_attributes.keys())
         old_attribs = [deepcopy(self._graph.graph["services"][service]) for service in services]
@@ -2832,6 +2946,7 @@ class Schedule(ScheduleElement):
         :param new_attributes: keys are Route IDs and values are dictionaries of data to add/replace if present
         :return:
         """
+        self._clear_element_views()
         self._verify_no_id_change(new_attributes)
         # check for stop changes
         stop_changes = {
@@ -2995,6 +3110,7 @@ class Schedule(ScheduleElement):
             `apply_function_to_stops`.
         :return:
         """
+        self._clear_element_views()
         clashing_ids = []
         for service in services:
             if self.has_service(service.id):
@@ -3078,6 +3194,7 @@ class Schedule(ScheduleElement):
         :param service_ids: List of service IDs to remove
         :return:
         """
+        self._clear_element_views()
         service_ids = persistence.listify(service_ids)
         missing_ids = []
         for service_id in service_ids:
@@ -3147,6 +3264,7 @@ class Schedule(ScheduleElement):
             `apply_function_to_stops`.
         :return:
         """
+        self._clear_element_views()
         missing_services = []
         route_ids = []
         for service_id, routes in routes_dict.items():
@@ -3240,6 +3358,7 @@ class Schedule(ScheduleElement):
         :param route_ids: list of route IDs to remove
         :return:
         """
+        self._clear_element_views()
         route_ids = persistence.listify(route_ids)
         missing_ids = []
         for route_id in route_ids:
@@ -113,11 +113,12 @@ def extract_network_id_from_osm_csv(network, attribute_name, osm_csv_path, outpa
     """
 
     osm_df = pd.read_csv(osm_csv_path, dtype={"osm_id": osm_dtype})
-    osm_df["network_id"] = pd.Series(dtype=str)
 
     target_osm_ids = set(osm_df["osm_id"])
 
     osm_to_network_dict = {}
+    # one lookup per OSM id, rather than checking every link for each of them
+    network.index_link_attribute({"attributes": attribute_name})
 
     with tqdm(total=len(target_osm_ids)) as pbar:
         for target_id in target_osm_ids:
@@ -129,16 +130,12 @@ def extract_network_id_from_osm_csv(network, attribute_name, osm_csv_path, outpa
             if len(links) > 0:
                 # store list of links in dictionary
                 osm_to_network_dict[target_id] = links
-                # mark the OSM id as "matched" in the dataframe
-                osm_df.loc[osm_df["osm_id"] == target_id, "network_id"] = True
-            else:
-                # mark the OSM id as "ummatched" in the dataframe
-                osm_df.loc[osm_df["osm_id"] == target_id, "network_id"] = False
 
             pbar.update(1)
 
+    # mark the OSM ids as "matched" or "unmatched" in the dataframe
+    osm_df["network_id"] = osm_df["osm_id"].isin(set(osm_to_network_dict))
     # check whether some of our OSM ids were not found
-    osm_df["network_id"] = osm_df["network_id"].fillna(False)
     unmatched_osm_df = osm_df[~osm_df["network_id"]]
     if unmatched_osm_df.shape[0] > 0:
         # print unmatched ids
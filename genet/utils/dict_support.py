@@ -28,6 +28,22 @@ def set_nested_value(d: dict, value: dict):
     return d
 
 
+def copy_attributes(d):
+    """
+    Copies attribute data: nested dictionaries, lists and sets are copied, all other values, such as strings,
+    numbers or (immutable) shapely geometries, are shared. Much faster than `deepcopy` for node and link data.
+    :param d: dictionary of attributes, or any value stored in it
+    :return: copy of `d`
+    """
+    if isinstance(d, dict):
+        return {k: copy_attributes(v) for k, v in d.items()}
+    if isinstance(d, list):
+        return [copy_attributes(v) for v in d]
+    if isinstance(d, set):
+        return set(d)
+    return d
+
+
 def get_nested_value(d: dict, path: dict):
     """
     Retrieves value from nested dictionary
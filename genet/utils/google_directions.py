@@ -185,7 +185,7 @@ def _generate_requests_for_non_simplified_network(n, osm_tags=all):
             mixed_dtypes=True,
         )
 
-    simple_paths = simplification._get_edge_groups_to_simplify(g)
+    simple_paths = simplification._paths_to_simplify(g)
 
     node_diff = set(g.nodes) - set(itertools.chain.from_iterable(simple_paths))
     non_simplified_edges = set(g.out_edges(node_diff)) | set(g.in_edges(node_diff))
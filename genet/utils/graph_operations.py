@@ -119,6 +119,182 @@ class Filter:
         return satisfies
 
 
+class AttributeIndex:
+    """
+    Secondary index of items (e.g. nodes or links) on the value stored under a chosen attribute key. Finds items with
+    a given value, or one of given values, with hash lookups rather than evaluating a `Filter` on every item.
+    Values which are lists or sets are also indexed under each of their items, for `mixed_dtypes` conditions.
+
+    :param key: either a string e.g. 'modes', or if indexing nested information, a dictionary
+        e.g. {'attributes': 'osm:way:osmid'}
+    :param iterator: generator, list or set of two-tuples: (id of the item, attributes of the item) to index
+    """
+
+    def __init__(self, key: Union[str, dict], iterator=()):
+        self.key = key
+        self.path = key_path(key)
+        # id: value indexed for the item, to find it when it changes or is removed
+        self._values = {}
+        # value: {id: None}, dictionaries keep the order items were indexed in
+        self._index = {}
+        # item of list or set values: {id: None}
+        self._member_index = {}
+        # id: position of the item when it was first indexed, items matching several values are returned in that order
+        self._order = {}
+        self._next_position = 0
+        self.add(iterator)
+
+    def __len__(self):
+        return len(self._values)
+
+    def counts(self):
+        """
+        :return: {value: number of items with that value, or with that item in their list or set value}
+        """
+        counts = {value: len(ids) for value, ids in self._member_index.items()}
+        for value, ids in self._index.items():
+            counts[value] = counts.get(value, 0) + len(ids)
+        return counts
+
+    def add(self, iterator):
+        """
+        Indexes items, replaces what was indexed for them before
+        :param iterator: generator, list or set of two-tuples: (id of the item, attributes of the item)
+        :return:
+        """
+        for _id, attribs in iterator:
+            self._unindex(_id)
+            if _id not in self._order:
+                self._order[_id] = self._next_position
+                self._next_position += 1
+            value = _value_at_path(attribs, self.path)
+            if value is _MISSING:
+                continue
+            if isinstance(value, (list, set)):
+                items = [item for item in value if _is_indexable(item)]
+                self._values[_id] = items
+                for item in items:
+                    self._member_index.setdefault(item, {})[_id] = None
+            elif _is_indexable(value):
+                self._values[_id] = value
+                self._index.setdefault(value, {})[_id] = None
+
+    def remove(self, ids: Iterable):
+        """
+        Removes items from the index, ids which are not indexed are ignored
+        :param ids: ids of the items
+        :return:
+        """
+        for _id in ids:
+            self._unindex(_id)
+            self._order.pop(_id, None)
+
+    def _unindex(self, _id):
+        if _id not in self._values:
+            return
+        value = self._values.pop(_id)
+        if isinstance(value, list):
+            for item in value:
+                _discard(self._member_index, item, _id)
+        else:
+            _discard(self._index, value, _id)
+
+    def lookup(self, value, mixed_dtypes=True):
+        """
+        Finds ids of items satisfying the condition `value` under the indexed key, as a `Filter` would
+        :param value: single value, string, int or float, or list or set of such values
+        :param mixed_dtypes: as in `Filter`, whether items of list or set values are matched as well
+        :return: list of ids, None if the condition cannot be answered from the index (e.g. a bound or a function)
+        """
+        if isinstance(value, (list, set)):
+            if not all(_is_indexable(v) for v in value):
+                return None
+            values = list(value)
+        elif isinstance(value, (int, float, str)):
+            values = [value]
+        else:
+            return None
+        matches = [self._index.get(v, {}) for v in values]
+        if mixed_dtypes:
+            matches += [self._member_index.get(v, {}) for v in values]
+        matches = [ids for ids in matches if ids]
+        if len(matches) == 1:
+            return list(matches[0])
+        return sorted(set().union(*matches), key=self._order.__getitem__)
+
+
+_MISSING = object()
+
+
+def key_path(key: Union[str, dict]):
+    """
+    :param key: either a string e.g. 'modes', or a nested dictionary e.g. {'attributes': 'osm:way:osmid'}
+    :return: tuple of keys leading to the value e.g. ('attributes', 'osm:way:osmid')
+    """
+    path = []
+    while isinstance(key, dict):
+        if len(key) != 1:
+            raise NotImplementedError("Nested keys need to lead to a single value")
+        k, key = next(iter(key.items()))
+        path.append(k)
+    return tuple(path + [key])
+
+
+def _value_at_path(d, path):
+    for k in path:
+        if not isinstance(d, dict) or k not in d:
+            return _MISSING
+        d = d[k]
+    return d
+
+
+def _is_indexable(value):
+    # NaN is not equal to anything, not even itself
+    return isinstance(value, (int, float, str)) and value == value
+
+
+def _discard(index: dict, value, _id):
+    ids = index[value]
+    del ids[_id]
+    if not ids:
+        del index[value]
+
+
+def _index_lookup(condition, indexes: Dict[tuple, AttributeIndex], mixed_dtypes):
+    # a condition can be answered from an index if it is a chain of single keys leading to the target value
+    path = []
+    while isinstance(condition, dict) and len(condition) == 1:
+        k, condition = next(iter(condition.items()))
+        path.append(k)
+    if isinstance(condition, dict) or tuple(path) not in indexes:
+        return None
+    return indexes[tuple(path)].lookup(condition, mixed_dtypes=mixed_dtypes)
+
+
+def extract_on_indexes(
+    indexes: Dict[tuple, AttributeIndex], conditions: Union[list, dict], how=any, mixed_dtypes=True
+):
+    """
+    Answers `extract_on_attributes` conditions using attribute indexes, if every condition is a value, or list or set
+    of values, under an indexed key
+    :param indexes: {key path: AttributeIndex}, see `key_path`
+    :param conditions: as in `extract_on_attributes`
+    :param how: {all, any}, default any
+    :param mixed_dtypes: as in `extract_on_attributes`
+    :return: list of ids satisfying conditions, None if the conditions cannot be answered from the indexes
+    """
+    if not indexes or how not in {any, all}:
+        return None
+    conditions = conditions if isinstance(conditions, list) else [conditions]
+    results = [_index_lookup(condition, indexes, mixed_dtypes) for condition in conditions]
+    if not results or any(result is None for result in results):
+        return None
+    if how is any:
+        return list(dict.fromkeys(_id for result in results for _id in result))
+    common = set(results[0]).intersection(*results[1:])
+    return [_id for _id in results[0] if _id in common]
+
+
 def extract_on_attributes(iterator, conditions: Union[list, dict], how=any, mixed_dtypes=True):
     """
     Extracts ids in iterator based on values of attributes attached to the items. Fails silently,
@@ -266,19 +442,31 @@ def build_attribute_dataframe(iterator, keys: Union[list, str], index_name: str
     :param index_name:
     :return:
     """
-    df = None
     if isinstance(keys, str):
         keys = [keys]
     if len(keys) > 1:
         iterator = list(iterator)
-    for key in keys:
+    return attribute_data_to_dataframe(
+        ((key, get_attribute_data_under_key(iterator, key)) for key in keys), index_name=index_name
+    )
+
+
+def attribute_data_to_dataframe(key_data: Iterable, index_name: str = None):
+    """
+    Builds a pandas.DataFrame from data extracted under keys.
+    :param key_data: iterable of tuples (key, {index: value}), where key is a string or a dictionary if accessing
+    nested information, see `get_attribute_data_under_key` docstring.
+    :param index_name:
+    :return:
+    """
+    df = None
+    for key, attribute_data in key_data:
         if isinstance(key, dict):
             # consolidate nestedness to get a name for the column
             name = dict_support.dict_to_string(key)
         else:
             name = key
 
-        attribute_data = get_attribute_data_under_key(iterator, key)
         col_series = pd.Series(attribute_data, dtype=pd_helpers.get_pandas_dtype(attribute_data))
         col_series.name = name
 
@@ -366,8 +554,9 @@ def consolidate_node_indices(left, right):
     )
     if clashing_right_node_ids:
         # generate the index avoiding indices from left, that way they're unique across both graphs
+        left_node_ids = set(left.graph.nodes)
         [
-            right.reindex_node(node, right.generate_index_for_node([i for i, a in left.nodes()]))
+            right.reindex_node(node, right.generate_index_for_node(left_node_ids))
             for node in clashing_right_node_ids
         ]
 
@@ -484,9 +673,7 @@ def consolidate_link_indices(left, right):
     if clashing_right_link_ids:
         # generate the index avoiding indices from left, that way they're unique across both graphs
         [
-            right.reindex_link(
-                link, right.generate_index_for_edge(set(left.link_id_mapping.keys()))
-            )
+            right.reindex_link(link, right.generate_index_for_edge(left.link_id_mapping))
             for link in clashing_right_link_ids
         ]
 
@@ -508,8 +695,8 @@ def consolidate_link_indices(left, right):
             left_multi_idx = set(left.graph[u][v].keys())
         existing_multi_edge_ids = right_multi_idx | left_multi_idx
         multi_idx = next(filterfalse(set(existing_multi_edge_ids).__contains__, count(1)))
-        if right_link_id in set(left.link_id_mapping.keys()) | set(right.link_id_mapping.keys()):
-            right_link_id = right.generate_index_for_edge(set(left.link_id_mapping.keys()))
+        if right_link_id in left.link_id_mapping or right_link_id in right.link_id_mapping:
+            right_link_id = right.generate_index_for_edge(left.link_id_mapping)
         right.add_link(right_link_id, u, v, multi_idx, data, silent=True)
 
     logging.info("Finished consolidating link indexing between the two graphs")
@@ -3,6 +3,10 @@ from numpy import ndarray
 
 
 def notna(value):
+    if isinstance(value, (str, int, dict, set)):
+        return True
+    if isinstance(value, float):
+        return value == value
     nn = pd.notna(value)
     if isinstance(nn, ndarray):
         return any(nn)
@@ -0,0 +1,47 @@
+import logging
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_memory_mb():
+    """
+    Peak resident set size of the current process, in MB.
+    :return: float, or None if it cannot be established on this platform
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # reported in bytes on macOS, kilobytes elsewhere
+        return peak / 1024**2
+    return peak / 1024
+
+
+def log_throughput(description: str, n_elements: int, start_time: float):
+    """
+    Logs elapsed time, elements processed per second and peak memory since `start_time`
+    :param description: what was processed, e.g. 'network.xml elements'
+    :param n_elements: number of elements processed
+    :param start_time: `time.perf_counter()` taken before processing started
+    :return: dict with 'elements', 'seconds', 'elements_per_second' and 'peak_memory_mb' keys
+    """
+    elapsed = time.perf_counter() - start_time
+    stats = {
+        "elements": n_elements,
+        "seconds": elapsed,
+        "elements_per_second": n_elements / elapsed if elapsed > 0 else float("inf"),
+        "peak_memory_mb": peak_memory_mb(),
+    }
+    msg = (
+        f"Processed {n_elements} {description} in {elapsed:.2f}s "
+        f"({stats['elements_per_second']:.0f} elements/s)"
+    )
+    if stats["peak_memory_mb"] is not None:
+        msg += f", peak memory: {stats['peak_memory_mb']:.1f} MB"
+    logging.info(msg)
+    return stats
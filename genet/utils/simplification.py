@@ -1,282 +1,325 @@
 import logging
-from math import ceil
-from statistics import median
 
-from shapely.geometry import LineString, Point
+import numpy as np
+import shapely
 
-import genet.utils.parallel as parallel
 from genet.utils.persistence import setify
 
-# rip and monkey patch of a few functions from osmnx.simplification to customise graph simplification
+# simplification of the graph in the manner of osmnx.simplification: paths through nodes which are not junctions or
+# dead-ends are replaced by single links. Nodes and their connections are numbered and paths are found and merged with
+# numpy arrays
+
+# link attributes merged in their own way, any other attribute keeps its value if it is the same on all links of a
+# path and becomes a list of its distinct values otherwise
+MERGED_LINK_ATTRIBUTES = {
+    "id",
+    "from",
+    "to",
+    "s2_from",
+    "s2_to",
+    "freespeed",
+    "capacity",
+    "permlanes",
+    "length",
+    "modes",
+    "attributes",
+    "geometry",
+}
+# marks links missing an attribute in columns of link attributes
+_MISSING = object()
+
+
+def _graph_arrays(graph):
+    """
+    Numbers the nodes of `graph` and the distinct pairs of nodes connected by its edges
+    :param graph: nx.MultiDiGraph
+    :return: list of node ids in order of their numbers, numpy arrays of the node numbers the pairs lead from (`u`)
+        and to (`v`), sorted on `u` then `v`, numpy array of the pair number of each edge in order of `graph.edges`,
+        list of edge data in order of `graph.edges`
+    """
+    node_ids = list(graph.nodes)
+    positions = dict(zip(node_ids, range(len(node_ids))))
+    edges = list(graph.edges(data=True))
+    n_nodes = max(len(node_ids), 1)
+    edge_codes = np.fromiter(
+        (positions[u] * n_nodes + positions[v] for u, v, _ in edges),
+        dtype=np.int64,
+        count=len(edges),
+    )
+    pairs, edge_pairs = np.unique(edge_codes, return_inverse=True)
+    return node_ids, pairs // n_nodes, pairs % n_nodes, edge_pairs, [data for _, _, data in edges]
 
 
-def _process_path(indexed_edge_groups_to_simplify):
-    links_to_add = {}
-    for new_id, edge_group_data in indexed_edge_groups_to_simplify.items():
-        path = edge_group_data["path"]
-        nodes_data = edge_group_data["node_data"]
-        edge_attributes = edge_group_data["link_data"].copy()
+def _endpoints(u, v, n_nodes):
+    """
+    Finds the nodes paths to simplify start and end at: all nodes but those connected to exactly two other nodes,
+    either one way, i.e. reached from one and leading to the other, or both ways
+    :param u: numpy array of node numbers the distinct pairs of connected nodes lead from
+    :param v: numpy array of node numbers the pairs lead to
+    :param n_nodes: number of nodes
+    :return: boolean numpy array, True for nodes which are endpoints
+    """
+    out_degree = np.bincount(u, minlength=n_nodes)
+    in_degree = np.bincount(v, minlength=n_nodes)
+    neighbours = np.unique(np.concatenate([u * n_nodes + v, v * n_nodes + u])) // n_nodes
+    endpoints = (np.bincount(neighbours, minlength=n_nodes) != 2) | (out_degree != in_degree)
+    endpoints[u[u == v]] = True
+    return endpoints
 
-        if "attributes" in edge_attributes:
-            new_attributes = {}
-            for attribs_dict in edge_attributes["attributes"]:
-                for key, val in attribs_dict.items():
-                    if key in new_attributes:
-                        new_attributes[key] |= setify(val)
-                    else:
-                        new_attributes[key] = setify(val)
-            for key, val in new_attributes.items():
-                if len(val) == 1:
-                    new_attributes[key] = list(val)[0]
-            edge_attributes["attributes"] = new_attributes.copy()
 
-        # construct the geometry
-        edge_attributes["geometry"] = LineString(
-            [Point((nodes_data[node]["x"], nodes_data[node]["y"])) for node in path]
-        )
+def _paths(u, v, endpoints):
+    """
+    Follows connections from endpoints through nodes which are not endpoints, up to the next endpoint, taking one step
+    along all paths at a time
+    :param u: numpy array of node numbers the distinct pairs of connected nodes lead from, sorted on `u` then `v`
+    :param v: numpy array of node numbers the pairs lead to
+    :param endpoints: boolean numpy array, True for nodes which are endpoints, see `_endpoints`
+    :return: numpy arrays of path offsets and pair numbers: path `i` goes along pairs `pairs[offsets[i]:offsets[i + 1]]`
+    """
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(u, minlength=len(endpoints)))])
+    passes_through = ~endpoints[v]
+    # a path goes on from a node which is not an endpoint to its only successor or, if the node is connected both ways
+    # to two nodes, to the one the path did not come from
+    next_pair = np.full(len(u), -1, dtype=np.int64)
+    first = indptr[v[passes_through]]
+    turns_back = (indptr[v[passes_through] + 1] - first == 2) & (v[first] == u[passes_through])
+    next_pair[passes_through] = first + turns_back
+
+    current = np.flatnonzero(endpoints[u] & passes_through)
+    path = np.arange(len(current))
+    steps = [(path, current)]
+    # a pair leads on to a single next pair and is led to from a single pair, unless it starts at an endpoint, so
+    # paths cannot run into cycles and reach an endpoint after at most as many steps as there are pairs
+    while current.size:
+        current = next_pair[current]
+        steps.append((path, current))
+        goes_on = passes_through[current]
+        current, path = current[goes_on], path[goes_on]
+
+    path_of_step = np.concatenate([step_paths for step_paths, _ in steps])
+    pairs = np.concatenate([step_pairs for _, step_pairs in steps])
+    pairs = pairs[np.argsort(path_of_step, kind="stable")]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(path_of_step))]).astype(np.int64)
+    return offsets, pairs
+
+
+def _path_nodes(u, v, offsets, pairs):
+    """
+    :return: numpy arrays of node offsets and node numbers: path `i` goes through nodes
+        `nodes[node_offsets[i]:node_offsets[i + 1]]`
+    """
+    node_offsets = offsets + np.arange(len(offsets))
+    nodes = np.empty(len(pairs) + len(offsets) - 1, dtype=np.int64)
+    is_first = np.zeros(len(nodes), dtype=bool)
+    is_first[node_offsets[:-1]] = True
+    nodes[is_first] = u[pairs[offsets[:-1]]]
+    nodes[~is_first] = v[pairs]
+    return node_offsets, nodes
 
-        edge_attributes["ids"] = edge_attributes["id"]
-        edge_attributes["id"] = new_id
-
-        edge_attributes["from"] = path[0]
-        edge_attributes["to"] = path[-1]
-        edge_attributes["s2_from"] = nodes_data[path[0]]["s2_id"]
-        edge_attributes["s2_to"] = nodes_data[path[-1]]["s2_id"]
-
-        edge_attributes["freespeed"] = max(edge_attributes["freespeed"])
-        edge_attributes["capacity"] = ceil(median(edge_attributes["capacity"]))
-        edge_attributes["permlanes"] = ceil(median(edge_attributes["permlanes"]))
-        edge_attributes["length"] = sum(edge_attributes["length"])
-
-        modes = set()
-        for mode_list in edge_attributes["modes"]:
-            modes |= set(mode_list)
-        edge_attributes["modes"] = modes
-
-        for key in set(edge_attributes) - {
-            "s2_to",
-            "freespeed",
-            "attributes",
-            "to",
-            "permlanes",
-            "from",
-            "id",
-            "ids",
-            "capacity",
-            "length",
-            "modes",
-            "s2_from",
-            "geometry",
-        }:
-            if len(set(edge_attributes[key])) == 1:
-                # if there's only 1 unique value in this attribute list,
-                # consolidate it to the single value (the zero-th)
-                edge_attributes[key] = edge_attributes[key][0]
-            else:
-                # otherwise, if there are multiple values, keep one of each value
-                edge_attributes[key] = list(set(edge_attributes[key]))
-
-        links_to_add[new_id] = edge_attributes
-    return links_to_add
-
-
-def _extract_edge_data(n, path):
-    edge_attributes = {}
-    for u, v in zip(path[:-1], path[1:]):
-        # get edge between these nodes: if multiple edges exist between
-        # them - smoosh them
-        for multi_idx, edge in n.graph[u][v].items():
-            for key in edge:
-                if key in edge_attributes:
-                    # if this key already exists in the dict, append it to the
-                    # value list
-                    edge_attributes[key].append(edge[key])
-                else:
-                    # if this key doesn't already exist, set the value to a list
-                    # containing the one value
-                    edge_attributes[key] = [edge[key]]
-    n.remove_links(edge_attributes["id"], ignore_change_log=True, silent=True)
-    return edge_attributes
-
-
-def _extract_node_data(n, path):
-    return {node: n.node(node) for node in path}
-
-
-def _assemble_path_data(n, indexed_paths_to_simplify):
-    return_d = {}
-    for k, path in indexed_paths_to_simplify.items():
-        return_d[k] = {
-            "path": path,
-            "link_data": _extract_edge_data(n, path),
-            "node_data": _extract_node_data(n, path),
-            "nodes_to_remove": path[1:-1],
-        }
-        return_d[k]["ids"] = return_d[k]["link_data"]["id"]
-    return return_d
 
+def _paths_to_simplify(graph):
+    """
+    Finds paths through nodes which are not junctions or dead-ends
+    :param graph: nx.MultiDiGraph
+    :return: list of paths, each a list of node ids
+    """
+    node_ids, u, v, _, _ = _graph_arrays(graph)
+    node_offsets, nodes = _path_nodes(u, v, *_paths(u, v, _endpoints(u, v, len(node_ids))))
+    nodes = [node_ids[node] for node in nodes.tolist()]
+    return [nodes[start:end] for start, end in zip(node_offsets[:-1], node_offsets[1:])]
 
-def _is_endpoint(node_neighbours):
+
+def _grouped_median(values, offsets):
+    """
+    :param values: numpy array of floats, missing values are NaN
+    :param offsets: group `i` is `values[offsets[i]:offsets[i + 1]]`, groups are not empty
+    :return: numpy array of medians of the values present in each group, NaN for groups without values
     """
-    :param node_neighbours: dict {node: {
-     successors: {set of nodes that you can reach from node},
-     predecessors: {set of nodes that lead to node}
-    }}
-    :return:
+    group = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    present = ~np.isnan(values)
+    order = np.lexsort((values[present], group[present]))
+    sorted_values = values[present][order]
+    counts = np.bincount(group[present], minlength=len(offsets) - 1)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    medians = np.full(len(counts), np.nan)
+    has_values = counts > 0
+    low = starts[has_values] + (counts[has_values] - 1) // 2
+    high = starts[has_values] + counts[has_values] // 2
+    medians[has_values] = (sorted_values[low] + sorted_values[high]) / 2
+    return medians
+
+
+def _merge_links(new_ids, path_nodes, node_offsets, links, link_offsets, nodes):
     """
-    return [
-        node
-        for node, data in node_neighbours.items()
-        if (
-            (len(data["successors"] | data["predecessors"]) > 2)
-            or (not data["successors"] or not data["predecessors"])
-            or (node in data["successors"])
-            or (len(data["successors"]) != len(data["predecessors"]))
-            or (
-                (len(data["successors"] | data["predecessors"]) == 1)
-                and (data["successors"] == data["predecessors"])
+    Merges the links along each path into a single link, attribute by attribute over all paths:
+        - freespeed: maximum, capacity and permlanes: median rounded up, length: sum
+        - modes: union
+        - attributes: union of the values under each key, a single value is kept as is
+        - geometry: line through the nodes of the path
+        - ids: ids of the merged links
+        - other attributes: the value if it is the same on all links, otherwise a list of the distinct values
+    :param new_ids: list of ids of the new links, one for each path
+    :param path_nodes: list of ids of the nodes of all paths, path `i` goes through
+        `path_nodes[node_offsets[i]:node_offsets[i + 1]]`
+    :param node_offsets: numpy array of node offsets of paths
+    :param links: list of attribute dicts of the links of all paths, in order along the paths, links between the same
+        two nodes follow each other. The links of path `i` are `links[link_offsets[i]:link_offsets[i + 1]]`
+    :param link_offsets: numpy array of link offsets of paths
+    :param nodes: mapping of node ids to their data, with 'x', 'y' and 's2_id'
+    :return: dict of new link ids and their attributes, dict of new link ids and the attributes of the merged links:
+        {key: [values of the links with the key]}
+    """
+    if not new_ids:
+        return {}, {}
+    keys = list(dict.fromkeys(key for link in links for key in link))
+    columns = {key: [link.get(key, _MISSING) for link in links] for key in keys}
+    starts = link_offsets[:-1]
+    numeric = {}
+    for key in ["freespeed", "capacity", "permlanes", "length"]:
+        if key in columns:
+            values = np.array(
+                [np.nan if value is _MISSING else value for value in columns[key]], dtype=float
             )
-        )
-    ]
-
+            if key == "freespeed":
+                merged = np.fmax.reduceat(values, starts)
+            elif key == "length":
+                merged = np.add.reduceat(np.nan_to_num(values), starts)
+                merged[np.add.reduceat(~np.isnan(values), starts) == 0] = np.nan
+            else:
+                merged = np.ceil(_grouped_median(values, link_offsets))
+            numeric[key] = (merged, key in {"capacity", "permlanes"})
 
-def _build_paths(path_start_points, endpoints, neighbours):
-    paths = []
-    logging.info(f"Processing {len(path_start_points)} paths")
-    for path_start_point in path_start_points:
-        if path_start_point[1] not in endpoints:
-            path = list(path_start_point)
-            end_node = path[-1]
-            while end_node not in endpoints:
-                if neighbours[end_node] == {path[0]}:
-                    end_node = path[0]
-                elif len(neighbours[end_node]) > 1:
-                    next_nodes = neighbours[end_node] - {path[-2]}
-                    if len(next_nodes) > 1:
-                        raise RuntimeError(
-                            "Path building found additional branching. Simplification failed to find"
-                            "all of the correct end points."
-                        )
-                    end_node = list(next_nodes)[0]
-                else:
-                    end_node = list(neighbours[end_node])[0]
-                path.append(end_node)
-            paths.append(path)
-    return paths
-
-
-def _get_edge_groups_to_simplify(G, no_processes=1):
-    # first identify all the nodes that are endpoints
-    endpoints = set(
-        parallel.multiprocess_wrap(
-            data={
-                node: {
-                    "successors": set(G.successors(node)),
-                    "predecessors": set(G.predecessors(node)),
-                }
-                for node in G.nodes
-            },
-            split=parallel.split_dict,
-            apply=_is_endpoint,
-            combine=parallel.combine_list,
-            processes=no_processes,
-        )
+    coords = np.array([(nodes[node]["x"], nodes[node]["y"]) for node in path_nodes], dtype=float)
+    geometries = shapely.linestrings(
+        coords, indices=np.repeat(np.arange(len(new_ids)), np.diff(node_offsets))
     )
+    other_keys = [key for key in keys if key not in MERGED_LINK_ATTRIBUTES]
 
-    logging.info(f"Identified {len(endpoints)} edge endpoints")
-    path_start_points = list(G.out_edges(endpoints))
-
-    logging.info(f"Identified {len(path_start_points)} possible paths")
-    return parallel.multiprocess_wrap(
-        data=path_start_points,
-        split=parallel.split_list,
-        apply=_build_paths,
-        combine=parallel.combine_list,
-        processes=no_processes,
-        endpoints=endpoints,
-        neighbours={node: set(G.neighbors(node)) for node in G.nodes},
-    )
+    links_to_add = {}
+    merged_link_data = {}
+    for i, new_id in enumerate(new_ids):
+        start, end = link_offsets[i], link_offsets[i + 1]
+        link_data = {}
+        for key in keys:
+            values = [value for value in columns[key][start:end] if value is not _MISSING]
+            if values:
+                link_data[key] = values
+        merged_link_data[new_id] = link_data
+
+        first_node, last_node = path_nodes[node_offsets[i]], path_nodes[node_offsets[i + 1] - 1]
+        attribs = {
+            "id": new_id,
+            "from": first_node,
+            "to": last_node,
+            "s2_from": nodes[first_node]["s2_id"],
+            "s2_to": nodes[last_node]["s2_id"],
+            "geometry": geometries[i],
+            "ids": link_data.get("id", []),
+        }
+        for key, (merged, rounded) in numeric.items():
+            if not np.isnan(merged[i]):
+                attribs[key] = int(merged[i]) if rounded else float(merged[i])
+        if "modes" in link_data:
+            attribs["modes"] = set().union(*link_data["modes"])
+        if "attributes" in link_data:
+            new_attributes = {}
+            for attributes in link_data["attributes"]:
+                for key, val in attributes.items():
+                    if key in new_attributes:
+                        new_attributes[key] |= setify(val)
+                    else:
+                        new_attributes[key] = setify(val)
+            for key, val in new_attributes.items():
+                if len(val) == 1:
+                    new_attributes[key] = list(val)[0]
+            attribs["attributes"] = new_attributes
+        for key in other_keys:
+            if key in link_data:
+                values = set(link_data[key])
+                attribs[key] = link_data[key][0] if len(values) == 1 else list(values)
+        links_to_add[new_id] = attribs
+    return links_to_add, merged_link_data
 
 
 def simplify_graph(n, no_processes=1):
     """
-    MONKEY PATCH OF OSMNX'S GRAPH SIMPLIFICATION ALGO
-
-    Simplify a graph's topology by removing interstitial nodes.
-
-    Simplify graph topology by removing all nodes that are not intersections
-    or dead-ends. Create an edge directly between the end points that
-    encapsulate them, but retain the geometry of the original edges, saved as
-    attribute in new edge.
-
-    Parameters
-    ----------
-    n: genet.Network object
-    no_processes: number of processes to split some of the processess across
-
-    Returns
-    -------
-    None, updates n.graph, indexing and schedule routes. Adds a new attribute to n that records map between old
-    and new link indices
+    Simplifies the topology of the graph of `n` by removing interstitial nodes, in the manner of osmnx's graph
+    simplification. Paths through nodes which are not junctions or dead-ends are replaced by single links between the
+    nodes at their ends, which keep the geometry of the paths. The nodes and links are numbered and the paths found and
+    merged with arrays in a single pass, the graph is then updated in one go.
+    :param n: genet.Network object
+    :param no_processes: kept for backwards compatibility, simplification runs in a single process
+    :return: None, updates n.graph, indexing and schedule routes. Adds a new attribute to n that records map between
+        old and new link indices
     """
     logging.info("Begin simplifying the graph")
-    initial_node_count = len(list(n.graph.nodes()))
-    initial_edge_count = len(list(n.graph.edges()))
-
     logging.info("Generating paths to be simplified")
-    # generate each path that needs to be simplified
-    edges_to_simplify = [
-        list(x)
-        for x in set(
-            tuple(x) for x in _get_edge_groups_to_simplify(n.graph, no_processes=no_processes)
-        )
-    ]
-    logging.info(f"Found {len(edges_to_simplify)} paths to simplify.")
-
-    indexed_paths_to_simplify = dict(
-        zip(n.generate_indices_for_n_edges(len(edges_to_simplify)), edges_to_simplify)
+    node_ids, u, v, edge_pairs, edge_data = _graph_arrays(n.graph)
+    offsets, pairs = _paths(u, v, _endpoints(u, v, len(node_ids)))
+    n_paths = len(offsets) - 1
+    logging.info(f"Found {n_paths} paths to simplify.")
+
+    # all links between consecutive nodes of a path are merged into the new link
+    pair_indptr = np.concatenate([[0], np.cumsum(np.bincount(edge_pairs, minlength=len(u)))])
+    links_per_step = pair_indptr[pairs + 1] - pair_indptr[pairs]
+    step_starts = np.repeat(
+        pair_indptr[pairs] - np.cumsum(links_per_step) + links_per_step, links_per_step
     )
-    indexed_paths_to_simplify = _assemble_path_data(n, indexed_paths_to_simplify)
-
-    nodes_to_remove = set()
-    for k, data in indexed_paths_to_simplify.items():
-        nodes_to_remove |= set(data["nodes_to_remove"])
-    n.remove_nodes(nodes_to_remove, ignore_change_log=True, silent=True)
+    path_links = np.argsort(edge_pairs, kind="stable")[
+        step_starts + np.arange(links_per_step.sum(), dtype=np.int64)
+    ]
+    link_offsets = np.concatenate([[0], np.cumsum(links_per_step)])[offsets]
+    node_offsets, path_nodes = _path_nodes(u, v, offsets, pairs)
+    path_nodes = [node_ids[node] for node in path_nodes.tolist()]
 
     logging.info("Processing links for all paths to be simplified")
-    links_to_add = parallel.multiprocess_wrap(
-        data=indexed_paths_to_simplify,
-        split=parallel.split_dict,
-        apply=_process_path,
-        combine=parallel.combine_dict,
-        processes=no_processes,
+    new_ids = list(n.generate_indices_for_n_edges(n_paths))
+    links_to_add, merged_link_data = _merge_links(
+        new_ids,
+        path_nodes,
+        node_offsets,
+        [edge_data[link] for link in path_links.tolist()],
+        link_offsets,
+        n.graph.nodes,
     )
 
-    logging.info("Adding new simplified links")
-    # add links
-    reindexing_dict = n.add_links(links_to_add, ignore_change_log=True)[0]
+    logging.info("Replacing simplified links")
+    is_inner_node = np.ones(len(path_nodes), dtype=bool)
+    is_inner_node[node_offsets[:-1]] = False
+    is_inner_node[node_offsets[1:] - 1] = False
+    nodes_to_remove = list(
+        dict.fromkeys(node for node, inner in zip(path_nodes, is_inner_node.tolist()) if inner)
+    )
+    old_ids = [links_to_add[new_id]["ids"] for new_id in new_ids]
+    n.replace_links(
+        [link_id for ids in old_ids for link_id in ids],
+        nodes_to_remove,
+        links_to_add,
+        ignore_change_log=True,
+        silent=True,
+    )
 
     # generate link simplification map between old indices and new, add changelog event
-    for old_id, new_id in reindexing_dict.items():
-        indexed_paths_to_simplify[new_id] = indexed_paths_to_simplify[old_id]
-        del indexed_paths_to_simplify[old_id]
-    new_ids = list(indexed_paths_to_simplify.keys())
-    old_ids = [set(indexed_paths_to_simplify[_id]["ids"]) for _id in new_ids]
+    indexed_paths_to_simplify = {
+        new_id: {
+            "link_data": merged_link_data[new_id],
+            "nodes_to_remove": path_nodes[node_offsets[i] + 1 : node_offsets[i + 1] - 1],
+        }
+        for i, new_id in enumerate(new_ids)
+    }
     n.change_log = n.change_log.simplify_bunch(
-        old_ids, new_ids, indexed_paths_to_simplify, links_to_add
+        [set(ids) for ids in old_ids], new_ids, indexed_paths_to_simplify, links_to_add
     )
-    del links_to_add
 
     # generate map between old and new ids
-    n.link_simplification_map = {}
-    for old_id_list, new_id in zip(old_ids, new_ids):
-        for _id in old_id_list:
-            n.link_simplification_map[_id] = new_id
+    n.link_simplification_map = {
+        old_id: new_id for ids, new_id in zip(old_ids, new_ids) for old_id in ids
+    }
     n.update_link_auxiliary_files(n.link_simplification_map)
 
     logging.info(
-        f"Simplified graph: {initial_node_count} to {len(n.graph)} nodes, {initial_edge_count} to "
-        f"{len(n.graph.edges())} edges"
+        f"Simplified graph: {len(node_ids)} to {len(n.graph)} nodes, {len(edge_data)} to "
+        f"{len(edge_data) - len(path_links) + len(new_ids)} edges"
     )
 
     if n.schedule:
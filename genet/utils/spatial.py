@@ -1,6 +1,10 @@
+import copy
+import heapq
+import itertools
 import json
 import logging
 import statistics
+from collections import OrderedDict
 from typing import Tuple
 
 import geopandas as gpd
@@ -9,6 +13,7 @@ import numpy as np
 import pandas as pd
 import polyline
 import s2sphere as s2
+import shapely
 from shapely.geometry import GeometryCollection, LineString, MultiLineString, Point, shape
 from shapely.ops import linemerge, split
 from sklearn.neighbors import BallTree
@@ -193,6 +198,23 @@ def distance_between_s2cellids(s2cellid1, s2cellid2):
     return distance * APPROX_EARTH_RADIUS
 
 
+def haversine_distance(lon_1, lat_1, lon_2, lat_2):
+    """
+    Great circle distance between points given in degrees, works on numbers and numpy arrays alike
+    :param lon_1: longitude of the first point(s)
+    :param lat_1: latitude of the first point(s)
+    :param lon_2: longitude of the second point(s)
+    :param lat_2: latitude of the second point(s)
+    :return: distance in metres
+    """
+    lon_1, lat_1, lon_2, lat_2 = map(np.radians, [lon_1, lat_1, lon_2, lat_2])
+    a = (
+        np.sin((lat_2 - lat_1) / 2) ** 2
+        + np.cos(lat_1) * np.cos(lat_2) * np.sin((lon_2 - lon_1) / 2) ** 2
+    )
+    return 2 * APPROX_EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
 def change_proj(x, y, crs_transformer):
     return crs_transformer.transform(x, y)
 
@@ -305,13 +327,74 @@ def approximate_metres_distance_in_4326_degrees(distance, lat):
     ) / 2
 
 
-class SpatialTree(nx.DiGraph):
+def catchments_by_step(closest_links, step_size):
+    """
+    Finds the catchment of each point with closest links: the smallest multiple of `step_size` metres with links in it
+    :param closest_links: output of `SpatialTree.closest_links` with no missing links
+    :param step_size: metres
+    :return: `closest_links` limited to the links within the catchments of their points, with a `catchment` column in
+        place of `distance`
+    """
+    if step_size > 0:
+        steps = np.maximum(1, np.ceil(closest_links["distance"].to_numpy() / step_size))
+        catchments = pd.Series(steps.astype(int) * step_size, index=closest_links.index)
+    else:
+        catchments = pd.Series(step_size, index=closest_links.index)
+    catchments = catchments.groupby(level=0).transform("min")
+    closest_links = closest_links.assign(catchment=catchments)
+    closest_links = closest_links[
+        (closest_links["distance"] <= closest_links["catchment"]).to_numpy()
+    ]
+    return closest_links.drop(columns="distance")
+
+
+def utm_epsg(lon, lat):
+    """
+    Finds the WGS 84 / UTM zones of points
+    :param lon: longitude(s) in degrees
+    :param lat: latitude(s) in degrees
+    :return: numpy array of EPSG codes, e.g. 32630 for zone 30N
+    """
+    zone = (np.floor((np.asarray(lon, dtype=float) + 180) / 6) % 60 + 1).astype(int)
+    return np.where(np.asarray(lat, dtype=float) >= 0, 32600, 32700) + zone
+
+
+class SpatialTree:
+    """
+    Graph of the links of a genet.Network: a link connects to the links starting at the node it ends at. Routing
+    through a link costs its weight (e.g. its length), so path lengths count all links of a path but the last one.
+
+    Links are numbered in the order of `link_ids` and their connections are kept in compressed sparse row arrays: the
+    links connected to link number `i` are numbers `indices[indptr[i]:indptr[i + 1]]`. Modal subtrees share the arrays
+    of the tree they come from and `mask` the links they do not include.
+    """
+
+    # maximum number of (source, target) link pairs kept in the shortest path cache of each (modal) tree
+    shortest_path_cache_maxsize = 100000
+
     def __init__(self, n=None):
-        super().__init__()
         self.links = gpd.GeoDataFrame(columns=["link_id", "modes", "geometry"])
+        self.link_ids = pd.Index([])
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.mask = None
+        self._link_weights = {}
+        self._modal_adjacency = None
+        self._link_geometry_indexes = {}
+        self.clear_shortest_path_cache()
         if n is not None:
             self.add_links(n)
 
+    def __contains__(self, link_id):
+        try:
+            idx = self.link_ids.get_loc(link_id)
+        except (KeyError, TypeError):
+            return False
+        return self.mask is None or bool(self.mask[idx])
+
+    def __len__(self):
+        return len(self.links)
+
     def add_links(self, n):
         """
         Generates the spatial tree where all links in `n` are nodes and edges exists between nodes if the two links
@@ -319,34 +402,52 @@ class SpatialTree(nx.DiGraph):
         :param n: genet.Network object
         :return:
         """
-        self.links = n.to_geodataframe()["links"].to_crs("epsg:4326")
-        self.links = self.links.rename(columns={"id": "link_id"})
-        self.links = self.links.set_index("link_id", drop=False)
+        self.set_links(
+            n.to_geodataframe()["links"].to_crs("epsg:4326").rename(columns={"id": "link_id"})
+        )
 
-        nodes = self.links.set_index("link_id").T.to_dict()
-        self.add_nodes_from(nodes)
+    @classmethod
+    def from_links(cls, links):
+        """
+        Builds the spatial tree of links given in a GeoDataFrame, e.g. the `links` of another tree read back from disk
+        :param links: GeoDataFrame of links in EPSG:4326, with 'link_id', 'from', 'to', 'modes' and 'geometry' columns
+        :return: SpatialTree
+        """
+        tree = cls()
+        tree.set_links(links)
+        return tree
 
-        cols = ["from", "to", "link_id"]
-        edge_data_cols = list(
-            set(self.links.columns) - set(cols + ["modes", "geometry", "u", "v", "key"])
-        )
-        edges = pd.merge(
-            self.links[cols + edge_data_cols],
-            self.links[cols],
-            left_on="to",
-            right_on="from",
-            suffixes=("_to", "_from"),
-        )
-        edge_data = edges[edge_data_cols].T.to_dict()
-        self.add_edges_from(
-            list(
-                zip(
-                    edges["link_id_to"],
-                    edges["link_id_from"],
-                    [edge_data[idx] for idx in edges["link_id_to"].index],
-                )
-            )
+    def set_links(self, links):
+        """
+        Replaces the links of the tree and connects them: two links are connected if one ends at the node the other
+        starts at
+        :param links: GeoDataFrame of links in EPSG:4326, with 'link_id', 'from', 'to', 'modes' and 'geometry' columns
+        :return:
+        """
+        self.clear_shortest_path_cache()
+        self.links = links.set_index("link_id", drop=False)
+        self.link_ids = pd.Index(self.links["link_id"])
+        self.mask = None
+        self._link_weights = {}
+        self._modal_adjacency = None
+        self._link_geometry_indexes = {}
+
+        n_links = len(self.links)
+        node_codes, node_ids = pd.factorize(
+            pd.concat([self.links["from"], self.links["to"]], ignore_index=True)
         )
+        from_codes, to_codes = node_codes[:n_links], node_codes[n_links:]
+        # links in order of the node they start at, with the position the links of each node start from
+        links_by_from_node = np.argsort(from_codes, kind="stable")
+        out_degree = np.bincount(from_codes, minlength=len(node_ids))
+        node_starts = np.concatenate([[0], np.cumsum(out_degree)])
+
+        n_connections = out_degree[to_codes]
+        self.indptr = np.concatenate([[0], np.cumsum(n_connections)]).astype(np.int64)
+        offsets = np.arange(self.indptr[-1]) - np.repeat(self.indptr[:-1], n_connections)
+        self.indices = links_by_from_node[
+            np.repeat(node_starts[to_codes], n_connections) + offsets
+        ].astype(np.int64)
 
     def modal_links_geodataframe(self, modes):
         """
@@ -364,97 +465,369 @@ class SpatialTree(nx.DiGraph):
     def modal_subtree(self, modes):
         """
         :param modes: str of set of strings to consider modal subgraph
-        :return:
+        :return: SpatialTree sharing the connection arrays of this tree, with the links not accepting `modes` masked
         """
-        sub_tree = self.__class__()
         links = gpd.GeoDataFrame(self.modal_links_geodataframe(modes))
-        sub_tree = self.subgraph(links["link_id"])
+        sub_tree = copy.copy(self)
         sub_tree.links = links
+        sub_tree.mask = self.link_ids.isin(links["link_id"])
+        sub_tree._link_weights = {}
+        sub_tree._modal_adjacency = None
+        sub_tree._link_geometry_indexes = {}
+        sub_tree.clear_shortest_path_cache()
         return sub_tree
 
+    def adjacency(self):
+        """
+        Gives the connections between the links of the tree, leaving out masked links
+        :return: (indptr, indices) compressed sparse row arrays
+        """
+        if self.mask is None:
+            return self.indptr, self.indices
+        if self._modal_adjacency is None:
+            sources = np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+            keep = self.mask[sources] & self.mask[self.indices]
+            counts = np.bincount(sources[keep], minlength=len(self.indptr) - 1)
+            self._modal_adjacency = (
+                np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+                self.indices[keep],
+            )
+        return self._modal_adjacency
+
+    def edges(self):
+        """
+        :return: list of (link_id, link_id) pairs of connected links
+        """
+        indptr, indices = self.adjacency()
+        sources = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        return list(zip(self.link_ids[sources], self.link_ids[indices]))
+
+    def link_weights(self, weight):
+        """
+        Gives the cost of routing through each link of the tree, masked links weigh 1
+        :param weight: link attribute to route on, links missing it weigh 1. None for unit weights
+        :return: numpy array of weights in order of `link_ids`
+        """
+        if weight is None:
+            return np.ones(len(self.link_ids))
+        if weight not in self._link_weights:
+            if weight in self.links.columns:
+                values = pd.to_numeric(
+                    self.links[weight].reindex(self.link_ids), errors="coerce"
+                ).fillna(1)
+            else:
+                values = pd.Series(1.0, index=self.link_ids)
+            self._link_weights[weight] = values.to_numpy(dtype=float)
+        return self._link_weights[weight]
+
+    def link_geometry_index(self, epsg):
+        """
+        Gives a spatial index of the link geometries of the tree, projected to a metric crs. Indexes are built once for
+        each crs and kept on the tree
+        :param epsg: int EPSG code of the crs, e.g. a UTM zone from `utm_epsg`
+        :return: (shapely.STRtree, numpy array of projected link geometries in order of `links`)
+        """
+        if epsg not in self._link_geometry_indexes:
+            geometries = self.links["geometry"].to_crs(epsg).to_numpy()
+            self._link_geometry_indexes[epsg] = (shapely.STRtree(geometries), geometries)
+        return self._link_geometry_indexes[epsg]
+
+    def _points_by_utm_zone(self, gdf_points):
+        """
+        Splits points by their UTM zone and projects them to it
+        :param gdf_points: GeoDataFrame in crs: EPSG:4326 shapely.geometry.Points (lon,lat)
+        :return: generator of (positions of points in the zone, numpy array of projected points, spatial index of the
+            links in the zone from `link_geometry_index`)
+        """
+        x, y = gdf_points["geometry"].x.to_numpy(), gdf_points["geometry"].y.to_numpy()
+        zones = utm_epsg(x, y)
+        for epsg in np.unique(zones):
+            in_zone = np.flatnonzero(zones == epsg)
+            points = gpd.GeoSeries(shapely.points(x[in_zone], y[in_zone]), crs="epsg:4326")
+            yield in_zone, points.to_crs(int(epsg)).to_numpy(), self.link_geometry_index(int(epsg))
+
+    def nearest_link_distances(self, gdf_points):
+        """
+        Finds how far the nearest link of the spatial tree is from each point. Distances are measured in the UTM zone
+        of each point.
+        :param gdf_points: GeoDataFrame in crs: EPSG:4326 shapely.geometry.Points (lon,lat)
+        :return: pandas.Series of distances in metres, indexed like `gdf_points`, missing if the tree has no links
+        """
+        distances = np.full(len(gdf_points), np.nan)
+        if not self.links.empty:
+            for in_zone, points, (tree, link_geometries) in self._points_by_utm_zone(gdf_points):
+                (point_idx, _), zone_distances = tree.query_nearest(points, return_distance=True)
+                distances[in_zone[point_idx]] = zone_distances
+        return pd.Series(distances, index=gdf_points.index)
+
     def closest_links(self, gdf_points, distance_radius):
         """
         Given a GeoDataFrame `gdf_points` with a`geometry` column with shapely.geometry.Points,
-        finds closest links within `distance_radius` from the spatial tree which accept `mode`.
+        finds links from the spatial tree within `distance_radius` metres of the points, in one query of a spatial index
+        of links for all points. Distances are measured in the UTM zone of each point.
         Does not work very close to the poles.
         :param gdf_points: GeoDataFrame, uniquely indexed, in crs: EPSG:4326 shapely.geometry.Points (lon,lat)
         :param distance_radius: metres
-        :return: GeoDataFrame
+        :return: GeoDataFrame of `gdf_points` with a row for each link found, with its `link_id` (also under
+            `index_left`) and `distance` in metres, ordered by distance for each point. Points which found no links
+            have a row with missing `link_id`
         """
-        bdds = gdf_points["geometry"].bounds
-        approx_lat = (bdds["miny"].mean() + bdds["maxy"].mean()) / 2
-        approx_degree_radius = approximate_metres_distance_in_4326_degrees(
-            distance_radius, approx_lat
+        point_positions = [np.array([], dtype=int)]
+        link_positions = [np.array([], dtype=int)]
+        distances = [np.array([], dtype=float)]
+        if distance_radius > 0 and not self.links.empty:
+            for in_zone, points, (tree, link_geometries) in self._points_by_utm_zone(gdf_points):
+                point_idx, link_idx = tree.query(
+                    points, predicate="dwithin", distance=distance_radius
+                )
+                point_positions.append(in_zone[point_idx])
+                link_positions.append(link_idx)
+                # self-loop links have degenerate geometries, GEOS measures them fine but flags them as invalid
+                with np.errstate(invalid="ignore"):
+                    distances.append(shapely.distance(points[point_idx], link_geometries[link_idx]))
+
+        found = pd.DataFrame(
+            {
+                "point": np.concatenate(point_positions),
+                "link_id": self.links["link_id"].to_numpy()[np.concatenate(link_positions)],
+                "distance": np.concatenate(distances),
+            }
         )
-        gdf_points["geometry"] = gdf_points["geometry"].apply(
-            lambda x: grow_point(x, approx_degree_radius)
+        not_found = np.setdiff1d(np.arange(len(gdf_points)), found["point"])
+        found = pd.concat(
+            [found, pd.DataFrame({"point": not_found, "link_id": np.nan, "distance": np.nan})],
+            ignore_index=True,
+        ).sort_values(["point", "distance"], kind="stable")
+
+        closest_links = gdf_points.iloc[found["point"].to_numpy()].copy()
+        closest_links["index_left"] = found["link_id"].to_numpy()
+        closest_links["link_id"] = found["link_id"].to_numpy()
+        closest_links["distance"] = found["distance"].to_numpy()
+        return closest_links
+
+    def clear_shortest_path_cache(self):
+        """
+        Empties the cache of shortest paths and their lengths and resets its hit and miss counts
+        :return:
+        """
+        self._shortest_path_cache = OrderedDict()
+        self._shortest_path_cache_stats = {"hits": 0, "misses": 0}
+
+    def shortest_path_cache_info(self):
+        """
+        Reports how link pairs queried through `shortest_paths` and `shortest_path_lengths` were answered
+        :return: dict with 'hits': number of link pairs answered from the cache, 'misses': number of link pairs
+            which needed routing, 'hit_rate': share of link pairs answered from the cache, 'size': number of link
+            pairs in the cache, 'maxsize': maximum number of link pairs kept in the cache
+        """
+        queries = (
+            self._shortest_path_cache_stats["hits"] + self._shortest_path_cache_stats["misses"]
         )
-        try:
-            closest_links = gpd.sjoin(
-                self.links[["link_id", "geometry"]], gdf_points, how="right", predicate="intersects"
-            )
-            return closest_links
-        except EmptySpatialTree:
-            return gpd.GeoDataFrame(
-                columns=set(gdf_points.columns) | {"index_left", "link_id", "geometry"},
-                crs="epsg:4326",
-            )
+        return {
+            **self._shortest_path_cache_stats,
+            "hit_rate": self._shortest_path_cache_stats["hits"] / queries if queries else 0.0,
+            "size": len(self._shortest_path_cache),
+            "maxsize": self.shortest_path_cache_maxsize,
+        }
+
+    def _dijkstra_to_targets(self, source, targets, weight=None):
+        """
+        Single source Dijkstra which stops once all of `targets` are reached, or all paths within the largest of
+        their cutoffs have been explored
+        :param source: link ID to route from
+        :param targets: dict of link IDs to route to: cutoff, the maximum path length to look for, or None
+        :param weight: link attribute to route on, links missing it weigh 1
+        :return: dict of target reachable within its cutoff: (path length, path)
+        """
+        if source not in self:
+            raise nx.NodeNotFound(f"Source {source} is not in G")
+        if any(cutoff is None for cutoff in targets.values()):
+            search_cutoff = float("inf")
+        else:
+            search_cutoff = max(targets.values())
+        target_idx = dict(zip(self.link_ids.get_indexer(list(targets)), targets))
+        target_idx.pop(-1, None)
+        indptr, indices = self.adjacency()
+        weights = self.link_weights(weight)
+
+        source_idx = self.link_ids.get_loc(source)
+        dist = {}
+        seen = {source_idx: 0}
+        pred = {source_idx: None}
+        remaining = set(target_idx)
+        c = itertools.count()
+        fringe = [(0, next(c), source_idx)]
+        while fringe and remaining:
+            d, _, u = heapq.heappop(fringe)
+            if u in dist:
+                continue
+            dist[u] = d
+            remaining.discard(u)
+            vu_dist = d + float(weights[u])
+            if vu_dist > search_cutoff:
+                continue
+            for v in indices[indptr[u] : indptr[u + 1]].tolist():
+                if v not in dist and (v not in seen or vu_dist < seen[v]):
+                    seen[v] = vu_dist
+                    pred[v] = u
+                    heapq.heappush(fringe, (vu_dist, next(c), v))
+
+        results = {}
+        for idx, target in target_idx.items():
+            cutoff = targets[target]
+            if idx in dist and (cutoff is None or dist[idx] <= cutoff):
+                path = [idx]
+                while pred[path[-1]] is not None:
+                    path.append(pred[path[-1]])
+                results[target] = (dist[idx], self.link_ids[path[::-1]].tolist())
+        return results
+
+    def _cached_shortest_paths(self, pairs, weight=None, cutoffs=None):
+        """
+        Finds shortest paths between link pairs, answering pairs from the LRU cache where possible and routing the
+        rest with one Dijkstra search for each source link.
+        The cache keeps paths found, which are shortest whatever the cutoff, and for pairs without a path, the cutoff
+        they were searched up to.
+        :param pairs: list of (source, target) link ID pairs
+        :param weight: edge attribute to route on
+        :param cutoffs: optional list of maximum path lengths to look for, one for each pair, None for no limit. A pair
+            listed more than once is searched up to the largest of its cutoffs
+        :return: dict of (source, target): (path length, path), or None if there is no path within the cutoff
+        """
+        if cutoffs is None:
+            cutoffs = itertools.repeat(None)
+        pair_cutoffs = {}
+        for pair, cutoff in zip(pairs, cutoffs):
+            if cutoff is None or pd.isna(cutoff):
+                cutoff = float("inf")
+            pair_cutoffs[pair] = max(cutoff, pair_cutoffs.get(pair, cutoff))
+
+        cache = self._shortest_path_cache
+        results = {}
+        targets_to_route = {}
+        for (source, target), cutoff in pair_cutoffs.items():
+            key = (weight, source, target)
+            cached = cache.get(key)
+            if cached is not None and (cached[1] is not None or cutoff <= cached[0]):
+                cache.move_to_end(key)
+                length, path = cached
+                results[(source, target)] = (
+                    cached if path is not None and length <= cutoff else None
+                )
+                self._shortest_path_cache_stats["hits"] += 1
+            else:
+                targets_to_route.setdefault(source, {})[target] = (
+                    None if cutoff == float("inf") else cutoff
+                )
+                self._shortest_path_cache_stats["misses"] += 1
 
-    def path(self, G, source, target, weight=None):
+        for source, targets in targets_to_route.items():
+            try:
+                routed = self._dijkstra_to_targets(source, targets, weight=weight)
+            except nx.NodeNotFound:
+                routed = {}
+            for target in targets:
+                key = (weight, source, target)
+                if target in routed:
+                    results[(source, target)] = cache[key] = routed[target]
+                else:
+                    results[(source, target)] = None
+                    cache[key] = (pair_cutoffs[(source, target)], None)
+                    cache.move_to_end(key)
+        while len(cache) > self.shortest_path_cache_maxsize:
+            cache.popitem(last=False)
+        return results
+
+    def path(self, source, target, weight=None):
+        """
+        Finds the shortest path between two links, without the cache
+        :param source: link ID to route from
+        :param target: link ID to route to
+        :param weight: link attribute to route on
+        :return: list of link IDs, or None if there is no path
+        """
         try:
-            return nx.shortest_path(G, source, target, weight=weight)
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
+            return self._dijkstra_to_targets(source, {target: None}, weight=weight)[target][1]
+        except (KeyError, nx.NodeNotFound):
             pass
 
-    def shortest_paths(self, df_pt_edges, from_col="u", to_col="v", weight="length"):
+    def shortest_paths(
+        self, df_pt_edges, from_col="u", to_col="v", weight="length", cutoff_col=None
+    ):
         """
         :param df_pt_edges: pandas DataFrame with a `from_col` and `to_col` defining links stored in the graph for
         which a path is required
         :param from_col: name of the column which gives ID for the source link
         :param to_col: name of the column which gives ID for the target link
         :param weight: weight for routing, defaults ot length
-        :return: df_pt_edges with an extra column 'shortest_path'
+        :param cutoff_col: optional name of the column which gives the maximum path length to look for between the
+            links, the search for links further apart stops early and they are given no path. Missing values, or no
+            `cutoff_col`, mean no limit
+        :return: df_pt_edges with an extra column 'shortest_path'. Link pairs are routed with one Dijkstra search for
+            each source link and the paths are cached on the tree, see `shortest_path_cache_info`
         """
         if df_pt_edges.empty:
             df_pt_edges["shortest_path"] = None
         else:
             try:
-                df_pt_edges["shortest_path"] = df_pt_edges.apply(
-                    lambda x: self.path(
-                        G=self, source=x[from_col], target=x[to_col], weight=weight
-                    ),
-                    axis=1,
+                pairs = list(zip(df_pt_edges[from_col], df_pt_edges[to_col]))
+                paths = self._cached_shortest_paths(
+                    pairs,
+                    weight=weight,
+                    cutoffs=None if cutoff_col is None else list(df_pt_edges[cutoff_col]),
                 )
+                df_pt_edges["shortest_path"] = [
+                    None if paths[pair] is None else list(paths[pair][1]) for pair in pairs
+                ]
             except EmptySpatialTree:
                 logging.warning("Shortest path could not be found due to an empty SpatialTree")
                 df_pt_edges["shortest_path"] = None
         return df_pt_edges
 
-    def path_length(self, G, source, target, weight=None):
+    def path_length(self, source, target, weight=None):
+        """
+        Finds the length of the shortest path between two links, without the cache
+        :param source: link ID to route from, raises networkx.NodeNotFound if it is not in the tree
+        :param target: link ID to route to
+        :param weight: link attribute to route on
+        :return: path length, or None if there is no path
+        """
         try:
-            return nx.dijkstra_path_length(G, source=source, target=target, weight=weight)
-        except nx.NetworkXNoPath:
+            return self._dijkstra_to_targets(source, {target: None}, weight=weight)[target][0]
+        except KeyError:
             pass
 
-    def shortest_path_lengths(self, df_pt_edges, from_col="u", to_col="v", weight="length"):
+    def shortest_path_lengths(
+        self, df_pt_edges, from_col="u", to_col="v", weight="length", cutoff_col=None
+    ):
         """
         :param df_pt_edges: pandas DataFrame with a `from_col` and `to_col` defining links stored in the graph for
         which a path length is required
         :param from_col: name of the column which gives ID for the source link
         :param to_col: name of the column which gives ID for the target link
         :param weight: weight for routing, defaults ot length
-        :return: df_pt_edges with an extra column 'shortest_path'
+        :param cutoff_col: optional name of the column which gives the maximum path length to look for between the
+            links, the search for links further apart stops early and they are given no path. Missing values, or no
+            `cutoff_col`, mean no limit
+        :return: df_pt_edges with an extra column 'path_lengths'. Link pairs are routed with one Dijkstra search for
+            each source link and the path lengths are cached on the tree, see `shortest_path_cache_info`
         """
         if df_pt_edges.empty:
             df_pt_edges["path_lengths"] = None
         else:
             try:
-                df_pt_edges["path_lengths"] = df_pt_edges.apply(
-                    lambda x: self.path_length(
-                        G=self, source=x[from_col], target=x[to_col], weight=weight
-                    ),
-                    axis=1,
+                pairs = list(zip(df_pt_edges[from_col], df_pt_edges[to_col]))
+                for source in set(df_pt_edges[from_col]):
+                    if source not in self:
+                        raise nx.NodeNotFound(f"Source {source} is not in G")
+                paths = self._cached_shortest_paths(
+                    pairs,
+                    weight=weight,
+                    cutoffs=None if cutoff_col is None else list(df_pt_edges[cutoff_col]),
                 )
+                df_pt_edges["path_lengths"] = [
+                    None if paths[pair] is None else paths[pair][0] for pair in pairs
+                ]
             except EmptySpatialTree:
                 df_pt_edges["path_lengths"] = None
         return df_pt_edges
@@ -69,3 +69,9 @@ EXTENDED_TYPE_MAP = dict(zip(new_keys, new_values))
 del new_keys, new_values
 
 EPSG4326 = "epsg:4326"
+
+# version of the binary snapshot format of genet.Network, bump when the layout of the snapshot changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+# version of the memory-mappable link store format of genet.Network, bump when the layout of the files changes
+LINK_STORE_FORMAT_VERSION = 1
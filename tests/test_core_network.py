@@ -2,7 +2,6 @@ import ast
 import json
 import logging
 import os
-import uuid
 
 import geopandas as gpd
 import lxml
@@ -2026,6 +2025,25 @@ def test_adding_multiple_links_to_same_edge_clashing_with_existing_edge(assert_s
     )
 
 
+def test_adding_multiple_links_resolves_passed_multi_idx_clashing_within_added_links():
+    n = Network("epsg:27700")
+    n.add_link(link_id="0", u="1", v="2", multi_edge_idx=1)
+
+    reindexing_dict, links = n.add_links(
+        {
+            "1": {"from": "1", "to": "2", "multi_edge_idx": 1, "length": 1},
+            "2": {"from": "1", "to": "2", "multi_edge_idx": 1, "length": float("nan")},
+        }
+    )
+
+    assert reindexing_dict == {}
+    assert [n.link_id_mapping[i]["multi_edge_idx"] for i in ["0", "1", "2"]] == [1, 2, 3]
+    assert links == {
+        "1": {"from": "1", "to": "2", "length": 1, "id": "1"},
+        "2": {"from": "1", "to": "2", "id": "2"},
+    }
+
+
 def test_network_modal_subgraph_using_general_subgraph_on_link_attribs():
     n = Network("epsg:27700")
     n.add_link("0", 1, 2, attribs={"modes": ["car", "bike"]})
@@ -2078,6 +2096,71 @@ def test_links_on_modal_condition():
     assert set(car_links) == {"0", "1"}
 
 
+def test_links_on_modal_condition_are_kept_up_to_date_and_reported_in_modal_cache_info():
+    n = Network("epsg:27700")
+    n.add_link("0", 1, 2, attribs={"modes": {"car", "bike"}})
+    n.add_link("1", 2, 3, attribs={"modes": {"car"}})
+
+    assert set(n.links_on_modal_condition("car")) == {"0", "1"}
+    n.add_links({"2": {"from": 3, "to": 1, "modes": {"car"}}})
+    n.remove_mode_from_links(["1"], "car")
+    n.remove_links(["0"])
+
+    assert n.links_on_modal_condition("car") == ["2"]
+    assert n.links_on_modal_condition("bike") == []
+    assert n.modal_cache_info() == {"hits": 2, "misses": 1, "modes": {"car": 1}}
+
+
+@pytest.fixture()
+def network_with_car_and_bus_links():
+    n = Network("epsg:27700")
+    n.add_nodes(
+        {
+            1: {"x": 528704.1, "y": 182068.7},
+            2: {"x": 528804.1, "y": 182068.7},
+            3: {"x": 528804.1, "y": 182168.7},
+        }
+    )
+    n.add_link("0", 1, 2, attribs={"modes": {"car", "bus"}, "length": 100})
+    n.add_link("1", 2, 3, attribs={"modes": {"car"}, "length": 100})
+    return n
+
+
+def test_spatial_tree_and_its_modal_subtrees_are_built_once(network_with_car_and_bus_links, mocker):
+    n = network_with_car_and_bus_links
+    mocker.spy(spatial.SpatialTree, "add_links")
+    mocker.spy(spatial.SpatialTree, "modal_subtree")
+
+    tree = n.spatial_tree()
+    bus_tree = n.spatial_tree("bus")
+
+    assert set(tree.link_ids) == {"0", "1"}
+    assert set(bus_tree.links["link_id"]) == {"0"}
+    assert n.spatial_tree() is tree
+    assert n.spatial_tree({"bus"}) is bus_tree
+    assert n.spatial_tree(["bus"]) is bus_tree
+    spatial.SpatialTree.add_links.assert_called_once()
+    spatial.SpatialTree.modal_subtree.assert_called_once()
+
+
+def test_spatial_tree_is_built_again_when_links_change(network_with_car_and_bus_links):
+    n = network_with_car_and_bus_links
+    tree = n.spatial_tree()
+    assert set(n.spatial_tree("bus").links["link_id"]) == {"0"}
+
+    n.add_link("2", 3, 1, attribs={"modes": {"bus"}, "length": 100})
+    assert n.spatial_tree() is not tree
+    assert set(n.spatial_tree("bus").links["link_id"]) == {"0", "2"}
+
+    n.apply_attributes_to_link("0", {"modes": {"car"}})
+    assert set(n.spatial_tree("bus").links["link_id"]) == {"2"}
+
+    n.remove_link("2")
+    assert set(n.spatial_tree().link_ids) == {"0", "1"}
+    with pytest.raises(exceptions.EmptySpatialTree):
+        n.spatial_tree("bus")
+
+
 def test_nodes_on_modal_condition():
     n = Network("epsg:27700")
     n.add_link("0", 1, 2, attribs={"modes": ["car", "bike"]})
@@ -3044,6 +3127,107 @@ def test_modify_link_overwrites_existing_attributes_in_the_graph_and_change_is_r
     )
 
 
+def test_modify_links_with_change_log_level_ids_only_records_ids_of_changed_links():
+    n = Network("epsg:27700")
+    n.add_link("0", 1, 2, attribs={"a": {"b": 1}})
+    n.add_link("1", 1, 2, attribs={"c": 100})
+    n.set_change_log_level("ids_only")
+    n.apply_attributes_to_links({"0": {"a": {"b": 100}}, "1": {"a": {"b": 10}}})
+
+    assert n.link("0") == {"a": {"b": 100}, "from": 1, "to": 2, "id": "0"}
+    assert n.change_log["new_id"].tolist()[-2:] == ["0", "1"]
+    assert n.change_log["new_attributes"].tolist()[-2:] == [None, None]
+
+
+def test_modify_links_with_change_log_level_off_records_nothing():
+    n = Network("epsg:27700")
+    n.add_link("0", 1, 2, attribs={"a": {"b": 1}})
+    n.set_change_log_level("off")
+    n.apply_attributes_to_links({"0": {"a": {"b": 100}}})
+    n.apply_attributes_to_link("0", {"c": 1})
+
+    assert n.link("0") == {"a": {"b": 100}, "from": 1, "to": 2, "id": "0", "c": 1}
+    assert n.change_log["change_event"].tolist() == ["add"]
+
+
+def test_updating_link_columns_changes_attributes_in_the_graph_and_records_changes_in_change_log():
+    n = Network("epsg:27700")
+    n.add_link("0", 1, 2, attribs={"freespeed": 10.0, "capacity": 600.0, "attributes": {"a": 1}})
+    n.add_link("1", 1, 2, attribs={"freespeed": 20.0})
+    n.update_link_columns(
+        pd.DataFrame({"freespeed": [5.0, 10.0], "capacity": [300.0, None]}, index=["0", "1"])
+    )
+
+    assert n.link("0") == {
+        "freespeed": 5.0,
+        "capacity": 300.0,
+        "attributes": {"a": 1},
+        "from": 1,
+        "to": 2,
+        "id": "0",
+    }
+    assert n.link("1") == {"freespeed": 10.0, "from": 1, "to": 2, "id": "1"}
+    assert n.change_log["change_event"].tolist()[-2:] == ["modify", "modify"]
+    assert n.change_log["diff"].tolist()[-2:] == [
+        [("change", "freespeed", (10.0, 5.0)), ("change", "capacity", (600.0, 300.0))],
+        [("change", "freespeed", (20.0, 10.0))],
+    ]
+
+
+def test_updating_link_columns_of_missing_link_raises_error_and_changes_nothing():
+    n = Network("epsg:27700")
+    n.add_link("0", 1, 2, attribs={"freespeed": 10.0})
+
+    with pytest.raises(KeyError):
+        n.update_link_columns(pd.DataFrame({"freespeed": [5.0, 5.0]}, index=["0", "missing"]))
+    assert n.link("0")["freespeed"] == 10.0
+
+
+def test_updating_link_columns_defining_the_graph_raises_error():
+    n = Network("epsg:27700")
+    n.add_link("0", 1, 2)
+
+    with pytest.raises(RuntimeError) as error_info:
+        n.update_link_columns(pd.DataFrame({"from": [3]}, index=["0"]))
+    assert "cannot be updated" in str(error_info.value)
+
+
+def test_link_attribute_index_is_kept_up_to_date_with_changes_to_links():
+    n = Network("epsg:27700")
+    n.add_link("0", 1, 2, attribs={"attributes": {"osm:way:osmid": "10"}})
+    n.add_link("1", 2, 3, attribs={"attributes": {"osm:way:osmid": "20"}})
+    n.index_link_attribute({"attributes": "osm:way:osmid"})
+
+    n.add_links({"2": {"from": 3, "to": 1, "attributes": {"osm:way:osmid": "10"}}})
+    n.apply_attributes_to_links({"0": {"attributes": {"osm:way:osmid": "30"}}})
+    n.remove_link("1")
+    n.reindex_link("2", "5")
+
+    def extract(osmid):
+        return n.extract_links_on_edge_attributes(
+            conditions={"attributes": {"osm:way:osmid": osmid}}
+        )
+
+    assert extract("10") == ["5"]
+    assert extract("20") == []
+    assert extract("30") == ["0"]
+
+    n.remove_node(3)
+
+    assert extract("10") == []
+
+
+def test_node_attribute_index_is_kept_up_to_date_with_changes_to_nodes():
+    n = Network("epsg:27700")
+    n.add_nodes({"1": {"x": 1, "y": 1, "type": "junction"}, "2": {"x": 2, "y": 2}})
+    n.index_node_attribute("type")
+
+    n.apply_attributes_to_node("2", {"type": "junction"})
+    n.reindex_node("1", "3")
+
+    assert sorted(n.extract_nodes_on_node_attributes(conditions={"type": "junction"})) == ["2", "3"]
+
+
 def test_modify_link_adds_attributes_in_the_graph_with_multiple_edges():
     n = Network("epsg:27700")
     n.add_link("0", 1, 2, attribs={"a": 1})
@@ -3312,6 +3496,47 @@ def test_removing_multiple_links():
     )
 
 
+def test_replacing_links_removes_their_nodes_and_adds_new_links():
+    n = Network("epsg:27700")
+    n.add_link("0", 1, 2, attribs={"a": 1})
+    n.add_link("1", 2, 3, attribs={"a": 1})
+    n.add_link("2", 1, 3, attribs={"b": 4})
+
+    n.replace_links(["0", "1"], [2], {"3": {"id": "3", "from": 1, "to": 3, "a": 2}})
+
+    assert list(n.graph.nodes) == [1, 3]
+    assert list(n.graph.edges(keys=True, data=True)) == [
+        (1, 3, 0, {"b": 4, "from": 1, "to": 3, "id": "2"}),
+        (1, 3, 1, {"id": "3", "from": 1, "to": 3, "a": 2}),
+    ]
+    assert n.link_id_mapping == {
+        "2": {"from": 1, "to": 3, "multi_edge_idx": 0},
+        "3": {"from": 1, "to": 3, "multi_edge_idx": 1},
+    }
+    assert n.link_attribute_data_under_keys(["a"]).to_dict() == {"a": {"3": 2}}
+    assert list(
+        n.change_log.tail(4)[["change_event", "object_type", "old_id", "new_id"]].values.tolist()
+    ) == [
+        ["remove", "link", "0", None],
+        ["remove", "link", "1", None],
+        ["remove", "node", 2, None],
+        ["add", "link", None, "3"],
+    ]
+
+
+def test_replacing_links_ignoring_change_log_does_not_log_changes():
+    n = Network("epsg:27700")
+    n.add_link("0", 1, 2)
+    n.add_link("1", 2, 3)
+    change_log_length = len(n.change_log)
+
+    n.replace_links(["0", "1"], [2], {"2": {"id": "2", "from": 1, "to": 3}}, ignore_change_log=True)
+
+    assert list(n.graph.edges) == [(1, 3, 0)]
+    assert set(n.link_id_mapping) == {"2"}
+    assert len(n.change_log) == change_log_length
+
+
 @pytest.fixture()
 def islands_network_in_line():
     n = Network("epsg:4326")
@@ -4210,14 +4435,27 @@ def test_generate_index_for_node_gives_string_based_on_length_node_ids_when_you_
     assert n.generate_index_for_node() == "3"
 
 
-def test_generate_index_for_node_gives_uuid4_as_last_resort(mocker):
-    mocker.patch.object(uuid, "uuid4")
+def test_generate_index_for_node_skips_ids_already_in_use():
     n = Network("epsg:27700")
     n.add_node("1w", {"x": 1, "y": 2})
     n.add_node("1x", {"x": 1, "y": 2})
     n.add_node("4", {"x": 1, "y": 2})
-    n.generate_index_for_node()
-    uuid.uuid4.assert_called_once()
+    assert n.generate_index_for_node() == "5"
+
+
+def test_generated_node_ids_are_not_generated_again():
+    n = Network("epsg:27700")
+    n.add_node("1", {"x": 1, "y": 2})
+    assert n.generate_index_for_node() == "2"
+    assert n.generate_indices_for_n_nodes(2, avoid_keys={"4"}) == {"3", "5"}
+
+
+def test_generated_link_ids_skip_ids_already_in_use_and_ids_to_avoid():
+    n = Network("epsg:27700")
+    n.add_links({"1": {"from": 0, "to": 1}, "3": {"from": 0, "to": 1}})
+    n.add_link("4", 0, 1)
+    assert n.generate_indices_for_n_edges(3, avoid_keys=["0"]) == {"2", "5", "6"}
+    assert n.generate_index_for_edge() == "7"
 
 
 def test_generating_n_indicies_for_nodes():
@@ -1179,6 +1179,37 @@ def test_applying_attributes_to_route(schedule):
     assert schedule.route("1").route_short_name == "new_name"
 
 
+def test_routes_and_services_from_graph_have_the_same_attributes_as_constructed_ones(schedule):
+    for route_id, route_data in schedule._graph.graph["routes"].items():
+        route = Route(_graph=schedule._graph, **route_data)
+        assert schedule.route(route_id).__dict__ == route.__dict__
+    service = Service(_graph=schedule._graph, **schedule._graph.graph["services"]["service"])
+    assert schedule["service"].__dict__ == service.__dict__
+
+
+def test_schedule_gives_out_the_same_route_and_service_objects_until_they_change(schedule):
+    route = schedule.route("1")
+    service = schedule["service"]
+    assert schedule.route("1") is route
+    assert service.route("1") is route
+    assert list(schedule.services())[0] is service
+
+    schedule.apply_attributes_to_routes({"1": {"route_short_name": "new_name"}})
+
+    assert schedule.route("1") is not route
+    assert schedule.route("1").route_short_name == "new_name"
+    assert schedule["service"].route("1") is schedule.route("1")
+
+
+def test_route_objects_are_rebuilt_after_reprojecting_schedule(schedule):
+    route = schedule.route("1")
+
+    schedule.reproject("epsg:4326")
+
+    assert route.epsg == "epsg:27700"
+    assert schedule.route("1").epsg == "epsg:4326"
+
+
 def test_applying_mode_attributes_to_route_results_in_correct_mode_methods(schedule):
     assert schedule.route("1").mode == "bus"
     assert schedule.modes() == {"bus"}
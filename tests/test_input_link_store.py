@@ -0,0 +1,146 @@
+import copy
+import pickle
+
+import pandas as pd
+import pytest
+from shapely.geometry import LineString
+
+import genet
+from genet.exceptions import SnapshotFormatError
+from genet.input import link_store
+
+LINK_KEYS = [
+    "id",
+    "from",
+    "length",
+    "freespeed",
+    "modes",
+    "geometry",
+    "oneway",
+    {"attributes": "osm:way:highway"},
+]
+
+
+@pytest.fixture()
+def network_with_mixed_link_data(network_object_from_test_data):
+    n = network_object_from_test_data
+    n.add_link(
+        "extra_link",
+        "21667818",
+        "25508485",
+        attribs={
+            "length": 10.0,
+            "freespeed": 10,
+            "modes": {"car", "bike"},
+            "geometry": LineString([(528504.1, 182155.7), (528489.4, 182206.2)]),
+            "s2_from": 2**63 + 5,
+            "attributes": {"osm:way:highway": "primary"},
+        },
+    )
+    return n
+
+
+@pytest.fixture()
+def network_from_link_store(network_with_mixed_link_data, tmpdir):
+    return genet.read_link_store(network_with_mixed_link_data.write_link_store(tmpdir))
+
+
+def test_link_store_network_gives_the_same_links(
+    network_with_mixed_link_data, network_from_link_store
+):
+    n, m = network_with_mixed_link_data, network_from_link_store
+
+    assert dict(m.links()) == dict(n.links())
+    assert m.link("extra_link") == n.link("extra_link")
+    assert m.edge_tuple_from_link_id("extra_link") == n.edge_tuple_from_link_id("extra_link")
+    assert m.has_link("extra_link")
+    assert not m.has_link("missing_link")
+    assert m.link_store is not None
+
+
+def test_link_store_network_gives_the_same_nodes(
+    network_with_mixed_link_data, network_from_link_store
+):
+    n, m = network_with_mixed_link_data, network_from_link_store
+
+    assert dict(m.nodes()) == dict(n.nodes())
+    assert m.node("21667818") == n.node("21667818")
+    assert m.has_node("21667818")
+    assert m.link_store is not None
+
+
+def test_link_store_network_gives_the_same_link_data_under_keys(
+    network_with_mixed_link_data, network_from_link_store
+):
+    n, m = network_with_mixed_link_data, network_from_link_store
+
+    pd.testing.assert_frame_equal(
+        m.link_attribute_data_under_keys(LINK_KEYS, index_name="link_id"),
+        n.link_attribute_data_under_keys(LINK_KEYS, index_name="link_id"),
+    )
+    for key in LINK_KEYS:
+        pd.testing.assert_series_equal(
+            m.link_attribute_data_under_key(key), n.link_attribute_data_under_key(key)
+        )
+    assert m.link_store is not None
+
+
+def test_link_store_network_builds_the_graph_when_it_is_needed(
+    network_with_mixed_link_data, network_from_link_store
+):
+    n, m = network_with_mixed_link_data, network_from_link_store
+
+    assert set(m.graph.nodes) == set(n.graph.nodes)
+    assert m.link_store is None
+    assert dict(m.graph.nodes(data=True)) == dict(n.graph.nodes(data=True))
+    assert {(u, v, k): data for u, v, k, data in m.graph.edges(keys=True, data=True)} == {
+        (u, v, k): data for u, v, k, data in n.graph.edges(keys=True, data=True)
+    }
+    assert m.graph.graph == n.graph.graph
+    assert m.link_id_mapping == n.link_id_mapping
+    assert m.attributes == n.attributes
+
+
+def test_link_store_network_can_be_modified(network_from_link_store):
+    network_from_link_store.apply_attributes_to_link("extra_link", {"freespeed": 20.0})
+
+    assert network_from_link_store.link_store is None
+    assert network_from_link_store.link("extra_link")["freespeed"] == 20.0
+    assert len(network_from_link_store.change_log) == 1
+
+
+def test_empty_network_link_store_reads_back(tmpdir):
+    n = genet.read_link_store(genet.Network("epsg:27700").write_link_store(tmpdir))
+
+    assert list(n.links()) == []
+    assert n.graph.number_of_nodes() == 0
+
+
+def test_writing_link_store_over_another_does_not_keep_its_columns(
+    network_with_mixed_link_data, tmpdir
+):
+    network_with_mixed_link_data.write_link_store(tmpdir)
+    n = genet.Network("epsg:27700")
+    n.add_nodes({"1": {"id": "1", "x": 1.0, "y": 2.0}, "2": {"id": "2", "x": 2.0, "y": 2.0}})
+    n.add_link("1", "1", "2", attribs={"length": 1.0})
+
+    m = genet.read_link_store(n.write_link_store(tmpdir))
+
+    assert dict(m.links()) == dict(n.links())
+
+
+def test_link_store_is_not_copied_with_the_network(network_from_link_store):
+    store = network_from_link_store.link_store
+
+    assert copy.deepcopy(store) is store
+    unpickled = pickle.loads(pickle.dumps(store))
+    assert dict(unpickled.links()) == dict(store.links())
+
+
+def test_reading_link_store_of_different_version_raises_error(mocker, tmpdir):
+    path = genet.Network("epsg:27700").write_link_store(tmpdir)
+    mocker.patch.object(link_store, "LINK_STORE_FORMAT_VERSION", -1)
+
+    with pytest.raises(SnapshotFormatError) as error_info:
+        genet.read_link_store(path)
+    assert "format version" in str(error_info.value)
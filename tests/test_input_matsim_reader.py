@@ -1,3 +1,4 @@
+import logging
 import os
 from dataclasses import dataclass, field
 
@@ -5,6 +6,7 @@ import pytest
 from pyproj import Proj, Transformer
 from shapely.geometry import LineString
 
+from benchmarks.synthetic_network import write_grid_network_xml
 from genet.input import matsim_reader, read
 from genet.schedule_elements import Route, Service, Stop
 from genet.utils import java_dtypes
@@ -381,6 +383,99 @@ def test_read_network_builds_graph_with_unique_links_given_matsim_network_with_c
     assert_semantically_equal(duplicated_link_ids, {"1": ["1_1"]})
 
 
+def test_read_network_logs_throughput(caplog):
+    transformer = Transformer.from_proj(Proj("epsg:27700"), Proj("epsg:4326"), always_xy=True)
+    with caplog.at_level(logging.INFO):
+        matsim_reader.read_network(pt2matsim_network_multiple_edges_test_file, transformer)
+
+    assert "Processed 4 MATSim network nodes and links" in caplog.records[-1].message
+
+
+def test_read_network_releases_parsed_elements(mocker):
+    transformer = Transformer.from_proj(Proj("epsg:27700"), Proj("epsg:4326"), always_xy=True)
+    release_spy = mocker.spy(matsim_reader, "_release")
+
+    g, _, _, _, _ = matsim_reader.read_network(
+        pt2matsim_network_multiple_edges_test_file, transformer
+    )
+
+    assert release_spy.call_count == len(g.nodes) + len(g.edges)
+    for call in release_spy.call_args_list:
+        elem = call.args[0]
+        assert not elem.attrib
+        assert len(elem) == 0
+
+
+@pytest.mark.parametrize(
+    "network_file",
+    [
+        pt2matsim_network_test_file,
+        pt2matsim_network_clashing_link_ids_test_file,
+        pt2matsim_network_clashing_node_ids_test_file,
+        pt2matsim_network_with_geometry_file,
+        MATSIM_DATA_DIR / "network_with_additional_node_attrib.xml",
+    ],
+)
+def test_reading_network_in_shards_gives_the_same_result_as_serial_read(network_file):
+    transformer = Transformer.from_proj(Proj("epsg:27700"), Proj("epsg:4326"), always_xy=True)
+
+    serial = matsim_reader.read_network(network_file, transformer)
+    sharded = matsim_reader.read_network(network_file, transformer, processes=2)
+
+    assert list(sharded[0].nodes(data=True)) == list(serial[0].nodes(data=True))
+    assert list(sharded[0].edges(keys=True, data=True)) == list(
+        serial[0].edges(keys=True, data=True)
+    )
+    assert sharded[1:] == serial[1:]
+
+
+def test_sharding_network_file_splits_sections_on_element_boundaries(tmpdir):
+    network_file = os.path.join(tmpdir, "network.xml")
+    write_grid_network_xml(network_file, side=3)
+    skeleton, node_shards, link_shards = matsim_reader.shard_network_file(network_file, n_shards=2)
+    with open(network_file, "rb") as f:
+        contents = f.read()
+
+    assert len(node_shards) == 2
+    assert len(link_shards) == 2
+    for shards in [node_shards, link_shards]:
+        for (_, end), (next_start, _) in zip(shards[:-1], shards[1:]):
+            assert end == next_start
+    for start, end in node_shards:
+        assert contents[start:end].lstrip().startswith(b"<node ")
+    for start, end in link_shards:
+        assert contents[start:end].lstrip().startswith(b"<link ")
+    assert b"<node " not in skeleton
+    assert b"<link " not in skeleton
+    assert b"<nodes>" in skeleton
+    assert b"</links>" in skeleton
+
+
+def test_sharding_falls_back_to_serial_read_without_nodes_section(tmpdir, caplog):
+    network_file = os.path.join(tmpdir, "network.xml")
+    with open(network_file, "w") as f:
+        f.write("<network></network>")
+    transformer = Transformer.from_proj(Proj("epsg:27700"), Proj("epsg:4326"), always_xy=True)
+
+    g, _, _, _, _ = matsim_reader.read_network(network_file, transformer, processes=2)
+
+    assert len(g) == 0
+    assert "will be read in a single process" in caplog.text
+
+
+def test_reading_matsim_network_with_processes_records_duplicated_links_in_change_log(
+    assert_semantically_equal,
+):
+    serial = read.read_matsim_network(pt2matsim_network_clashing_link_ids_test_file, "epsg:27700")
+    sharded = read.read_matsim_network(
+        pt2matsim_network_clashing_link_ids_test_file, "epsg:27700", processes=2
+    )
+
+    assert_semantically_equal(dict(sharded.links()), dict(serial.links()))
+    assert_semantically_equal(sharded.link_id_mapping, serial.link_id_mapping)
+    assert len(sharded.change_log) == len(serial.change_log) == 1
+
+
 def test_read_network_rejects_non_unique_nodes(assert_semantically_equal):
     correct_nodes = {
         "21667818": {
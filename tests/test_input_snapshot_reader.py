@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+from geopandas.testing import assert_geodataframe_equal
+from shapely.geometry import LineString
+
+import genet
+from genet.exceptions import SnapshotFormatError
+from genet.input import snapshot_reader
+from genet.output import snapshot_writer
+from genet.utils import spatial
+
+AUXILIARY_FILES_DIR = pytest.test_data_dir / "auxiliary_files"
+
+
+@pytest.fixture()
+def network_with_mixed_link_data(network_object_from_test_data):
+    n = network_object_from_test_data
+    n.add_link(
+        "extra_link",
+        "21667818",
+        "25508485",
+        attribs={
+            "length": 10,
+            "modes": {"car"},
+            "geometry": LineString([(528504.1, 182155.7), (528489.4, 182206.2)]),
+            "s2_from": 2**63 + 5,
+            "attributes": {"osm:way:highway": "primary"},
+        },
+    )
+    n.apply_attributes_to_link("1", {"freespeed": 10.0})
+    n.read_auxiliary_link_file(AUXILIARY_FILES_DIR / "links_benchmark.json")
+    return n
+
+
+def assert_networks_equal(n, m):
+    assert list(m.graph.nodes(data=True)) == list(n.graph.nodes(data=True))
+    assert list(m.graph.edges(keys=True, data=True)) == list(n.graph.edges(keys=True, data=True))
+    assert m.graph.graph == n.graph.graph
+    assert m.link_id_mapping == n.link_id_mapping
+    assert m.attributes == n.attributes
+    assert m.epsg == n.epsg
+    assert m.change_log.to_dict() == n.change_log.to_dict()
+    assert list(m.schedule.graph().nodes(data=True)) == list(n.schedule.graph().nodes(data=True))
+    assert list(m.schedule.graph().edges(data=True)) == list(n.schedule.graph().edges(data=True))
+    for key in ["routes", "services", "route_to_service_map", "service_to_route_map", "crs"]:
+        assert m.schedule.graph().graph[key] == n.schedule.graph().graph[key]
+    assert m.schedule.vehicles == n.schedule.vehicles
+    assert m.schedule.vehicle_types == n.schedule.vehicle_types
+    assert m.schedule.minimal_transfer_times == n.schedule.minimal_transfer_times
+
+
+def test_network_read_from_snapshot_is_the_same_as_written(network_with_mixed_link_data, tmpdir):
+    path = network_with_mixed_link_data.write_snapshot(tmpdir / "network")
+
+    assert path.endswith(".npz")
+    assert_networks_equal(network_with_mixed_link_data, genet.read_snapshot(path))
+
+
+def test_compressed_network_snapshot_is_the_same_as_written(network_with_mixed_link_data, tmpdir):
+    path = network_with_mixed_link_data.write_snapshot(tmpdir / "network.npz", compress=True)
+
+    assert_networks_equal(network_with_mixed_link_data, genet.read_snapshot(path))
+
+
+def test_snapshot_keeps_auxiliary_files(network_with_mixed_link_data, tmpdir):
+    path = network_with_mixed_link_data.write_snapshot(tmpdir / "network")
+
+    aux_file = genet.read_snapshot(path).auxiliary_files["link"]["links_benchmark.json"]
+
+    assert (
+        aux_file.data
+        == network_with_mixed_link_data.auxiliary_files["link"]["links_benchmark.json"].data
+    )
+    assert aux_file.is_attached()
+
+
+def test_snapshot_with_spatial_tree_gives_network_with_the_tree_built(
+    network_with_mixed_link_data, tmpdir, mocker
+):
+    tree = network_with_mixed_link_data.spatial_tree()
+    path = network_with_mixed_link_data.write_snapshot(tmpdir / "network", spatial_tree=True)
+    mocker.spy(spatial.SpatialTree, "add_links")
+
+    read_tree = genet.read_snapshot(path).spatial_tree()
+
+    spatial.SpatialTree.add_links.assert_not_called()
+    assert_geodataframe_equal(read_tree.links, tree.links)
+    np.testing.assert_array_equal(read_tree.indptr, tree.indptr)
+    np.testing.assert_array_equal(read_tree.indices, tree.indices)
+
+
+def test_snapshot_without_spatial_tree_gives_network_building_the_tree(
+    network_with_mixed_link_data, tmpdir, mocker
+):
+    network_with_mixed_link_data.spatial_tree()
+    path = network_with_mixed_link_data.write_snapshot(tmpdir / "network")
+    mocker.spy(spatial.SpatialTree, "add_links")
+
+    genet.read_snapshot(path).spatial_tree()
+
+    spatial.SpatialTree.add_links.assert_called_once()
+
+
+def test_empty_network_snapshot_reads_back(tmpdir):
+    n = genet.Network("epsg:27700")
+    path = n.write_snapshot(tmpdir / "network")
+
+    m = genet.read_snapshot(path)
+
+    assert len(m.graph) == 0
+    assert m.link_id_mapping == {}
+    assert not m.schedule
+
+
+def test_table_columns_are_stored_natively_when_values_share_a_type():
+    arrays = {}
+    records = [
+        {"a": 1.0, "b": "x", "modes": {"car", "bus"}, "geometry": LineString([(0, 0), (1, 1)])},
+        {"a": 2.0, "b": 3, "modes": {"walk"}},
+    ]
+
+    snapshot_writer.encode_table(arrays, "table", ["0", "1"], records)
+
+    assert arrays["table/native/a"].dtype == np.float64
+    assert "table/native/b" not in arrays
+    assert set(arrays["table/set/modes"]) == {"car", "bus", "walk"}
+    assert arrays["table/geometry/geometry/mask"].tolist() == [True, False]
+    assert snapshot_reader.decode_table(arrays, "table") == (["0", "1"], records)
+
+
+def test_table_with_ids_of_mixed_types_reads_back():
+    arrays = {}
+
+    snapshot_writer.encode_table(arrays, "table", ["0", 1], [{"a": 1}, {"a": 2**64}])
+
+    assert snapshot_reader.decode_table(arrays, "table") == (["0", 1], [{"a": 1}, {"a": 2**64}])
+
+
+def test_reading_snapshot_of_different_version_raises_error(mocker, tmpdir):
+    path = genet.Network("epsg:27700").write_snapshot(tmpdir / "network")
+    mocker.patch.object(snapshot_reader, "SNAPSHOT_FORMAT_VERSION", -1)
+
+    with pytest.raises(SnapshotFormatError) as error_info:
+        genet.read_snapshot(path)
+    assert "format version" in str(error_info.value)
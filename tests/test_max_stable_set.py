@@ -2,6 +2,7 @@ import networkx as nx
 import pytest
 from pandas import DataFrame
 
+import genet.max_stable_set as max_stable_set
 import genet.utils.spatial as spatial
 from genet import MaxStableSet, Network, Route, Schedule, Service, Stop
 
@@ -312,6 +313,7 @@ def test_detects_stops_that_lack_nearest_links(mocker, network, network_spatial_
         }
     ).set_index("id", drop=False)
     closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
 
     mss = MaxStableSet(
@@ -339,6 +341,7 @@ def test_stops_missing_nearest_links_identifies_stops_with_missing_closest_links
                     2: "link_7_8_car",
                     3: "link_8_9_car",
                 },
+                "distance": {0: 0.0, 1: 0.0, 2: 0.0, 3: 0.0},
             }
         ),
     )
@@ -376,6 +379,7 @@ def test_build_graph_for_maximum_stable_set_problem_with_non_trivial_closest_lin
         }
     ).set_index("id", drop=False)
     closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
 
     mss = MaxStableSet(
@@ -444,6 +448,76 @@ def test_build_graph_for_maximum_stable_set_problem_with_non_trivial_closest_lin
     )
 
 
+@pytest.fixture()
+def non_trivial_closest_links(mocker):
+    closest_links = DataFrame(
+        {
+            "id": {
+                0: "stop_2",
+                1: "stop_2",
+                2: "stop_3",
+                3: "stop_3",
+                4: "stop_1",
+                5: "stop_1",
+                6: "stop_1",
+            },
+            "link_id": {
+                0: "link_4_5_car",
+                1: "link_5_6_car",
+                2: "link_7_8_car",
+                3: "link_8_9_car",
+                4: "link_1_2_car",
+                5: "link_1_2_bus",
+                6: "link_2_3_car",
+            },
+        }
+    ).set_index("id", drop=False)
+    closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
+    mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
+
+
+def test_build_graph_for_maximum_stable_set_problem_with_generous_path_length_cutoff_is_unchanged(
+    assert_semantically_equal, non_trivial_closest_links, network
+):
+    mss_kwargs = {
+        "pt_graph": network.schedule["bus_service"].graph(),
+        "modes": {"car", "bus"},
+        "distance_threshold": 10,
+        "step_size": 10,
+    }
+    mss = MaxStableSet(network_spatial_tree=spatial.SpatialTree(network), **mss_kwargs)
+    bounded_mss = MaxStableSet(
+        network_spatial_tree=spatial.SpatialTree(network), path_length_cutoff_factor=1, **mss_kwargs
+    )
+
+    assert_semantically_equal(
+        dict(bounded_mss.problem_graph.nodes()), dict(mss.problem_graph.nodes())
+    )
+    assert set(bounded_mss.problem_graph.edges()) == set(mss.problem_graph.edges())
+
+
+def test_build_graph_for_maximum_stable_set_problem_stops_looking_for_paths_beyond_cutoff(
+    non_trivial_closest_links, network
+):
+    mss = MaxStableSet(
+        pt_graph=network.schedule["bus_service"].graph(),
+        network_spatial_tree=spatial.SpatialTree(network),
+        modes={"car", "bus"},
+        distance_threshold=10,
+        step_size=10,
+        path_length_cutoff_factor=0.05,
+    )
+
+    paths_found = mss.edges.loc[mss.edges["path_lengths"].notna(), :]
+    assert set(zip(paths_found["link_id_u"], paths_found["link_id_v"])) == {
+        ("link_2_3_car", "link_4_5_car"),
+        ("link_5_6_car", "link_7_8_car"),
+    }
+    assert (paths_found["path_lengths"] <= paths_found["path_length_cutoff"]).all()
+    assert ("stop_2.link:link_4_5_car", "stop_3.link:link_7_8_car") in mss.problem_graph.edges()
+
+
 def test_build_graph_for_maximum_stable_set_problem_with_no_path_between_isolated_node(
     assert_semantically_equal, mocker, network
 ):
@@ -470,6 +544,7 @@ def test_build_graph_for_maximum_stable_set_problem_with_no_path_between_isolate
         }
     ).set_index("id", drop=False)
     closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
 
     network.add_nodes(
@@ -578,6 +653,7 @@ def test_problem_with_distinct_catchments_is_viable(mocker, network, network_spa
         }
     ).set_index("id", drop=False)
     closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
 
     mss = MaxStableSet(
@@ -606,6 +682,7 @@ def test_problem_with_isolated_catchment_is_not_viable(mocker, network):
         }
     ).set_index("id", drop=False)
     closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
 
     network.add_nodes(
@@ -661,6 +738,7 @@ def test_problem_with_isolated_catchment_is_partially_viable(mocker, network):
         }
     ).set_index("id", drop=False)
     closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
 
     network.add_nodes(
@@ -729,6 +807,14 @@ def path_lengths_with_clear_preference(*args, **kwargs):
     return path_lengths[kwargs["source"]][kwargs["target"]]
 
 
+def shortest_path_lengths_with_clear_preference(df_pt_edges, from_col="u", to_col="v", **kwargs):
+    df_pt_edges["path_lengths"] = [
+        path_lengths_with_clear_preference(source=u, target=v)
+        for u, v in zip(df_pt_edges[from_col], df_pt_edges[to_col])
+    ]
+    return df_pt_edges
+
+
 def test_solving_problem_with_isolated_catchments(
     mocker, assert_semantically_equal, network, network_spatial_tree
 ):
@@ -755,8 +841,13 @@ def test_solving_problem_with_isolated_catchments(
         }
     ).set_index("id", drop=False)
     closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
-    mocker.patch.object(nx, "dijkstra_path_length", side_effect=path_lengths_with_clear_preference)
+    mocker.patch.object(
+        spatial.SpatialTree,
+        "shortest_path_lengths",
+        side_effect=shortest_path_lengths_with_clear_preference,
+    )
 
     mss = MaxStableSet(
         pt_graph=network.schedule["bus_service"].graph(),
@@ -819,6 +910,189 @@ def test_solving_problem_with_isolated_catchments(
     )
 
 
+@pytest.fixture()
+def mss_with_clear_preference(mocker, network, network_spatial_tree):
+    closest_links = DataFrame(
+        {
+            "id": {
+                0: "stop_2",
+                1: "stop_2",
+                2: "stop_3",
+                3: "stop_3",
+                4: "stop_1",
+                5: "stop_1",
+                6: "stop_1",
+            },
+            "link_id": {
+                0: "link_4_5_car",
+                1: "link_5_6_car",
+                2: "link_7_8_car",
+                3: "link_8_9_car",
+                4: "link_1_2_car",
+                5: "link_1_2_bus",
+                6: "link_2_3_car",
+            },
+        }
+    ).set_index("id", drop=False)
+    closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
+    mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
+    mocker.patch.object(
+        spatial.SpatialTree,
+        "shortest_path_lengths",
+        side_effect=shortest_path_lengths_with_clear_preference,
+    )
+    return MaxStableSet(
+        pt_graph=network.schedule["bus_service"].graph(),
+        network_spatial_tree=network_spatial_tree,
+        modes={"car", "bus"},
+    )
+
+
+@pytest.mark.parametrize("solver", ["highs", "greedy"])
+def test_solving_problem_in_process(mocker, mss_with_clear_preference, solver):
+    mocker.patch.object(max_stable_set, "ENUMERATION_LIMIT", 0)
+
+    mss_with_clear_preference.solve(solver=solver)
+
+    assert mss_with_clear_preference.solution == {
+        "stop_1": "link_1_2_bus",
+        "stop_2": "link_4_5_car",
+        "stop_3": "link_7_8_car",
+    }
+    assert set(mss_with_clear_preference.artificial_stops) == {
+        "stop_1.link:link_1_2_bus",
+        "stop_2.link:link_4_5_car",
+        "stop_3.link:link_7_8_car",
+    }
+    assert mss_with_clear_preference.unsolved_stops == set()
+
+
+def test_solving_problem_with_highs_solves_connected_components_separately(
+    mocker, mss_with_clear_preference
+):
+    # all candidate links of consecutive stops are connected, only the catchment pools of stops are left
+    mocker.patch.object(max_stable_set, "ENUMERATION_LIMIT", 0)
+    mocker.spy(max_stable_set, "max_weight_stable_set_milp")
+
+    mss_with_clear_preference.solve(solver="highs")
+
+    assert max_stable_set.max_weight_stable_set_milp.call_count == 3
+    assert mss_with_clear_preference.solution == {
+        "stop_1": "link_1_2_bus",
+        "stop_2": "link_4_5_car",
+        "stop_3": "link_7_8_car",
+    }
+
+
+def test_solving_problem_with_highs_solves_components_larger_than_greedy_size_greedily(
+    mocker, mss_with_clear_preference
+):
+    mocker.patch.object(max_stable_set, "ENUMERATION_LIMIT", 0)
+    mocker.spy(max_stable_set, "max_weight_stable_set_milp")
+    mocker.spy(max_stable_set, "max_weight_stable_set_greedy")
+
+    mss_with_clear_preference.solve(solver="highs", greedy_component_size=2)
+
+    # the pool of stop_1 has three links
+    assert max_stable_set.max_weight_stable_set_milp.call_count == 2
+    assert max_stable_set.max_weight_stable_set_greedy.call_count == 1
+    assert set(mss_with_clear_preference.solution) == {"stop_1", "stop_2", "stop_3"}
+
+
+def test_solving_problem_with_highs_falls_back_on_greedy_without_solution(
+    mocker, mss_with_clear_preference
+):
+    mocker.patch.object(max_stable_set, "ENUMERATION_LIMIT", 0)
+    mocker.patch.object(max_stable_set, "max_weight_stable_set_milp", return_value=None)
+
+    mss_with_clear_preference.solve(solver="highs")
+
+    assert mss_with_clear_preference.solution == {
+        "stop_1": "link_1_2_bus",
+        "stop_2": "link_4_5_car",
+        "stop_3": "link_7_8_car",
+    }
+
+
+def test_solving_problem_with_pyomo_reads_solution_from_model_variables(
+    mocker, mss_with_clear_preference
+):
+    selected = {"stop_1.link:link_1_2_bus", "stop_2.link:link_4_5_car", "stop_3.link:link_7_8_car"}
+
+    class Solver:
+        def solve(self, model):
+            for vertex in model.vertices:
+                model.x[vertex].value = 1 if vertex in selected else 0
+
+    mocker.patch.object(max_stable_set, "ENUMERATION_LIMIT", 0)
+    mocker.patch.object(max_stable_set.pe, "SolverFactory", return_value=Solver())
+
+    mss_with_clear_preference.solve(solver="some_solver")
+
+    assert set(mss_with_clear_preference.artificial_stops) == selected
+
+
+def test_solving_problem_enumerates_small_components_without_a_solver(
+    mocker, mss_with_clear_preference
+):
+    mocker.patch.object(max_stable_set.pe, "SolverFactory")
+
+    mss_with_clear_preference.solve()
+
+    assert not max_stable_set.pe.SolverFactory.called
+    assert mss_with_clear_preference.solution == {
+        "stop_1": "link_1_2_bus",
+        "stop_2": "link_4_5_car",
+        "stop_3": "link_7_8_car",
+    }
+
+
+def test_solving_problem_solves_components_in_a_pool_of_processes(
+    mocker, mss_with_clear_preference
+):
+    mocker.patch.object(max_stable_set, "ENUMERATION_LIMIT", 0)
+    mocker.spy(max_stable_set.mp, "Pool")
+
+    mss_with_clear_preference.solve(solver="highs", processes=2)
+
+    max_stable_set.mp.Pool.assert_called_once_with(processes=2)
+    assert mss_with_clear_preference.solution == {
+        "stop_1": "link_1_2_bus",
+        "stop_2": "link_4_5_car",
+        "stop_3": "link_7_8_car",
+    }
+
+
+def test_number_of_selections_counts_at_most_one_node_of_each_group():
+    graph = nx.Graph()
+    graph.add_nodes_from(
+        [("a_1", {"id": "a"}), ("a_2", {"id": "a"}), ("b_1", {"id": "b"}), ("b_2", {"id": "b"})]
+    )
+    graph.add_node("b_3", id="b")
+
+    assert max_stable_set.number_of_selections(graph) == 12
+
+
+def test_max_weight_stable_set_solvers_prefer_many_light_nodes_to_one_heavy_node():
+    star = nx.star_graph(4)
+    nx.set_node_attributes(star, {0: 2, 1: 1, 2: 1, 3: 1, 4: 1}, "coeff")
+
+    assert sorted(max_stable_set.max_weight_stable_set_milp(star)) == [1, 2, 3, 4]
+    assert sorted(max_stable_set.max_weight_stable_set_greedy(star)) == [1, 2, 3, 4]
+
+
+def test_max_weight_stable_set_greedy_heuristic_can_miss_the_best_solution():
+    star = nx.star_graph(4)
+    nx.set_node_attributes(star, {0: 3, 1: 1, 2: 1, 3: 1, 4: 1}, "coeff")
+
+    nx.set_node_attributes(star, {node: node for node in star.nodes}, "id")
+
+    assert sorted(max_stable_set.max_weight_stable_set_milp(star)) == [1, 2, 3, 4]
+    assert sorted(max_stable_set.max_weight_stable_set_enumeration(star)) == [1, 2, 3, 4]
+    assert max_stable_set.max_weight_stable_set_greedy(star) == [0]
+
+
 def test_problem_with_isolated_catchment_finds_solution_for_viable_stops(
     assert_semantically_equal, mocker, network
 ):
@@ -836,6 +1110,7 @@ def test_problem_with_isolated_catchment_finds_solution_for_viable_stops(
         }
     ).set_index("id", drop=False)
     closest_links.index.rename(name="index", inplace=True)
+    closest_links["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=closest_links)
 
     network.add_nodes(
@@ -1,3 +1,4 @@
+import pytest
 from pandas import DataFrame
 from pandas.testing import assert_frame_equal
 
@@ -191,3 +192,98 @@ def test_change_log_records_removing_objects_in_bunch():
         "diff",
     ]
     assert_frame_equal(log[cols_to_compare], target[cols_to_compare], check_dtype=False)
+
+
+def test_change_log_keeps_order_of_records_appended_one_by_one_and_in_bunch():
+    log = ChangeLog()
+    log.add("link", "1", {"attrib": "hey"})
+    log = log.modify_bunch("link", ["1", "2"], [{}, {}], ["1", "2"], [{"a": 1}, {"a": 2}])
+    log.remove("link", "2", {"a": 2})
+
+    assert len(log) == 4
+    assert log["change_event"].tolist() == ["add", "modify", "modify", "remove"]
+    assert log.index.tolist() == [0, 1, 2, 3]
+
+
+def test_change_log_records_in_bunch_leave_the_original_log_unchanged():
+    log = ChangeLog()
+    log.add("link", "1", {"attrib": "hey"})
+
+    new_log = log.add_bunch("link", ["2"], [{"attrib": "hello"}])
+    log.add("link", "3", {"attrib": "hi"})
+
+    assert log["new_id"].tolist() == ["1", "3"]
+    assert new_log["new_id"].tolist() == ["1", "2"]
+
+
+def test_merged_change_logs_are_ordered_by_timestamp_and_record_further_changes_at_the_end():
+    log = ChangeLog()
+    log.add("link", "1", {})
+    log.add("link", "3", {})
+    other_log = ChangeLog()
+    other_log.add("link", "2", {})
+    log._records[1] = ("2020-07-09 09:56:06",) + log._records[1][1:]
+    other_log._records[0] = ("2020-07-09 09:56:05",) + other_log._records[0][1:]
+
+    log = log.merge_logs(other_log)
+    log.add("link", "4", {})
+
+    assert log["new_id"].tolist() == ["2", "3", "1", "4"]
+
+
+def test_exported_change_log_is_the_same_as_the_dataframe_exported(tmpdir):
+    log = ChangeLog()
+    log.add("link", "1", {"attrib": "hey"})
+    log = log.modify_bunch("link", ["1"], [{"attrib": "hey"}], ["1"], [{"attrib": "hi"}])
+    log.remove("link", "1", {"attrib": "hi"})
+
+    log.export(tmpdir / "streamed.csv")
+    log.to_dataframe().to_csv(tmpdir / "built.csv")
+
+    assert (tmpdir / "streamed.csv").read_text("utf-8") == (tmpdir / "built.csv").read_text("utf-8")
+
+
+def test_change_log_describes_attributes_as_they_were_when_the_change_was_recorded():
+    log = ChangeLog()
+    attribs = {"attributes": {"osm:way:highway": "primary"}, "modes": {"car"}}
+    log.modify("link", "1", attribs, "1", {**attribs, "freespeed": 10.0})
+    attribs["attributes"]["osm:way:highway"] = "secondary"
+    attribs["modes"].add("bus")
+
+    assert log["old_attributes"].tolist() == [
+        "{'attributes': {'osm:way:highway': 'primary'}, 'modes': {'car'}}"
+    ]
+    assert log["diff"].tolist() == [[("add", "", [("freespeed", 10.0)])]]
+
+
+def test_change_log_with_ids_only_level_records_changes_without_attributes():
+    log = ChangeLog(level="ids_only")
+    log.add("link", "1", {"attrib": "hey"})
+    log = log.modify_bunch("link", ["1"], [{"attrib": "hey"}], ["2"], [{"attrib": "hi"}])
+
+    assert log["new_id"].tolist() == ["1", "2"]
+    assert log["old_attributes"].isna().all()
+    assert log["new_attributes"].isna().all()
+    assert log["diff"].tolist() == [[("add", "id", "1")], [("change", "id", ("1", "2"))]]
+
+
+def test_change_log_with_off_level_records_nothing():
+    log = ChangeLog(level="off")
+    log.add("link", "1", {"attrib": "hey"})
+    log = log.remove_bunch("link", ["1"], [{"attrib": "hey"}])
+
+    assert len(log) == 0
+    assert log.empty
+
+
+def test_change_log_level_is_kept_through_bunches_and_merges():
+    log = ChangeLog(level="ids_only")
+
+    log = log.add_bunch("link", ["1"], [{}]).merge_logs(ChangeLog())
+
+    assert log.level == "ids_only"
+
+
+def test_change_log_with_unknown_level_raises_error():
+    with pytest.raises(NotImplementedError):
+        ChangeLog(level="some")
@@ -1,3 +1,5 @@
+from copy import deepcopy
+
 import networkx as nx
 import pytest
 from pandas import DataFrame
@@ -228,6 +230,7 @@ def test_snapping_partial_pt_route_results_in_all_stops_with_link_references_and
         }
     ).set_index("id", drop=False)
     df.index.rename(name="index", inplace=True)
+    df["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=df)
 
     mss = MaxStableSet(
@@ -332,6 +335,7 @@ def test_snapping_disconnected_partial_pt_route_results_in_all_stops_with_link_r
         }
     ).set_index("id", drop=False)
     df.index.rename(name="index", inplace=True)
+    df["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=df)
 
     mss = MaxStableSet(
@@ -438,6 +442,7 @@ def test_artificially_filling_in_solution_for_partial_pt_routing_problem_results
         }
     ).set_index("id", drop=False)
     df.index.rename(name="index", inplace=True)
+    df["distance"] = 0.0
     mocker.patch.object(spatial.SpatialTree, "closest_links", return_value=df)
 
     mss = MaxStableSet(
@@ -500,6 +505,20 @@ def test_routing_service_with_additional_modes(test_network, test_service):
     assert rep["routing"]["services_have_routes_in_the_graph"]
 
 
+def test_routing_service_snaps_to_the_spatial_tree_kept_by_the_network(
+    test_network, test_service, mocker
+):
+    test_network.schedule = Schedule(epsg="epsg:27700", services=[test_service])
+    bus_car_tree = test_network.spatial_tree({"bus", "car"})
+    mocker.spy(spatial.SpatialTree, "add_links")
+    mocker.spy(mod_schedule, "route_pt_graph")
+
+    test_network.route_service("service_bus", additional_modes="car")
+
+    spatial.SpatialTree.add_links.assert_not_called()
+    assert mod_schedule.route_pt_graph.call_args.kwargs["network_spatial_tree"] is bus_car_tree
+
+
 def test_routing_services_with_shared_stops(test_network, test_service):
     test_network.schedule = Schedule(
         epsg="epsg:27700",
@@ -890,6 +909,87 @@ def test_routing_schedule_specifying_services(test_network, test_service):
     assert rep["routing"]["services_have_routes_in_the_graph"]
 
 
+def test_routing_schedule_in_processes_gives_the_same_result_as_in_one(test_network, test_service):
+    test_network.schedule = Schedule(epsg="epsg:27700", services=[test_service])
+    serial_network = deepcopy(test_network)
+
+    serial_network.route_schedule(processes=1)
+    test_network.route_schedule(processes=2)
+
+    keys = ["route", "ordered_stops"]
+    assert (
+        test_network.schedule.route_attribute_data(keys=keys).to_dict()
+        == serial_network.schedule.route_attribute_data(keys=keys).to_dict()
+    )
+
+
+def test_pt_graph_problem_only_keeps_maps_of_routed_services(test_network):
+    schedule_graph = test_network.schedule.graph()
+    service_graph = test_network.schedule["7797"].graph()
+
+    pt_graph = mod_schedule.pt_graph_problem(
+        service_graph, test_network.schedule["7797"].reference_edges(), ["7797_0"]
+    )
+
+    assert set(pt_graph.edges) == test_network.schedule["7797"].reference_edges()
+    assert pt_graph.graph == {
+        "crs": "epsg:27700",
+        "route_to_service_map": {"7797_0": "7797", "7797_1": "7797"},
+        "service_to_route_map": {"7797": schedule_graph.graph["service_to_route_map"]["7797"]},
+    }
+
+
+def test_routing_pt_graphs_in_processes_gives_results_in_order_of_problems(test_network):
+    problems = []
+    for service_id in ["7797", "18915"]:
+        service = test_network.schedule[service_id]
+        route_ids = list(service.route_ids())
+        problems.append(
+            (
+                mod_schedule.pt_graph_problem(
+                    service.graph(), service.reference_edges(), route_ids
+                ),
+                test_network.schedule.route_attribute_data(keys=["ordered_stops"]).loc[
+                    route_ids, :
+                ],
+            )
+        )
+
+    results = mod_schedule.route_pt_graphs(
+        problems,
+        network_spatial_tree=spatial.SpatialTree(test_network).modal_subtree({"car", "bus"}),
+        modes={"bus"},
+        processes=2,
+        allow_partial=False,
+        distance_threshold=0,
+        step_size=0,
+    )
+
+    assert [changeset for changeset, _ in results] == [None, None]
+    assert all("PartialMaxStableSetProblem" in error for _, error in results)
+
+
+def test_routing_single_pt_graph_solves_its_problem_in_processes(mocker, test_network):
+    service = test_network.schedule["7797"]
+    route_ids = list(service.route_ids())
+    problem = (
+        mod_schedule.pt_graph_problem(service.graph(), service.reference_edges(), route_ids),
+        test_network.schedule.route_attribute_data(keys=["ordered_stops"]).loc[route_ids, :],
+    )
+    mocker.spy(MaxStableSet, "solve")
+
+    results = mod_schedule.route_pt_graphs(
+        [problem],
+        network_spatial_tree=spatial.SpatialTree(test_network).modal_subtree({"car", "bus"}),
+        modes={"bus"},
+        processes=2,
+        solver="highs",
+    )
+
+    assert results[0][1] is None
+    assert MaxStableSet.solve.call_args.kwargs["processes"] == 2
+
+
 def test_rerouting_service(test_network):
     test_network.schedule._graph.graph["routes"]["7797_0"]["route"] = []
     test_network.schedule._graph.graph["routes"]["7797_1"]["route"] = []
@@ -1,5 +1,6 @@
 import logging
 
+import pytest
 from anytree import RenderTree
 from pandas import DataFrame
 from pandas.testing import assert_frame_equal
@@ -24,6 +25,83 @@ def generate_output_tree(root):
     return output_tree
 
 
+ITEMS_WITH_MIXED_DATA = [
+    (
+        "0",
+        {"modes": {"car", "bus"}, "attributes": {"osm:way:highway": "primary", "osm:way:lanes": 2}},
+    ),
+    ("1", {"modes": {"car"}, "attributes": {"osm:way:highway": ["primary", "secondary"]}}),
+    ("2", {"modes": "walk", "attributes": {"osm:way:highway": "secondary", "osm:way:lanes": 2.0}}),
+    ("3", {"modes": ["bus"], "attributes": "not nested", "capacity": float("nan")}),
+    ("4", {"capacity": 600.0}),
+]
+
+
+@pytest.mark.parametrize(
+    "conditions,how,mixed_dtypes",
+    [
+        ({"modes": "car"}, any, True),
+        ({"modes": "car"}, any, False),
+        ({"modes": "walk"}, any, False),
+        ({"modes": ["walk", "bus"]}, any, True),
+        ({"modes": ["walk", "bus"]}, any, False),
+        ({"attributes": {"osm:way:highway": "primary"}}, any, True),
+        ({"attributes": {"osm:way:highway": "primary"}}, any, False),
+        ({"attributes": {"osm:way:lanes": 2}}, any, True),
+        ({"capacity": 600}, any, True),
+        ({"capacity": float("nan")}, any, True),
+        ([{"modes": "bus"}, {"attributes": {"osm:way:highway": "secondary"}}], any, True),
+        ([{"modes": "car"}, {"attributes": {"osm:way:highway": "secondary"}}], all, True),
+    ],
+)
+def test_extracting_on_attribute_indexes_gives_the_same_ids_as_checking_every_item(
+    conditions, how, mixed_dtypes
+):
+    indexes = {
+        graph_operations.key_path(key): graph_operations.AttributeIndex(key, ITEMS_WITH_MIXED_DATA)
+        for key in [
+            "modes",
+            "capacity",
+            {"attributes": "osm:way:highway"},
+            {"attributes": "osm:way:lanes"},
+        ]
+    }
+
+    ids = graph_operations.extract_on_indexes(indexes, conditions, how, mixed_dtypes)
+
+    assert ids is not None
+    assert sorted(ids) == graph_operations.extract_on_attributes(
+        ITEMS_WITH_MIXED_DATA, conditions, how, mixed_dtypes
+    )
+
+
+@pytest.mark.parametrize(
+    "conditions",
+    [
+        {"capacity": (0, 1000)},
+        {"capacity": lambda x: x > 0},
+        {"freespeed": 10},
+        [{"capacity": 600}, {"freespeed": 10}],
+        {"attributes": {"osm:way:highway": "primary", "osm:way:lanes": 2}},
+    ],
+)
+def test_extracting_on_attribute_indexes_defers_conditions_the_indexes_cannot_answer(conditions):
+    indexes = {("capacity",): graph_operations.AttributeIndex("capacity", ITEMS_WITH_MIXED_DATA)}
+
+    assert graph_operations.extract_on_indexes(indexes, conditions) is None
+
+
+def test_attribute_index_forgets_old_values_of_changed_and_removed_items():
+    index = graph_operations.AttributeIndex("modes", ITEMS_WITH_MIXED_DATA)
+
+    index.add([("0", {"modes": {"walk"}}), ("2", {})])
+    index.remove(["1", "missing"])
+
+    assert index.lookup("car") == []
+    assert index.lookup("walk") == ["0"]
+    assert len(index) == 2
+
+
 def test_extract_graph_links_with_flat_condition():
     n = Network("epsg:27700")
     n.add_link(
@@ -0,0 +1,25 @@
+import logging
+import time
+
+from genet.utils import profiling
+
+
+def test_peak_memory_is_reported_in_megabytes():
+    peak = profiling.peak_memory_mb()
+    assert peak is None or 1 < peak < 1024**2
+
+
+def test_peak_memory_is_none_without_resource_module(mocker):
+    mocker.patch.object(profiling, "resource", None)
+    assert profiling.peak_memory_mb() is None
+
+
+def test_logging_throughput_reports_elements_per_second(caplog):
+    with caplog.at_level(logging.INFO):
+        stats = profiling.log_throughput("things", 10, time.perf_counter() - 2)
+
+    assert stats["elements"] == 10
+    assert stats["seconds"] >= 2
+    assert stats["elements_per_second"] <= 5
+    assert "Processed 10 things" in caplog.records[-1].message
+    assert "elements/s" in caplog.records[-1].message
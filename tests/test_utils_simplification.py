@@ -1,4 +1,5 @@
 import networkx as nx
+import numpy as np
 import pytest
 from shapely.geometry import LineString
 
@@ -18,6 +19,38 @@ def assert_correct_edge_groups():
     return _assert_correct_edge_groups
 
 
+def endpoints(g):
+    node_ids, u, v, _, _ = simplification._graph_arrays(g)
+    return {
+        node
+        for node, is_endpoint in zip(node_ids, simplification._endpoints(u, v, len(node_ids)))
+        if is_endpoint
+    }
+
+
+def merge_links(indexed_edge_groups):
+    path_nodes, node_offsets, links, link_offsets, nodes = [], [0], [], [0], {}
+    for edge_group in indexed_edge_groups.values():
+        path_nodes += edge_group["path"]
+        node_offsets.append(len(path_nodes))
+        link_data = edge_group["link_data"]
+        links += [
+            {key: values[i] for key, values in link_data.items() if i < len(values)}
+            for i in range(max(map(len, link_data.values())))
+        ]
+        link_offsets.append(len(links))
+        nodes.update(edge_group["node_data"])
+    links_to_add, _ = simplification._merge_links(
+        list(indexed_edge_groups),
+        path_nodes,
+        np.array(node_offsets),
+        links,
+        np.array(link_offsets),
+        nodes,
+    )
+    return links_to_add
+
+
 @pytest.fixture()
 def simple_graph_with_junctions():
     g = nx.MultiDiGraph()
@@ -41,20 +74,14 @@ def simple_graph_with_junctions():
 
 def test_getting_endpoints_with_simple_graph_with_junctions(simple_graph_with_junctions):
     g = simple_graph_with_junctions
-    endpts = simplification._is_endpoint(
-        {
-            node: {"successors": set(g.successors(node)), "predecessors": set(g.predecessors(node))}
-            for node in g.nodes
-        }
-    )
-    assert set(endpts) == {1, 2, 5, 6, 11}
+    assert endpoints(g) == {1, 2, 5, 6, 11}
 
 
 def test_simplified_paths_with_simple_graph_with_junctions(
     assert_correct_edge_groups, simple_graph_with_junctions
 ):
     g = simple_graph_with_junctions
-    edge_groups = simplification._get_edge_groups_to_simplify(g)
+    edge_groups = simplification._paths_to_simplify(g)
     assert_correct_edge_groups(edge_groups, [[2, 3, 4, 5], [2, 22, 33, 44, 55, 5]])
 
 
@@ -95,20 +122,14 @@ def test_getting_endpoints_with_graph_with_junctions_directed_both_ways(
     graph_with_junctions_directed_both_ways_and_loop,
 ):
     g = graph_with_junctions_directed_both_ways_and_loop
-    endpts = simplification._is_endpoint(
-        {
-            node: {"successors": set(g.successors(node)), "predecessors": set(g.predecessors(node))}
-            for node in g.nodes
-        }
-    )
-    assert set(endpts) == {1, 2, 5, 6, 11}
+    assert endpoints(g) == {1, 2, 5, 6, 11}
 
 
 def test_simplified_paths_with_graph_with_junctions_directed_both_ways(
     assert_correct_edge_groups, graph_with_junctions_directed_both_ways_and_loop
 ):
     g = graph_with_junctions_directed_both_ways_and_loop
-    edge_groups = simplification._get_edge_groups_to_simplify(g)
+    edge_groups = simplification._paths_to_simplify(g)
     assert_correct_edge_groups(
         edge_groups, [[2, 3, 4, 5], [2, 22, 33, 44, 55, 5], [5, 4, 3, 2], [5, 55, 44, 33, 22, 2]]
     )
@@ -123,20 +144,14 @@ def graph_with_loop_at_the_end():
 
 def test_getting_endpoints_with_graph_with_loop_at_the_end(graph_with_loop_at_the_end):
     g = graph_with_loop_at_the_end
-    endpts = simplification._is_endpoint(
-        {
-            node: {"successors": set(g.successors(node)), "predecessors": set(g.predecessors(node))}
-            for node in g.nodes
-        }
-    )
-    assert set(endpts) == {0, 2, 4}
+    assert endpoints(g) == {0, 2, 4}
 
 
 def test_simplified_paths_with_graph_with_loop_at_the_end(
     assert_correct_edge_groups, graph_with_loop_at_the_end
 ):
     g = graph_with_loop_at_the_end
-    edge_groups = simplification._get_edge_groups_to_simplify(g)
+    edge_groups = simplification._paths_to_simplify(g)
     assert_correct_edge_groups(edge_groups, [[2, 1, 0], [0, 1, 2], [2, 3, 4]])
 
 
@@ -205,7 +220,7 @@ def indexed_edge_groups():
 
 
 def test_merging_edge_data(assert_semantically_equal, indexed_edge_groups):
-    links_to_add = simplification._process_path(indexed_edge_groups)
+    links_to_add = merge_links(indexed_edge_groups)
 
     assert_semantically_equal(
         links_to_add,
@@ -242,7 +257,7 @@ def test_merging_edge_data(assert_semantically_equal, indexed_edge_groups):
 
 
 def test_merging_edge_data_without_attributes(assert_semantically_equal):
-    links_to_add = simplification._process_path(
+    links_to_add = merge_links(
         {
             "new_link_id": {
                 "path": [
@@ -445,7 +460,7 @@ def test_merging_set_attribute_values(assert_semantically_equal):
             },
         }
     }
-    links_to_add = simplification._process_path(edge_group)
+    links_to_add = merge_links(edge_group)
 
     assert_semantically_equal(
         links_to_add,
@@ -476,44 +491,42 @@ def test_merging_set_attribute_values(assert_semantically_equal):
     )
 
 
-def test_building_paths():
-    path_start_points = {(1, 2), (1, 22)}
-    endpoints = {1, 4}
-    neighbours = {1: {2, 22}, 2: {3}, 3: {4}, 4: {}, 22: {33}, 33: {44}, 44: {4}}
-    paths = simplification._build_paths(path_start_points, endpoints, neighbours)
-    assert paths == [[1, 2, 3, 4], [1, 22, 33, 44, 4]]
+def test_paths_to_simplify_go_through_nodes_with_one_way_links():
+    g = nx.MultiDiGraph()
+    g.add_edges_from([(1, 2), (2, 3), (3, 4), (1, 22), (22, 33), (33, 44), (44, 4)])
+    paths = simplification._paths_to_simplify(g)
+    assert sorted(paths) == [[1, 2, 3, 4], [1, 22, 33, 44, 4]]
 
 
-def test_building_path_for_link_that_is_already_simple_enough():
+def test_link_that_is_already_simple_enough_is_not_a_path_to_simplify():
     # i.e. the from and to nodes are both endpoints
-    path_start_points = {(1, 2)}
-    endpoints = {1, 2}
-    neighbours = {1: {2}, 2: {}}
-    paths = simplification._build_paths(path_start_points, endpoints, neighbours)
-    assert paths == []
-
-
-def test_building_path_for_loop():
-    path_start_points = {(1, 2)}
-    endpoints = {1}
-    neighbours = {1: {2}, 2: {3}, 3: {4}, 4: {1}}
-    paths = simplification._build_paths(path_start_points, endpoints, neighbours)
-    assert paths == [[1, 2, 3, 4, 1]]
-
-
-def test_building_path_for_bidirected_links():
-    path_start_points = {(1, 2), (4, 3)}
-    endpoints = {1, 4}
-    neighbours = {1: {2}, 2: {3, 1}, 3: {2, 4}, 4: {3}}
-    paths = simplification._build_paths(path_start_points, endpoints, neighbours)
-    assert paths == [[1, 2, 3, 4], [4, 3, 2, 1]]
-
-
-def test_building_path_throws_error_when_there_is_undetected_branching():
-    # i.e. shouldnt happen as the condition automatically makes anything with more than two neighbours an endpoint but..
-    path_start_points = {(1, 2)}
-    endpoints = {1}
-    neighbours = {1: {2}, 2: {3, 1}, 3: {2, 4, 11}, 4: {3}}
-    with pytest.raises(RuntimeError) as error_info:
-        simplification._build_paths(path_start_points, endpoints, neighbours)
-    assert "branching" in str(error_info.value)
+    g = nx.MultiDiGraph()
+    g.add_edges_from([(1, 2)])
+    assert simplification._paths_to_simplify(g) == []
+
+
+def test_path_to_simplify_can_loop_back_to_its_start():
+    g = nx.MultiDiGraph()
+    g.add_edges_from([(0, 1), (1, 2), (2, 3), (3, 4), (4, 1)])
+    assert simplification._paths_to_simplify(g) == [[1, 2, 3, 4, 1]]
+
+
+def test_paths_to_simplify_go_both_ways_through_nodes_with_bidirected_links():
+    g = nx.MultiDiGraph()
+    g.add_edges_from([(1, 2), (2, 1), (2, 3), (3, 2), (3, 4), (4, 3)])
+    paths = simplification._paths_to_simplify(g)
+    assert sorted(paths) == [[1, 2, 3, 4], [4, 3, 2, 1]]
+
+
+def test_paths_to_simplify_go_along_multiple_links_between_nodes():
+    g = nx.MultiDiGraph()
+    g.add_edges_from([(1, 2), (1, 2), (2, 3)])
+    assert simplification._paths_to_simplify(g) == [[1, 2, 3]]
+
+
+def test_grouped_median_of_even_and_odd_numbers_of_values_leaves_out_missing_values():
+    offsets = np.array([0, 3, 5, 6])
+    medians = simplification._grouped_median(
+        np.array([3.0, 1.0, 2.0, 1.0, np.nan, np.nan]), offsets
+    )
+    np.testing.assert_array_equal(medians, [2.0, 1.0, np.nan])
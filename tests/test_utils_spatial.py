@@ -1,3 +1,4 @@
+import networkx as nx
 import pytest
 import s2sphere
 from geopandas import GeoDataFrame
@@ -420,22 +421,44 @@ def test_SpatialTree_adds_links(assert_semantically_equal, network):
     spatial_tree = spatial.SpatialTree(network)
 
     assert_semantically_equal(
-        list(spatial_tree.edges(data=True)),
+        spatial_tree.edges(),
         [
-            ("link_1", "link_2", {"length": 153.0294}),
-            ("link_1", "link_3", {"length": 153.0294}),
-            ("link_2", "link_4", {"length": 78.443}),
-            ("link_3", "link_4", {"length": 78.443}),
-            ("link_4", "link_2", {"length": 78.443}),
-            ("link_4", "link_3", {"length": 78.443}),
+            ("link_1", "link_2"),
+            ("link_1", "link_3"),
+            ("link_2", "link_4"),
+            ("link_3", "link_4"),
+            ("link_4", "link_2"),
+            ("link_4", "link_3"),
         ],
     )
+    assert list(spatial_tree.link_ids) == ["link_1", "link_2", "link_3", "link_4"]
+    assert list(spatial_tree.link_weights("length")) == [153.0294, 78.443, 78.443, 78.443]
+
+
+def test_SpatialTree_modal_subtree_masks_links_without_the_modes(
+    assert_semantically_equal, network
+):
+    spatial_tree = spatial.SpatialTree(network)
+    car_tree = spatial_tree.modal_subtree(modes="car")
+
+    assert car_tree.indices is spatial_tree.indices
+    assert list(car_tree.mask) == [True, True, False, True]
+    assert "link_3" in spatial_tree
+    assert "link_3" not in car_tree
+    assert len(car_tree) == 3
     assert_semantically_equal(
-        dict(spatial_tree.nodes(data=True)),
-        {"link_1": {}, "link_2": {}, "link_3": {}, "link_4": {}},
+        car_tree.edges(), [("link_1", "link_2"), ("link_2", "link_4"), ("link_4", "link_2")]
     )
 
 
+def test_SpatialTree_weights_of_modal_subtree_do_not_change_weights_of_the_tree(network):
+    spatial_tree = spatial.SpatialTree(network)
+    car_tree = spatial_tree.modal_subtree(modes="car")
+
+    assert car_tree.link_weights("length")[2] == 1
+    assert list(spatial_tree.link_weights("length")) == [153.0294, 78.443, 78.443, 78.443]
+
+
 def test_subsetting_links_df_by_mode(network):
     spatial_tree = spatial.SpatialTree(network)
     df = spatial_tree.modal_links_geodataframe(modes={"car"})
@@ -591,6 +614,80 @@ def test_SpatialTree_closest_links_in_north_canada_doesnt_find_link_within_10_me
     assert closest_links.empty
 
 
+@pytest.fixture()
+def london_stops():
+    return GeoDataFrame(
+        {
+            "geometry": {
+                "stop_10m_to_link_1": Point(-0.15186089346604492, 51.51950409732838),
+                "stop_15m_to_link_2": Point(-0.15164747576623197, 51.520660715220636),
+                "stop_20m_to_link_1": Point(-0.1520233977548685, 51.51952913606585),
+            }
+        },
+        crs=CRS("epsg:4326"),
+    )
+
+
+def test_SpatialTree_closest_links_orders_links_by_distance_in_metres(network, london_stops):
+    spatial_tree = spatial.SpatialTree(network).modal_subtree(modes="car")
+
+    closest_links = spatial_tree.closest_links(london_stops, 30)
+
+    assert list(closest_links.index) == [
+        "stop_10m_to_link_1",
+        "stop_15m_to_link_2",
+        "stop_15m_to_link_2",
+        "stop_20m_to_link_1",
+    ]
+    assert list(closest_links["link_id"]) == ["link_1", "link_2", "link_4", "link_1"]
+    distances = closest_links["distance"].to_numpy()
+    assert distances[1] <= distances[2]
+    for distance, expected in zip(distances[[0, 1, 3]], [10, 15, 20]):
+        assert distance == pytest.approx(expected, abs=2)
+
+
+def test_SpatialTree_closest_links_within_zero_metres_finds_no_links(network, london_stops):
+    spatial_tree = spatial.SpatialTree(network).modal_subtree(modes="car")
+
+    closest_links = spatial_tree.closest_links(london_stops, 0)
+
+    assert list(closest_links.index) == list(london_stops.index)
+    assert closest_links["link_id"].isna().all()
+
+
+def test_SpatialTree_nearest_link_distances_agree_with_closest_links(network, london_stops):
+    spatial_tree = spatial.SpatialTree(network).modal_subtree(modes="car")
+
+    nearest = spatial_tree.nearest_link_distances(london_stops)
+    closest_links = spatial_tree.closest_links(london_stops, 30)
+
+    assert list(nearest.index) == list(london_stops.index)
+    for stop, distance in nearest.items():
+        assert distance == pytest.approx(closest_links.loc[[stop], "distance"].min())
+
+
+def test_catchments_by_step_keeps_links_in_the_smallest_step_with_links():
+    closest_links = DataFrame(
+        {"link_id": ["link_1", "link_2", "link_3", "link_4"], "distance": [3.0, 12.0, 14.0, 25.0]},
+        index=["stop_1", "stop_1", "stop_2", "stop_2"],
+    )
+
+    catchments = spatial.catchments_by_step(closest_links, 10)
+
+    assert list(catchments.index) == ["stop_1", "stop_2"]
+    assert list(catchments["link_id"]) == ["link_1", "link_3"]
+    assert list(catchments["catchment"]) == [10, 20]
+    assert "distance" not in catchments.columns
+
+
+def test_utm_epsg_finds_zones_north_and_south_of_the_equator():
+    assert list(spatial.utm_epsg([-0.15, 109.38, -93.25], [51.52, -0.32, 73.66])) == [
+        32630,
+        32749,
+        32615,
+    ]
+
+
 def test_SpatialTree_shortest_paths(assert_semantically_equal, network):
     spatial_tree = spatial.SpatialTree(network).modal_subtree(modes="car")
     df = DataFrame(
@@ -631,3 +728,153 @@ def test_SpatialTree_shortest_path_lengths(assert_semantically_equal, network):
             3: {"u": "link_1", "v": "link_4", "path_lengths": 231.4724},
         },
     )
+
+
+def test_SpatialTree_answers_repeated_link_pairs_from_shortest_path_cache(network):
+    spatial_tree = spatial.SpatialTree(network).modal_subtree(modes="car")
+    df = DataFrame(
+        {
+            "u": ["link_1", "link_2", "link_2", "link_1"],
+            "v": ["link_2", "link_3", "link_4", "link_4"],
+        }
+    )
+
+    first_lengths = spatial_tree.shortest_path_lengths(df.copy())["path_lengths"]
+    assert spatial_tree.shortest_path_cache_info()["misses"] == 4
+    assert spatial_tree.shortest_path_cache_info()["hits"] == 0
+
+    second_lengths = spatial_tree.shortest_path_lengths(df.copy())["path_lengths"]
+    assert second_lengths.equals(first_lengths)
+    assert spatial_tree.shortest_path_cache_info() == {
+        "hits": 4,
+        "misses": 4,
+        "hit_rate": 0.5,
+        "size": 4,
+        "maxsize": spatial.SpatialTree.shortest_path_cache_maxsize,
+    }
+
+
+def test_SpatialTree_shortest_paths_reuse_lengths_cached_for_the_same_link_pairs(network):
+    spatial_tree = spatial.SpatialTree(network).modal_subtree(modes="car")
+    df = DataFrame({"u": ["link_1"], "v": ["link_4"]})
+
+    spatial_tree.shortest_path_lengths(df.copy())
+    paths = spatial_tree.shortest_paths(df.copy())
+
+    assert paths["shortest_path"].tolist() == [["link_1", "link_2", "link_4"]]
+    assert spatial_tree.shortest_path_cache_info()["hits"] == 1
+
+
+def test_SpatialTree_modal_subtrees_keep_separate_shortest_path_caches(network):
+    spatial_tree = spatial.SpatialTree(network)
+    car_tree = spatial_tree.modal_subtree(modes="car")
+    car_tree.shortest_paths(DataFrame({"u": ["link_1"], "v": ["link_2"]}))
+
+    assert car_tree.shortest_path_cache_info()["size"] == 1
+    assert spatial_tree.shortest_path_cache_info()["size"] == 0
+    assert spatial_tree.modal_subtree(modes="car").shortest_path_cache_info()["size"] == 0
+
+
+def test_SpatialTree_shortest_path_cache_evicts_least_recently_used_link_pairs(mocker, network):
+    mocker.patch.object(spatial.SpatialTree, "shortest_path_cache_maxsize", 2)
+    spatial_tree = spatial.SpatialTree(network).modal_subtree(modes="car")
+
+    spatial_tree.shortest_path_lengths(DataFrame({"u": ["link_1"], "v": ["link_2"]}))
+    spatial_tree.shortest_path_lengths(DataFrame({"u": ["link_2"], "v": ["link_4"]}))
+    spatial_tree.shortest_path_lengths(DataFrame({"u": ["link_1"], "v": ["link_2"]}))
+    spatial_tree.shortest_path_lengths(DataFrame({"u": ["link_1"], "v": ["link_4"]}))
+
+    assert list(spatial_tree._shortest_path_cache) == [
+        ("length", "link_1", "link_2"),
+        ("length", "link_1", "link_4"),
+    ]
+
+
+def test_SpatialTree_shortest_paths_match_networkx_on_a_grid():
+    n = Network("epsg:27700")
+    side = 5
+    n.add_nodes(
+        {
+            f"{i}_{j}": {"x": 528000 + 100 * i, "y": 182000 + 100 * j}
+            for i in range(side)
+            for j in range(side)
+        },
+        silent=True,
+    )
+    links = {}
+    for i in range(side):
+        for j in range(side):
+            for di, dj in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
+                if 0 <= i + di < side and 0 <= j + dj < side:
+                    links[f"{i}_{j}-{i + di}_{j + dj}"] = {
+                        "from": f"{i}_{j}",
+                        "to": f"{i + di}_{j + dj}",
+                        "length": 100 + 7 * ((3 * i + 5 * j + di) % 4),
+                        "modes": {"car"},
+                    }
+    n.add_links(links, silent=True)
+    spatial_tree = spatial.SpatialTree(n).modal_subtree(modes="car")
+    link_ids = sorted(links)
+    df = DataFrame({"u": [u for u in link_ids[:10] for _ in link_ids], "v": link_ids * 10})
+
+    df = spatial_tree.shortest_path_lengths(df)
+
+    graph = nx.DiGraph()
+    graph.add_weighted_edges_from(
+        [
+            (u, v, u_data["length"])
+            for u, u_data in links.items()
+            for v, v_data in links.items()
+            if u_data["to"] == v_data["from"]
+        ],
+        weight="length",
+    )
+    for u, v, length in zip(df["u"], df["v"], df["path_lengths"]):
+        assert length == pytest.approx(
+            nx.dijkstra_path_length(graph, source=u, target=v, weight="length")
+        )
+
+
+def test_haversine_distance_of_one_degree_along_the_equator():
+    assert spatial.haversine_distance(0, 0, 1, 0) == pytest.approx(111195.08, abs=0.01)
+
+
+def test_SpatialTree_shortest_path_lengths_beyond_cutoff_are_missing(
+    assert_semantically_equal, network
+):
+    spatial_tree = spatial.SpatialTree(network).modal_subtree(modes="car")
+    df = DataFrame(
+        {
+            "u": ["link_1", "link_2", "link_1"],
+            "v": ["link_2", "link_4", "link_4"],
+            "cutoff": [200, 200, 200],
+        }
+    )
+
+    df = spatial_tree.shortest_path_lengths(df, cutoff_col="cutoff")
+    assert_semantically_equal(
+        df.T.to_dict(),
+        {
+            0: {"u": "link_1", "v": "link_2", "cutoff": 200, "path_lengths": 153.0294},
+            1: {"u": "link_2", "v": "link_4", "cutoff": 200, "path_lengths": 78.443},
+            2: {"u": "link_1", "v": "link_4", "cutoff": 200, "path_lengths": float("nan")},
+        },
+    )
+
+
+def test_SpatialTree_shortest_path_cache_answers_pairs_searched_up_to_a_longer_cutoff(network):
+    spatial_tree = spatial.SpatialTree(network).modal_subtree(modes="car")
+    df = DataFrame({"u": ["link_1"], "v": ["link_4"], "cutoff": [200]})
+
+    assert spatial_tree.shortest_paths(df.copy(), cutoff_col="cutoff")["shortest_path"].isna().all()
+    df["cutoff"] = 100
+    assert spatial_tree.shortest_paths(df.copy(), cutoff_col="cutoff")["shortest_path"].isna().all()
+    assert spatial_tree.shortest_path_cache_info()["hits"] == 1
+
+    assert spatial_tree.shortest_paths(df.copy())["shortest_path"].tolist() == [
+        ["link_1", "link_2", "link_4"]
+    ]
+    assert spatial_tree.shortest_path_cache_info()["misses"] == 2
+
+    assert spatial_tree.shortest_paths(df.copy(), cutoff_col="cutoff")["shortest_path"].isna().all()
+    assert spatial_tree.shortest_path_cache_info()["hits"] == 2